@@ -4,38 +4,61 @@
 import sys
 import os
 import csv
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from datetime import date
+
+SRC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, SRC_PATH)
 
 from davidbot.database.database import get_db_session
-from sqlalchemy import text
+from davidbot.database.models import Song
+from sqlalchemy import bindparam, func, select, update
+
+songs_table = Song.__table__
+
+# Built once so SQLAlchemy compiles it a single time and reuses it for every batch
+UPDATE_SONG_STMT = (
+    update(songs_table)
+    .where(songs_table.c.song_id == bindparam('b_id'))
+    .values(original_key=bindparam('b_key'), bpm=bindparam('b_bpm'), updated_at=func.datetime('now'))
+)
+
+TRUTHY_VALUES = frozenset({'TRUE', 'YES', '1'})
+
+
+def _parse_int(value):
+    """Parse an optional integer cell, treating blank/'None' as missing."""
+    return int(value) if value and value != 'None' else None
+
 
 def read_verification_csv(filename):
     """Read verification results from CSV file."""
     corrections = []
     
     try:
-        with open(filename, 'r') as f:
+        with open(filename, 'r', newline='') as f:
             reader = csv.DictReader(f)
             
-            for row in reader:
-                # Only process rows that have verification data
-                if row['verified_key'] and row['verified_bpm']:
-                    try:
-                        correction = {
-                            'song_id': int(row['song_id']),
-                            'title': row['title'],
-                            'artist': row['artist'],
-                            'current_key': row['current_key'],
-                            'current_bpm': int(row['current_bpm']) if row['current_bpm'] != 'None' else None,
-                            'verified_key': row['verified_key'],
-                            'verified_bpm': int(row['verified_bpm']),
-                            'source': row['source'],
-                            'matches_db': row['matches_db'].upper() in ['TRUE', 'YES', '1'],
-                            'notes': row['notes']
-                        }
-                        corrections.append(correction)
-                    except (ValueError, TypeError) as e:
-                        print(f"⚠️  Skipping invalid row for {row['title']}: {e}")
+            # Only process rows that have verification data
+            for row in (r for r in reader if r['verified_key'] and r['verified_bpm']):
+                try:
+                    correction = {
+                        'song_id': int(row['song_id']),
+                        'title': row['title'],
+                        'artist': row['artist'],
+                        'current_key': row['current_key'],
+                        'current_bpm': _parse_int(row['current_bpm']),
+                        'verified_key': row['verified_key'],
+                        'verified_bpm': int(row['verified_bpm']),
+                        'source': row['source'],
+                        'matches_db': row['matches_db'].upper() in TRUTHY_VALUES,
+                        'notes': row['notes']
+                    }
+                    # Compare once here so analysis, apply and report can reuse the flags
+                    correction['key_error'] = correction['current_key'] != correction['verified_key']
+                    correction['bpm_error'] = correction['current_bpm'] != correction['verified_bpm']
+                    corrections.append(correction)
+                except (ValueError, TypeError) as e:
+                    print(f"⚠️  Skipping invalid row for {row['title']}: {e}")
     
     except FileNotFoundError:
         print(f"❌ CSV file not found: {filename}")
@@ -44,6 +67,13 @@ def read_verification_csv(filename):
     
     return corrections
 
+def partition_corrections(corrections):
+    """Split corrections into (correct, errors) lists in a single pass."""
+    correct, errors = [], []
+    for correction in corrections:
+        (correct if correction['matches_db'] else errors).append(correction)
+    return correct, errors
+
 def analyze_verification_results(corrections):
     """Analyze verification results and show summary."""
     if not corrections:
@@ -55,27 +85,22 @@ def analyze_verification_results(corrections):
     print(f"Songs with verification data: {len(corrections)}")
     
     # Count matches vs errors
-    matches = sum(1 for c in corrections if c['matches_db'])
-    errors = len(corrections) - matches
+    correct, errors = partition_corrections(corrections)
     
-    print(f"✅ Correct in database: {matches}")
-    print(f"❌ Errors found: {errors}")
+    print(f"✅ Correct in database: {len(correct)}")
+    print(f"❌ Errors found: {len(errors)}")
     
-    if errors > 0:
+    if errors:
         print(f"\n🚨 ERRORS DETECTED:")
-        for correction in corrections:
-            if not correction['matches_db']:
-                print(f"   • {correction['title']} - {correction['artist']}")
-                
-                key_error = correction['current_key'] != correction['verified_key']
-                bpm_error = correction['current_bpm'] != correction['verified_bpm']
-                
-                if key_error:
-                    print(f"     Key: {correction['current_key']} → {correction['verified_key']}")
-                if bpm_error:
-                    print(f"     BPM: {correction['current_bpm']} → {correction['verified_bpm']}")
-                if correction['notes']:
-                    print(f"     Notes: {correction['notes']}")
+        for correction in errors:
+            print(f"   • {correction['title']} - {correction['artist']}")
+            
+            if correction['key_error']:
+                print(f"     Key: {correction['current_key']} → {correction['verified_key']}")
+            if correction['bpm_error']:
+                print(f"     BPM: {correction['current_bpm']} → {correction['verified_bpm']}")
+            if correction['notes']:
+                print(f"     Notes: {correction['notes']}")
     
     print(f"\n📈 Verification Coverage:")
     print(f"   Verified: {len(corrections)} / 69 songs ({len(corrections)/69*100:.1f}%)")
@@ -83,7 +108,7 @@ def analyze_verification_results(corrections):
 
 def apply_corrections(corrections, dry_run=True):
     """Apply corrections to database."""
-    errors_to_fix = [c for c in corrections if not c['matches_db']]
+    _, errors_to_fix = partition_corrections(corrections)
     
     if not errors_to_fix:
         print("✅ No corrections needed - all verified data matches database!")
@@ -95,36 +120,43 @@ def apply_corrections(corrections, dry_run=True):
     
     print(f"\n💾 Applying {len(errors_to_fix)} corrections to database...")
     
+    # Normalise every correction to the same UPDATE shape so the whole batch
+    # goes through a single executemany instead of one statement per song
+    changed = [c for c in errors_to_fix if c['key_error'] or c['bpm_error']]
+    updates = [
+        {'b_id': c['song_id'], 'b_key': c['verified_key'], 'b_bpm': c['verified_bpm']}
+        for c in changed
+    ]
+    
     try:
         with get_db_session() as session:
-            for correction in errors_to_fix:
-                updates = []
-                params = {'song_id': correction['song_id']}
-                
-                # Check what needs updating
-                if correction['current_key'] != correction['verified_key']:
-                    updates.append("original_key = :new_key")
-                    params['new_key'] = correction['verified_key']
-                
-                if correction['current_bpm'] != correction['verified_bpm']:
-                    updates.append("bpm = :new_bpm")
-                    params['new_bpm'] = correction['verified_bpm']
-                
-                if updates:
-                    # Add verification tracking
-                    updates.append("updated_at = datetime('now')")
-                    
-                    update_sql = f"UPDATE songs SET {', '.join(updates)} WHERE song_id = :song_id"
-                    session.execute(text(update_sql), params)
-                    
-                    print(f"   ✅ Updated: {correction['title']}")
-                    if correction['current_key'] != correction['verified_key']:
-                        print(f"      Key: {correction['current_key']} → {correction['verified_key']}")
-                    if correction['current_bpm'] != correction['verified_bpm']:
-                        print(f"      BPM: {correction['current_bpm']} → {correction['verified_bpm']}")
+            # Preflight: fetch the stored values for every target in one query and
+            # drop updates that are already applied, so re-runs don't rewrite rows
+            rows = session.execute(
+                select(songs_table.c.song_id, songs_table.c.original_key, songs_table.c.bpm)
+                .where(songs_table.c.song_id.in_([u['b_id'] for u in updates]))
+            ).fetchall()
+            stored = {song_id: (key, bpm) for song_id, key, bpm in rows}
+            pending_ids = {
+                u['b_id'] for u in updates
+                if u['b_id'] in stored and stored[u['b_id']] != (u['b_key'], u['b_bpm'])
+            }
+            
+            if not pending_ids:
+                print("✅ Database already matches the verified data - nothing to update")
+                return
             
+            session.execute(UPDATE_SONG_STMT, [u for u in updates if u['b_id'] in pending_ids])
             session.commit()
-            print(f"\n✅ All {len(errors_to_fix)} corrections applied successfully!")
+            
+            for correction in (c for c in changed if c['song_id'] in pending_ids):
+                print(f"   ✅ Updated: {correction['title']}")
+                if correction['key_error']:
+                    print(f"      Key: {correction['current_key']} → {correction['verified_key']}")
+                if correction['bpm_error']:
+                    print(f"      BPM: {correction['current_bpm']} → {correction['verified_bpm']}")
+            
+            print(f"\n✅ All {len(pending_ids)} corrections applied successfully!")
             
     except Exception as e:
         print(f"❌ Error applying corrections: {e}")
@@ -133,41 +165,43 @@ def generate_verification_report(corrections):
     """Generate a detailed verification report."""
     report_filename = "verification_report.md"
     
+    correct_songs, errors = partition_corrections(corrections)
+    
+    # Build the whole report in memory and hand it to the file in one write
+    parts = [
+        "# DavidBot Song Verification Report\n\n",
+        f"**Date**: {date.today()}\n",
+        f"**Songs Verified**: {len(corrections)} / 69\n\n",
+        "## Summary\n\n",
+        f"- ✅ **Correct**: {len(correct_songs)} songs\n",
+        f"- ❌ **Errors**: {len(errors)} songs\n",
+        f"- 📊 **Coverage**: {len(corrections)/69*100:.1f}%\n\n",
+    ]
+    
+    if errors:
+        parts.append("## Errors Found\n\n")
+        for correction in errors:
+            parts.append(f"### {correction['title']} - {correction['artist']}\n")
+            parts.append(f"**Song ID**: {correction['song_id']}\n\n")
+            
+            if correction['key_error']:
+                parts.append(f"- **Key Error**: {correction['current_key']} → {correction['verified_key']}\n")
+            if correction['bpm_error']:
+                parts.append(f"- **BPM Error**: {correction['current_bpm']} → {correction['verified_bpm']}\n")
+            
+            parts.append(f"- **Source**: {correction['source']}\n")
+            if correction['notes']:
+                parts.append(f"- **Notes**: {correction['notes']}\n")
+            parts.append("\n")
+    
+    parts.append("## Verified Correct Songs\n\n")
+    parts.extend(
+        f"- {c['title']} - {c['artist']} (Key {c['verified_key']}, {c['verified_bpm']} BPM)\n"
+        for c in correct_songs
+    )
+    
     with open(report_filename, 'w') as f:
-        f.write("# DavidBot Song Verification Report\\n\\n")
-        f.write(f"**Date**: {__import__('datetime').date.today()}\\n")
-        f.write(f"**Songs Verified**: {len(corrections)} / 69\\n\\n")
-        
-        # Summary
-        matches = sum(1 for c in corrections if c['matches_db'])
-        errors = len(corrections) - matches
-        
-        f.write("## Summary\\n\\n")
-        f.write(f"- ✅ **Correct**: {matches} songs\\n")
-        f.write(f"- ❌ **Errors**: {errors} songs\\n")
-        f.write(f"- 📊 **Coverage**: {len(corrections)/69*100:.1f}%\\n\\n")
-        
-        if errors > 0:
-            f.write("## Errors Found\\n\\n")
-            for correction in corrections:
-                if not correction['matches_db']:
-                    f.write(f"### {correction['title']} - {correction['artist']}\\n")
-                    f.write(f"**Song ID**: {correction['song_id']}\\n\\n")
-                    
-                    if correction['current_key'] != correction['verified_key']:
-                        f.write(f"- **Key Error**: {correction['current_key']} → {correction['verified_key']}\\n")
-                    if correction['current_bpm'] != correction['verified_bpm']:
-                        f.write(f"- **BPM Error**: {correction['current_bpm']} → {correction['verified_bpm']}\\n")
-                    
-                    f.write(f"- **Source**: {correction['source']}\\n")
-                    if correction['notes']:
-                        f.write(f"- **Notes**: {correction['notes']}\\n")
-                    f.write("\\n")
-        
-        f.write("## Verified Correct Songs\\n\\n")
-        correct_songs = [c for c in corrections if c['matches_db']]
-        for correction in correct_songs:
-            f.write(f"- {correction['title']} - {correction['artist']} (Key {correction['verified_key']}, {correction['verified_bpm']} BPM)\\n")
+        f.write("".join(parts))
     
     print(f"📄 Detailed report saved: {report_filename}")
 
@@ -6,7 +6,17 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from davidbot.database.database import get_db_session
-from sqlalchemy import text
+from davidbot.database.models import Song
+from sqlalchemy import bindparam, func, select, tuple_, update
+
+songs_table = Song.__table__
+
+# Built once so SQLAlchemy compiles it a single time and reuses it for every batch
+UPDATE_SONG_STMT = (
+    update(songs_table)
+    .where(songs_table.c.song_id == bindparam('b_id'))
+    .values(original_key=bindparam('b_key'), bpm=bindparam('b_bpm'), updated_at=func.datetime('now'))
+)
 
 # Known corrections based on MultiTracks verification
 CORRECTIONS = [
@@ -29,29 +39,29 @@ def apply_corrections(dry_run=True):
         print("DRY RUN - No changes will be made")
     
     with get_db_session() as session:
+        # Look up every corrected song in one query instead of one SELECT per correction
+        pairs = [(c['title'], c['artist']) for c in CORRECTIONS]
+        rows = session.execute(
+            select(Song.title, Song.artist, Song.song_id, Song.original_key, Song.bpm)
+            .where(tuple_(Song.title, Song.artist).in_(pairs))
+        ).fetchall()
+        songs_by_key = {(title, artist): (song_id, key, bpm) for title, artist, song_id, key, bpm in rows}
+        
+        updates = []
         for correction in CORRECTIONS:
             print(f"\\n🎵 {correction['title']} - {correction['artist']}")
             
-            # Find the song in database
-            result = session.execute(
-                text("SELECT song_id, original_key, bpm FROM songs WHERE title = :title AND artist = :artist"),
-                {'title': correction['title'], 'artist': correction['artist']}
-            ).fetchone()
-            
+            result = songs_by_key.get((correction['title'], correction['artist']))
             if not result:
                 print(f"   ❌ Song not found in database")
                 continue
             
             song_id, db_key, db_bpm = result
             needs_update = False
-            updates = []
-            params = {'song_id': song_id}
             
             # Check key
             if correction['correct_key'] != db_key:
                 print(f"   🔑 Key correction: {db_key} → {correction['correct_key']}")
-                updates.append("original_key = :correct_key")
-                params['correct_key'] = correction['correct_key']
                 needs_update = True
             else:
                 print(f"   ✅ Key is correct: {db_key}")
@@ -59,16 +69,19 @@ def apply_corrections(dry_run=True):
             # Check BPM
             if correction['correct_bpm'] != db_bpm:
                 print(f"   🥁 BPM correction: {db_bpm} → {correction['correct_bpm']}")
-                updates.append("bpm = :correct_bpm") 
-                params['correct_bpm'] = correction['correct_bpm']
                 needs_update = True
             else:
                 print(f"   ✅ BPM is correct: {db_bpm}")
             
+            if needs_update:
+                updates.append({
+                    'b_id': song_id,
+                    'b_key': correction['correct_key'],
+                    'b_bpm': correction['correct_bpm'],
+                })
+            
             if needs_update and not dry_run:
-                update_sql = f"UPDATE songs SET {', '.join(updates)} WHERE song_id = :song_id"
-                session.execute(text(update_sql), params)
-                print(f"   💾 Applied corrections")
+                print(f"   💾 Queued corrections")
             elif needs_update:
                 print(f"   🔍 Would apply corrections (dry run)")
             else:
@@ -76,7 +89,11 @@ def apply_corrections(dry_run=True):
             
             print(f"   📋 Source: {correction['source']}")
         
-        if not dry_run:
+        if not updates:
+            # Everything already matches; skip the write transaction entirely
+            print(f"\\n✅ Database already up to date - no corrections needed")
+        elif not dry_run:
+            session.execute(UPDATE_SONG_STMT, updates)
             session.commit()
             print(f"\\n✅ All corrections committed to database")
         else:
@@ -5,43 +5,49 @@ This script filters tags to only include approved tags from docs/tags.md.
 """
 
 import csv
-import json
+import os
 import re
+import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from davidbot.jsonutil import json_dumps_indented
 
 
 def load_approved_tags(tags_file: Path) -> Dict[str, str]:
     """Load approved tags from docs/tags.md"""
-    approved_tags = {}  # lowercase -> original case mapping
+    approved_tags = {}  # casefolded -> original case mapping
     
     with open(tags_file, 'r') as f:
         for line in f:
             tag = line.strip()
             if tag:  # Skip empty lines
-                approved_tags[tag.lower()] = tag  # Store lowercase mapping to original
+                approved_tags[tag.casefold()] = tag  # Store casefolded mapping to original
     
     return approved_tags
 
 
 def clean_tags(tag_string: str, approved_tags: Dict[str, str]) -> List[str]:
     """Clean and filter tags against approved list"""
-    if not tag_string or pd.isna(tag_string):
+    # csv.DictReader yields str/None cells; a stray NaN would stringify to 'nan',
+    # which is never an approved tag, so no separate missing-value check is needed
+    if not tag_string:
         return []
     
-    # Remove quotes and split by comma
-    tag_string = str(tag_string).strip('"').strip("'")
-    raw_tags = [tag.strip() for tag in tag_string.split(',')]
-    
-    # Filter against approved tags (case-insensitive)
-    filtered_tags = []
-    for tag in raw_tags:
-        tag_clean = tag.strip()
-        if tag_clean.lower() in approved_tags:
-            # Use the original case from approved tags
-            filtered_tags.append(approved_tags[tag_clean.lower()])
+    # Remove quotes and casefold the whole cell once rather than every tag separately
+    tag_string = str(tag_string).strip('"').strip("'").casefold()
     
-    return filtered_tags
+    # Filter against approved tags (case-insensitive), keeping the approved casing
+    return [approved_tags[tag] for tag in map(str.strip, tag_string.split(',')) if tag in approved_tags]
+
+
+def encode_song(song: Dict[str, Any]) -> bytes:
+    """Encode one song as an element of the indented JSON array"""
+    data = json_dumps_indented(song)
+    # Nest one level inside the array; encoded strings never contain raw newlines
+    return b"  " + data.replace(b"\n", b"\n  ")
 
 
 def convert_csv_to_json(csv_file: Path, tags_file: Path, output_file: Path):
@@ -52,11 +58,31 @@ def convert_csv_to_json(csv_file: Path, tags_file: Path, output_file: Path):
     approved_tags = load_approved_tags(tags_file)
     print(f"Loaded {len(approved_tags)} approved tags")
     
-    songs = []
+    print(f"Writing to {output_file}")
+    
+    # Stream songs to a temp file next to the output so memory stays flat regardless of CSV size,
+    # and only replace the previous output once the whole CSV has converted
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    try:
+        song_count, skipped_rows = _write_songs_json(csv_file, tmp_file, approved_tags)
+        os.replace(tmp_file, output_file)
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
+    
+    print(f"\nProcessed {song_count} songs, skipped {skipped_rows} rows")
+    print(f"Successfully converted {song_count} songs to JSON format")
+    return song_count
+
+
+def _write_songs_json(csv_file: Path, out_file: Path, approved_tags: Dict[str, str]) -> Tuple[int, int]:
+    """Stream every valid CSV row to out_file as a JSON array; returns (songs written, rows skipped)"""
+    song_count = 0
     skipped_rows = 0
     
-    with open(csv_file, 'r', encoding='utf-8') as f:
+    with open(csv_file, 'r', encoding='utf-8') as f, open(out_file, 'wb') as out:
         reader = csv.DictReader(f)
+        out.write(b"[")
         
         for row_num, row in enumerate(reader, start=2):  # Start at 2 because of header
             # Skip rows with missing essential data
@@ -65,11 +91,17 @@ def convert_csv_to_json(csv_file: Path, tags_file: Path, output_file: Path):
                 skipped_rows += 1
                 continue
             
+            # Strip each optional cell once up front
+            bpm_cell = (row.get('BPM') or '').strip()
+            key = (row.get('Key') or '').strip()
+            meter = row.get('Meter')
+            resource_link = row.get('Resource Link')
+            
             # Convert BPM to integer
             bpm = None
-            if row.get('BPM') and str(row['BPM']).strip():
+            if bpm_cell:
                 try:
-                    bpm = int(float(row['BPM']))
+                    bpm = int(float(bpm_cell))
                 except (ValueError, TypeError):
                     print(f"Warning: Invalid BPM '{row['BPM']}' for {row['Title']}")
             
@@ -77,7 +109,7 @@ def convert_csv_to_json(csv_file: Path, tags_file: Path, output_file: Path):
             tags = clean_tags(row.get('Tags', ''), approved_tags)
             
             # Process lead gender
-            lead = row.get('Lead', '').strip()
+            lead = (row.get('Lead') or '').strip()
             lead_gender = "Unknown"
             if lead in ['Male', 'Female']:
                 lead_gender = lead
@@ -89,32 +121,27 @@ def convert_csv_to_json(csv_file: Path, tags_file: Path, output_file: Path):
             song = {
                 "title": row['Title'].strip(),
                 "artist": row['Artist'].strip(),
-                "original_key": row.get('Key', '').strip() if row.get('Key') and row.get('Key').strip() else 'C',
+                "original_key": key or 'C',
                 "bpm": bpm,
-                "meter": row.get('Meter', '').strip() if row.get('Meter') else None,
+                "meter": meter.strip() if meter else None,
                 "tags": tags,
                 "lead_gender": lead_gender,
-                "url": row.get('Resource Link', '').strip() if row.get('Resource Link') else None,
+                "url": resource_link.strip() if resource_link else None,
                 "lyrics": ""  # Empty placeholder for now
             }
             
-            songs.append(song)
+            out.write((b",\n" if song_count else b"\n") + encode_song(song))
+            song_count += 1
             
             # Log tag filtering for first few songs
             if row_num <= 5:
                 original_tags = [tag.strip() for tag in str(row.get('Tags', '')).strip('"').split(',') if tag.strip()]
                 filtered_count = len(tags)
                 print(f"Row {row_num} ({song['title']}): {len(original_tags)} → {filtered_count} tags")
+        
+        out.write(b"\n]" if song_count else b"]")
     
-    print(f"\nProcessed {len(songs)} songs, skipped {skipped_rows} rows")
-    print(f"Writing to {output_file}")
-    
-    # Write JSON output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(songs, f, indent=2, ensure_ascii=False)
-    
-    print(f"Successfully converted {len(songs)} songs to JSON format")
-    return len(songs)
+    return song_count, skipped_rows
 
 
 def main():
@@ -155,14 +182,4 @@ def main():
 
 if __name__ == "__main__":
     import sys
-    # Add pandas import at runtime if available
-    try:
-        import pandas as pd
-    except ImportError:
-        # Create a simple mock for pd.isna
-        class pd:
-            @staticmethod
-            def isna(value):
-                return value is None or value == '' or str(value).lower() == 'nan'
-    
     sys.exit(main())
\ No newline at end of file
@@ -60,6 +60,8 @@ async def main():
                        help="Process only specific song by ID")
     parser.add_argument("--confidence-threshold", type=float, default=0.5,
                        help="Minimum confidence to apply changes (default: 0.5)")
+    parser.add_argument("--concurrency", type=int, default=5,
+                       help="Maximum songs searched in parallel (default: 5)")
     parser.add_argument("--db-path", type=str, default="data/davidbot.db",
                        help="Path to database file")
     parser.add_argument("--taxonomy", type=str, default="docs/tags.md",
@@ -81,18 +83,14 @@ async def main():
     print("="*70)
     
     # Initialize enhancer
-    enhancer = SongTagEnhancer(db_path=args.db_path, taxonomy_file=args.taxonomy)
+    enhancer = SongTagEnhancer(db_path=args.db_path, taxonomy_file=args.taxonomy,
+                               max_concurrency=args.concurrency)
     
     try:
         if args.song_id:
             # Process single song
             print(f"Processing single song ID: {args.song_id}")
-            songs = enhancer.get_songs_from_db()
-            target_song = None
-            for song in songs:
-                if song['song_id'] == args.song_id:
-                    target_song = song
-                    break
+            target_song = enhancer.get_song_by_id(args.song_id)
             
             if not target_song:
                 print(f"❌ Song ID {args.song_id} not found")
@@ -108,15 +106,17 @@ async def main():
         else:
             # Process all songs
             print("Processing all songs...")
-            results = await enhancer.enhance_all_songs(dry_run=dry_run)
+            # Search only; updates are applied below using the CLI threshold
+            results = await enhancer.enhance_all_songs(dry_run=True)
         
         # Apply updates if not dry run
         if not dry_run:
-            updates_applied = 0
-            for result in results:
-                if result.confidence_score >= args.confidence_threshold:
-                    if enhancer.update_song_tags(result.song_id, result.suggested_tags):
-                        updates_applied += 1
+            updates = [
+                {'song_id': result.song_id, 'tags': result.suggested_tags}
+                for result in results
+                if result.confidence_score >= args.confidence_threshold
+            ]
+            updates_applied = enhancer.bulk_update_song_tags(updates)
             
             print(f"\n✅ Applied {updates_applied} updates to database")
         
@@ -5,7 +5,7 @@ import sys
 import os
 sys.path.insert(0, 'src')
 
-from davidbot.database import get_db_session, get_engine
+from davidbot.database import get_db_session, get_engine, refresh_lyrics_search
 from davidbot.database.models import Base
 from sqlalchemy import text
 
@@ -26,6 +26,10 @@ def migrate_lyrics_structure():
         
         print("Current columns:", columns)
         
+        # Take the write lock up front so CREATE, copy, DROP and RENAME commit
+        # (or roll back) as one transaction
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        
         # Step 1: Create new table with updated structure
         print("Creating new lyrics table with updated structure...")
         conn.execute(text("""
@@ -56,6 +60,9 @@ def migrate_lyrics_structure():
         
         print("Migration completed successfully!")
         print("Note: All lyrics sections are now NULL - populate with actual first_line, chorus, bridge content")
+    
+    # The rebuilt table has no search_blob column or full-text triggers yet
+    refresh_lyrics_search()
 
 if __name__ == "__main__":
     migrate_lyrics_structure()
\ No newline at end of file
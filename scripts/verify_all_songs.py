@@ -3,71 +3,106 @@
 
 import sys
 import os
+import csv
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from functools import lru_cache
+from itertools import groupby
+from urllib.parse import quote
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from davidbot.database.database import get_db_session
 from sqlalchemy import text
 
+# Section rules shared by the report printers
+SEPARATOR_60 = "=" * 60
+SEPARATOR_50 = "=" * 50
+SEPARATOR_40 = "=" * 40
+SEPARATOR_30 = "=" * 30
+LETTER_RULE = "=" * 5
+
+# BPM ranges for the summary, bounded above by BPM_RANGE_UPPER_BOUNDS (inclusive)
+BPM_RANGES = ("Slow (≤85)", "Moderate (86-120)", "Fast (≥121)")
+BPM_RANGE_UPPER_BOUNDS = (85, 120)
+MISSING_BPM = "Missing BPM"
+
+# Key distribution is listed chromatically; other keys (e.g. minor) follow alphabetically, then missing
+KEY_ORDER = ('C', 'C#', 'Db', 'D', 'D#', 'Eb', 'E', 'F', 'F#', 'Gb', 'G', 'G#', 'Ab', 'A', 'A#', 'Bb', 'B')
+MISSING_KEY = "Missing"
+
+SongRow = namedtuple('SongRow', 'song_id title artist original_key bpm')
+
+# One VERIFIED_DATA entry per song in the generated template
+TEMPLATE_ENTRY = (
+    '    "{title}": {{\n'
+    '        "artist": "{artist}",\n'
+    '        "current_key": "{key}",\n'
+    '        "current_bpm": {bpm},\n'
+    '        "correct_key": "",  # Fill from MultiTracks\n'
+    '        "correct_bpm": 0,   # Fill from MultiTracks\n'
+    '        "source": "MultiTracks.com verified YYYY-MM-DD",\n'
+    '        "matches": False,   # True if current data is correct\n'
+    '        "notes": ""\n'
+    '    }},'
+)
+
+@lru_cache(maxsize=512)
+def search_url(title):
+    """MultiTracks search URL for a title, shared by the checklist and batch URL outputs."""
+    return f"https://www.multitracks.com/search?q={quote(title, safe='')}"
+
 def get_all_songs():
     """Get all songs from database for verification."""
     print("🎵 Complete Database Verification - All 69 Songs")
-    print("=" * 60)
+    print(SEPARATOR_60)
     
     with get_db_session() as session:
-        songs = session.execute(
-            text("SELECT song_id, title, artist, original_key, bpm FROM songs WHERE is_active = true ORDER BY title")
-        ).fetchall()
+        songs = [
+            SongRow(*row) for row in session.execute(
+                text("SELECT song_id, title, artist, original_key, bpm FROM songs WHERE is_active = true ORDER BY title COLLATE NOCASE")
+            )
+        ]
         
     print(f"Found {len(songs)} songs to verify\n")
     return songs
 
 def generate_complete_checklist(songs):
     """Generate verification checklist for all songs."""
-    print("📋 COMPLETE VERIFICATION CHECKLIST - ALL SONGS")
-    print("=" * 60)
-    print("Visit MultiTracks.com and verify each song's Key and BPM:")
-    print("Copy this data into a spreadsheet or document for easy reference.\n")
-    
-    # Group by first letter for easier navigation
-    songs_by_letter = {}
-    for song in songs:
-        first_letter = song.title[0].upper()
-        if first_letter not in songs_by_letter:
-            songs_by_letter[first_letter] = []
-        songs_by_letter[first_letter].append(song)
-    
-    for letter in sorted(songs_by_letter.keys()):
-        print(f"\n{'='*5} {letter} {'='*5}")
-        for i, song in enumerate(songs_by_letter[letter], 1):
-            search_title = song.title.replace(' ', '%20').replace('(', '%28').replace(')', '%29')
-            print(f"\n{song.song_id:2d}. {song.title} - {song.artist}")
-            print(f"    Current DB: Key {song.original_key} | {song.bpm} BPM")
-            print(f"    URL: https://www.multitracks.com/search?q={search_title}")
-            print(f"    ✓ Verified Key: ___  ✓ Verified BPM: ___")
-            print(f"    ✓ Matches DB: ___  ✓ Notes: _______________")
+    lines = []  # Buffered and written once at the end
+    lines.append("📋 COMPLETE VERIFICATION CHECKLIST - ALL SONGS")
+    lines.append(SEPARATOR_60)
+    lines.append("Visit MultiTracks.com and verify each song's Key and BPM:")
+    lines.append("Copy this data into a spreadsheet or document for easy reference.\n")
+    
+    # Group by first letter for easier navigation; songs arrive sorted by title
+    for letter, letter_songs in groupby(songs, key=lambda song: song.title[0].upper()):
+        lines.append(f"\n{LETTER_RULE} {letter} {LETTER_RULE}")
+        for song in letter_songs:
+            lines.append(f"\n{song.song_id:2d}. {song.title} - {song.artist}")
+            lines.append(f"    Current DB: Key {song.original_key} | {song.bpm} BPM")
+            lines.append(f"    URL: {search_url(song.title)}")
+            lines.append(f"    ✓ Verified Key: ___  ✓ Verified BPM: ___")
+            lines.append(f"    ✓ Matches DB: ___  ✓ Notes: _______________")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def generate_verification_template(songs):
     """Generate a structured template for recording verification results."""
-    print("📊 VERIFICATION DATA TEMPLATE")
-    print("=" * 50)
-    print("Copy this template and fill in verified data:")
-    print()
-    print("VERIFIED_DATA = {")
-    
-    for song in songs:
-        title_key = song.title
-        print(f'    "{title_key}": {{')
-        print(f'        "artist": "{song.artist}",')
-        print(f'        "current_key": "{song.original_key}",')
-        print(f'        "current_bpm": {song.bpm},')
-        print(f'        "correct_key": "",  # Fill from MultiTracks')
-        print(f'        "correct_bpm": 0,   # Fill from MultiTracks')
-        print(f'        "source": "MultiTracks.com verified YYYY-MM-DD",')
-        print(f'        "matches": False,   # True if current data is correct')
-        print(f'        "notes": ""')
-        print(f'    }},')
-    
-    print("}")
+    lines = []
+    lines.append("📊 VERIFICATION DATA TEMPLATE")
+    lines.append(SEPARATOR_50)
+    lines.append("Copy this template and fill in verified data:")
+    lines.append("")
+    lines.append("VERIFIED_DATA = {")
+    
+    lines.extend(
+        TEMPLATE_ENTRY.format(title=song.title, artist=song.artist, key=song.original_key, bpm=song.bpm)
+        for song in songs
+    )
+    
+    lines.append("}")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def create_csv_template(songs):
     """Create a CSV template for easier data entry."""
@@ -75,13 +110,21 @@ def create_csv_template(songs):
     
     print(f"\n📄 Creating CSV template: {csv_filename}")
     
-    with open(csv_filename, 'w') as f:
+    # csv.writer handles quoting of titles with commas/quotes; rows are written in one batch
+    with open(csv_filename, 'w', newline='', buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        
         # Header
-        f.write("song_id,title,artist,current_key,current_bpm,verified_key,verified_bpm,source,matches_db,notes\n")
+        writer.writerow([
+            'song_id', 'title', 'artist', 'current_key', 'current_bpm',
+            'verified_key', 'verified_bpm', 'source', 'matches_db', 'notes'
+        ])
         
         # Data rows
-        for song in songs:
-            f.write(f'{song.song_id},"{song.title}","{song.artist}",{song.original_key},{song.bpm},,,MultiTracks.com,,\n')
+        writer.writerows(
+            (song.song_id, song.title, song.artist, song.original_key, song.bpm, '', '', 'MultiTracks.com', '', '')
+            for song in songs
+        )
     
     print(f"✅ CSV template created: {csv_filename}")
     print(f"   1. Open in Excel/Google Sheets")
@@ -92,61 +135,53 @@ def create_csv_template(songs):
 
 def generate_batch_urls(songs):
     """Generate batched URLs for efficient verification."""
-    print(f"\n🔗 BATCH VERIFICATION URLS")
-    print("=" * 40)
-    print("Open these in browser tabs (10 songs per batch):")
+    lines = []
+    lines.append(f"\n🔗 BATCH VERIFICATION URLS")
+    lines.append(SEPARATOR_40)
+    lines.append("Open these in browser tabs (10 songs per batch):")
     
     batch_size = 10
     for i in range(0, len(songs), batch_size):
         batch = songs[i:i+batch_size]
-        print(f"\n📦 Batch {i//batch_size + 1} (Songs {i+1}-{min(i+batch_size, len(songs))}):")
+        lines.append(f"\n📦 Batch {i//batch_size + 1} (Songs {i+1}-{min(i+batch_size, len(songs))}):")
         
         for song in batch:
-            search_title = song.title.replace(' ', '%20').replace('(', '%28').replace(')', '%29')
-            print(f"   https://www.multitracks.com/search?q={search_title}")
+            lines.append(f"   {search_url(song.title)}")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def show_database_summary(songs):
     """Show summary statistics of current database."""
-    print(f"\n📊 DATABASE SUMMARY")
-    print("=" * 30)
-    print(f"Total songs: {len(songs)}")
-    
-    # BPM distribution
-    bpm_ranges = {
-        "Slow (≤85)": 0,
-        "Moderate (86-120)": 0, 
-        "Fast (≥121)": 0,
-        "Missing BPM": 0
-    }
+    lines = []
+    lines.append(f"\n📊 DATABASE SUMMARY")
+    lines.append(SEPARATOR_30)
+    lines.append(f"Total songs: {len(songs)}")
+    
+    # BPM distribution: bisect maps each BPM onto its range by upper bound
+    bpm_counts = Counter(
+        BPM_RANGES[bisect_left(BPM_RANGE_UPPER_BOUNDS, song.bpm)] if song.bpm else MISSING_BPM
+        for song in songs
+    )
     
     # Key distribution
-    keys = {}
-    
-    for song in songs:
-        # BPM analysis
-        if not song.bpm:
-            bpm_ranges["Missing BPM"] += 1
-        elif song.bpm <= 85:
-            bpm_ranges["Slow (≤85)"] += 1
-        elif song.bpm <= 120:
-            bpm_ranges["Moderate (86-120)"] += 1
-        else:
-            bpm_ranges["Fast (≥121)"] += 1
-        
-        # Key analysis
-        key = song.original_key or "Missing"
-        keys[key] = keys.get(key, 0) + 1
+    keys = Counter(song.original_key or MISSING_KEY for song in songs)
     
-    print("\n🥁 BPM Distribution:")
-    for range_name, count in bpm_ranges.items():
+    lines.append("\n🥁 BPM Distribution:")
+    for range_name in (*BPM_RANGES, MISSING_BPM):
+        count = bpm_counts[range_name]
         percentage = (count / len(songs)) * 100
-        print(f"   {range_name}: {count} songs ({percentage:.1f}%)")
+        lines.append(f"   {range_name}: {count} songs ({percentage:.1f}%)")
     
-    print("\n🎹 Key Distribution:")
-    for key in sorted(keys.keys()):
+    lines.append("\n🎹 Key Distribution:")
+    unordered_keys = sorted(keys.keys() - {*KEY_ORDER, MISSING_KEY})
+    for key in (*KEY_ORDER, *unordered_keys, MISSING_KEY):
         count = keys[key]
+        if not count:
+            continue
         percentage = (count / len(songs)) * 100
-        print(f"   {key}: {count} songs ({percentage:.1f}%)")
+        lines.append(f"   {key}: {count} songs ({percentage:.1f}%)")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     import argparse
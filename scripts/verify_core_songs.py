@@ -3,10 +3,16 @@
 
 import sys
 import os
+from urllib.parse import quote
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from davidbot.database.database import get_db_session
-from sqlalchemy import text
+from davidbot.database.models import Song
+from sqlalchemy import select, tuple_
+
+# Section rules used by the report output
+SEPARATOR_60 = "=" * 60
+SEPARATOR_50 = "=" * 50
 
 # Core worship songs that need accurate data verification
 # Based on popularity, familiarity scores, and common worship themes
@@ -49,19 +55,27 @@ VERIFIED_DATA = {
     # Add more as we verify them manually
 }
 
+# Core songs still waiting on a manual lookup
+UNVERIFIED_CORE_SONGS = [s for s in CORE_SONGS_TO_VERIFY if s['title'] not in VERIFIED_DATA]
+
 def get_current_database_values():
     """Get current values for core songs from database."""
     print("🔍 Current Database Values for Core Songs")
-    print("=" * 60)
+    print(SEPARATOR_60)
     
     with get_db_session() as session:
         songs_data = []
         
+        # Fetch all core songs in one round-trip, then match them up in memory
+        pairs = [(s['title'], s['artist']) for s in CORE_SONGS_TO_VERIFY]
+        rows = session.execute(
+            select(Song.song_id, Song.title, Song.artist, Song.original_key, Song.bpm)
+            .where(tuple_(Song.title, Song.artist).in_(pairs))
+        ).fetchall()
+        rows_by_key = {(row.title, row.artist): row for row in rows}
+        
         for song_info in CORE_SONGS_TO_VERIFY:
-            result = session.execute(
-                text("SELECT song_id, title, artist, original_key, bpm FROM songs WHERE title = :title AND artist = :artist"),
-                {'title': song_info['title'], 'artist': song_info['artist']}
-            ).fetchone()
+            result = rows_by_key.get((song_info['title'], song_info['artist']))
             
             if result:
                 song_data = {
@@ -74,8 +88,8 @@ def get_current_database_values():
                 }
                 
                 # Check if we have verified data
-                if result.title in VERIFIED_DATA:
-                    verified = VERIFIED_DATA[result.title]
+                verified = VERIFIED_DATA.get(result.title)
+                if verified:
                     song_data['verified_key'] = verified['correct_key']
                     song_data['verified_bpm'] = verified['correct_bpm']
                     song_data['source'] = verified['source']
@@ -92,71 +106,71 @@ def get_current_database_values():
 
 def generate_verification_report(songs_data):
     """Generate a detailed verification report."""
-    print(f"\n📊 CORE SONGS VERIFICATION REPORT")
-    print("=" * 60)
+    lines = []
+    lines.append(f"\n📊 CORE SONGS VERIFICATION REPORT")
+    lines.append(SEPARATOR_60)
     
     verified_count = 0
     error_count = 0
     needs_verification_count = 0
     
     for song in songs_data:
-        print(f"\n🎵 {song['title']} - {song['artist']}")
-        print(f"   ID: {song['song_id']}")
-        print(f"   Database: Key {song['db_key']} | {song['db_bpm']} BPM")
+        lines.append(f"\n🎵 {song['title']} - {song['artist']}")
+        lines.append(f"   ID: {song['song_id']}")
+        lines.append(f"   Database: Key {song['db_key']} | {song['db_bpm']} BPM")
         
         if 'verified_key' in song:
             # We have verification data
             if song['key_correct'] and song['bpm_correct']:
-                print(f"   ✅ VERIFIED CORRECT")
-                print(f"   Source: {song['source']}")
+                lines.append(f"   ✅ VERIFIED CORRECT")
+                lines.append(f"   Source: {song['source']}")
                 verified_count += 1
             else:
-                print(f"   ❌ DATA ERROR DETECTED")
+                lines.append(f"   ❌ DATA ERROR DETECTED")
                 if not song['key_correct']:
-                    print(f"      Key: {song['db_key']} → {song['verified_key']}")
+                    lines.append(f"      Key: {song['db_key']} → {song['verified_key']}")
                 if not song['bpm_correct']:
-                    print(f"      BPM: {song['db_bpm']} → {song['verified_bpm']}")
-                print(f"   Source: {song['source']}")
+                    lines.append(f"      BPM: {song['db_bpm']} → {song['verified_bpm']}")
+                lines.append(f"   Source: {song['source']}")
                 error_count += 1
         else:
-            print(f"   ⚠️  NEEDS VERIFICATION")
-            print(f"      Please verify against MultiTracks or authoritative source")
+            lines.append(f"   ⚠️  NEEDS VERIFICATION")
+            lines.append(f"      Please verify against MultiTracks or authoritative source")
             needs_verification_count += 1
     
-    print(f"\n📈 VERIFICATION SUMMARY")
-    print(f"   ✅ Verified Correct: {verified_count}")
-    print(f"   ❌ Errors Found: {error_count}")  
-    print(f"   ⚠️  Needs Verification: {needs_verification_count}")
-    print(f"   📊 Total Core Songs: {len(songs_data)}")
+    lines.append(f"\n📈 VERIFICATION SUMMARY")
+    lines.append(f"   ✅ Verified Correct: {verified_count}")
+    lines.append(f"   ❌ Errors Found: {error_count}")  
+    lines.append(f"   ⚠️  Needs Verification: {needs_verification_count}")
+    lines.append(f"   📊 Total Core Songs: {len(songs_data)}")
     
     if error_count > 0:
-        print(f"\n🚨 CRITICAL: {error_count} songs have incorrect data!")
-        print(f"   This will cause filtering and search issues.")
-        print(f"   Run correction script to fix known errors.")
+        lines.append(f"\n🚨 CRITICAL: {error_count} songs have incorrect data!")
+        lines.append(f"   This will cause filtering and search issues.")
+        lines.append(f"   Run correction script to fix known errors.")
     
     if needs_verification_count > 0:
-        print(f"\n📋 ACTION NEEDED: {needs_verification_count} songs need manual verification")
-        print(f"   1. Look up each song on MultiTracks.com")
-        print(f"   2. Note correct Key and BPM")
-        print(f"   3. Add to VERIFIED_DATA in this script")
-        print(f"   4. Run correction script to apply fixes")
+        lines.append(f"\n📋 ACTION NEEDED: {needs_verification_count} songs need manual verification")
+        lines.append(f"   1. Look up each song on MultiTracks.com")
+        lines.append(f"   2. Note correct Key and BPM")
+        lines.append(f"   3. Add to VERIFIED_DATA in this script")
+        lines.append(f"   4. Run correction script to apply fixes")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def create_verification_checklist():
     """Create a checklist for manual verification."""
     print(f"\n📋 MANUAL VERIFICATION CHECKLIST")
-    print("=" * 50)
+    print(SEPARATOR_50)
     print(f"Visit MultiTracks.com and verify these songs:\n")
     
-    checklist_count = 0
-    for song_info in CORE_SONGS_TO_VERIFY:
-        if song_info['title'] not in VERIFIED_DATA:
-            checklist_count += 1
-            print(f"{checklist_count:2d}. {song_info['title']} - {song_info['artist']}")
-            print(f"    URL: https://www.multitracks.com/search?q={song_info['title'].replace(' ', '%20')}")
-            print(f"    ✓ Key: ___  ✓ BPM: ___")
-            print()
+    for checklist_count, song_info in enumerate(UNVERIFIED_CORE_SONGS, 1):
+        print(f"{checklist_count:2d}. {song_info['title']} - {song_info['artist']}")
+        print(f"    URL: https://www.multitracks.com/search?q={quote(song_info['title'], safe='')}")
+        print(f"    ✓ Key: ___  ✓ BPM: ___")
+        print()
     
-    print(f"Total songs to verify: {checklist_count}")
+    print(f"Total songs to verify: {len(UNVERIFIED_CORE_SONGS)}")
 
 if __name__ == "__main__":
     import argparse
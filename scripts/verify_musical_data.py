@@ -6,29 +6,111 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 import re
+import time
+import shelve
 import asyncio
+from collections import namedtuple
+from functools import lru_cache
 import aiohttp
 from urllib.parse import quote
 from davidbot.database.database import get_db_session
 from sqlalchemy import text
 
+# Plain tuples detached from the session, with cheap attribute access
+SongRow = namedtuple('SongRow', 'song_id title artist original_key bpm')
+
+# Pages are matched as raw bytes so only the captured fields get decoded
+
+# Search results page
+SONG_LINK_PATTERN = re.compile(rb'<a[^>]*href="(/songs/[^"]*)"[^>]*>')
+
+# Song page fields; BPM and key are searched from the end of the <h1> onwards
+TITLE_PATTERN = re.compile(rb'<h1[^>]*>([^<]+)</h1>')
+BPM_PATTERN = re.compile(rb'BPM:\s*(\d+)')
+KEY_PATTERN = re.compile(rb'Key:\s*([A-G]#?b?)')
+
+# Common title variations ignored when matching ("(Live)", "(feat. ...)", "- Live")
+TITLE_VARIATION_PATTERN = re.compile(r'\s*\(live\)|\s*\(feat\..*\)|\s*-\s*live')
+
+
+# On-disk cache of fetched MultiTracks pages so repeat runs skip the network
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'multitracks_cache')
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Minimum spacing between network requests across all workers (about 1 request/second)
+MIN_REQUEST_INTERVAL_SECONDS = 1.0
+
+
+@lru_cache(maxsize=512)
+def normalize_title(title):
+    """Lowercase a title and strip common live/featuring variations."""
+    return TITLE_VARIATION_PATTERN.sub('', title.lower().strip())
+
 class MusicalDataVerifier:
     """Verify BPM and key data by searching MultiTracks."""
     
-    def __init__(self):
+    def __init__(self, concurrency=4, cache_path=DEFAULT_CACHE_PATH):
         self.base_url = "https://www.multitracks.com"
         self.session = None
         self.corrections = []
+        self.concurrency = concurrency
+        self.cache_path = cache_path
+        self.cache = None
+        self._rate_lock = asyncio.Lock()
+        self._next_request_at = 0.0
         
     async def __aenter__(self):
-        # Create connector with SSL verification disabled for corporate networks
-        connector = aiohttp.TCPConnector(ssl=False)
-        self.session = aiohttp.ClientSession(connector=connector)
+        # Create connector with SSL verification disabled for corporate networks.
+        # Connections are kept alive and DNS is cached so the search and song-page
+        # requests to MultiTracks reuse sockets instead of reconnecting each time.
+        connector = aiohttp.TCPConnector(
+            ssl=False,
+            limit=32,
+            limit_per_host=16,
+            keepalive_timeout=60,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+        if self.cache_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            self.cache = shelve.open(self.cache_path)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+    
+    async def fetch_page(self, url):
+        """Fetch a page as (status, body bytes), serving fresh copies from the local cache."""
+        if self.cache is not None:
+            entry = self.cache.get(url)
+            if entry and 'body' in entry and time.time() - entry['fetched_at'] < CACHE_TTL_SECONDS:
+                return 200, entry['body']
+        
+        await self._wait_for_request_slot()
+        async with self.session.get(url) as response:
+            if response.status != 200:
+                return response.status, None
+            body = await response.read()
+        
+        if self.cache is not None:
+            self.cache[url] = {'fetched_at': time.time(), 'body': body}
+        return 200, body
+    
+    async def _wait_for_request_slot(self):
+        """Space network requests MIN_REQUEST_INTERVAL_SECONDS apart, however many searches run at once."""
+        async with self._rate_lock:
+            now = time.monotonic()
+            if self._next_request_at > now:
+                await asyncio.sleep(self._next_request_at - now)
+                now = self._next_request_at
+            self._next_request_at = now + MIN_REQUEST_INTERVAL_SECONDS
     
     async def search_song_data(self, title, artist):
         """Search MultiTracks for accurate BPM and key data."""
@@ -39,29 +121,27 @@ class MusicalDataVerifier:
             
             print(f"🔍 Searching: {title} - {artist}")
             
-            async with self.session.get(search_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status != 200:
-                    print(f"   ❌ Search failed: HTTP {response.status}")
-                    return None
-                
-                html = await response.text()
-                
-                # Look for song links in search results
-                song_links = re.findall(r'<a[^>]*href="(/songs/[^"]*)"[^>]*>', html)
-                
-                if not song_links:
-                    print(f"   ❌ No song links found")
-                    return None
-                
-                # Try the first few links
-                for link in song_links[:3]:
-                    song_url = f"{self.base_url}{link}"
-                    song_data = await self.extract_song_data(song_url, title)
-                    if song_data:
-                        return song_data
-                
-                print(f"   ❌ No matching songs found in results")
+            status, body = await self.fetch_page(search_url)
+            if status != 200:
+                print(f"   ❌ Search failed: HTTP {status}")
                 return None
+            
+            # Look for song links in search results
+            song_links = SONG_LINK_PATTERN.findall(body)
+            
+            if not song_links:
+                print(f"   ❌ No song links found")
+                return None
+            
+            # Try the first few links
+            for link in song_links[:3]:
+                song_url = f"{self.base_url}{link.decode('utf-8', 'replace')}"
+                song_data = await self.extract_song_data(song_url, title)
+                if song_data:
+                    return song_data
+            
+            print(f"   ❌ No matching songs found in results")
+            return None
                 
         except Exception as e:
             print(f"   ❌ Error searching {title}: {e}")
@@ -70,57 +150,59 @@ class MusicalDataVerifier:
     async def extract_song_data(self, url, expected_title):
         """Extract BPM and key from MultiTracks song page."""
         try:
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status != 200:
-                    return None
-                
-                html = await response.text()
-                
-                # Extract title to verify it's the right song
-                title_match = re.search(r'<h1[^>]*>([^<]+)</h1>', html)
-                if not title_match:
-                    return None
-                
-                page_title = title_match.group(1).strip()
-                
-                # Check if titles are similar (allow for variations like "Live", etc.)
-                if not self.titles_match(expected_title, page_title):
-                    return None
-                
-                # Extract BPM
-                bpm_match = re.search(r'BPM:\s*(\d+)', html)
-                bpm = int(bpm_match.group(1)) if bpm_match else None
-                
-                # Extract Key  
-                key_match = re.search(r'Key:\s*([A-G]#?b?)', html)
-                key = key_match.group(1) if key_match else None
-                
-                if bpm or key:
-                    print(f"   ✅ Found: {page_title} | Key: {key} | BPM: {bpm}")
-                    return {
-                        'title': page_title,
-                        'key': key,
-                        'bpm': bpm,
-                        'url': url
-                    }
-                
+            status, body = await self.fetch_page(url)
+            if status != 200:
                 return None
-                
+            
+            # Extract title to verify it's the right song
+            title_match = TITLE_PATTERN.search(body)
+            if not title_match:
+                return None
+            
+            page_title = title_match.group(1).decode('utf-8', 'replace').strip()
+            
+            # Check if titles are similar (allow for variations like "Live", etc.)
+            if not self.titles_match(expected_title, page_title):
+                return None
+            
+            # Song details follow the title, so skip the page head and navigation
+            details_start = title_match.end()
+            
+            # Extract BPM
+            bpm_match = BPM_PATTERN.search(body, details_start)
+            bpm = int(bpm_match.group(1)) if bpm_match else None
+            
+            # Extract Key  
+            key_match = KEY_PATTERN.search(body, details_start)
+            key = key_match.group(1).decode('ascii') if key_match else None
+            
+            if bpm or key:
+                print(f"   ✅ Found: {page_title} | Key: {key} | BPM: {bpm}")
+                return {
+                    'title': page_title,
+                    'key': key,
+                    'bpm': bpm,
+                    'url': url
+                }
+            
+            return None
+            
         except Exception as e:
             print(f"   ❌ Error extracting data from {url}: {e}")
             return None
     
     def titles_match(self, db_title, web_title):
         """Check if database title matches web title (allowing for variations)."""
-        # Normalize titles - remove common variations
-        def normalize_title(title):
-            title = title.lower().strip()
-            # Remove common suffixes/prefixes
-            title = re.sub(r'\s*\(live\)|\s*\(feat\..*\)|\s*-\s*live', '', title)
-            return title
+        normalized_db = db_title.lower().strip()
+        normalized_web = web_title.lower().strip()
+        if normalized_db == normalized_web:
+            return True
         
-        normalized_db = normalize_title(db_title)
-        normalized_web = normalize_title(web_title)
+        # The variation pattern can only match around "live" or "feat.", so
+        # titles without either compare as-is without running the regex
+        if any(marker in title for title in (normalized_db, normalized_web) for marker in ('live', 'feat.')):
+            normalized_db = normalize_title(db_title)
+            normalized_web = normalize_title(web_title)
         
         # Check exact match or contains
         return normalized_db == normalized_web or normalized_db in normalized_web or normalized_web in normalized_db
@@ -131,19 +213,29 @@ class MusicalDataVerifier:
         print("=" * 50)
         
         with get_db_session() as db_session:
-            query = text("SELECT song_id, title, artist, original_key, bpm FROM songs WHERE is_active = true")
+            query = "SELECT song_id, title, artist, original_key, bpm FROM songs WHERE is_active = true"
+            params = {}
             if limit:
-                query = text(f"SELECT song_id, title, artist, original_key, bpm FROM songs WHERE is_active = true LIMIT {limit}")
+                query += " LIMIT :limit"
+                params['limit'] = limit
             
-            songs = db_session.execute(query).fetchall()
+            songs = [SongRow(*row) for row in db_session.execute(text(query), params)]
             
         print(f"Found {len(songs)} songs to verify")
         
-        for i, song in enumerate(songs, 1):
+        # Search several songs at once so cache hits and parsing overlap network waits;
+        # fetch_page still spaces actual requests to about one per second overall
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def search_one(song):
+            async with semaphore:
+                return await self.search_song_data(song.title, song.artist)
+        
+        results = await asyncio.gather(*(search_one(song) for song in songs))
+        
+        for i, (song, web_data) in enumerate(zip(songs, results), 1):
             print(f"\n📋 {i}/{len(songs)}: {song.title}")
             
-            web_data = await self.search_song_data(song.title, song.artist)
-            
             if web_data:
                 # Compare data
                 bpm_mismatch = web_data['bpm'] and song.bpm != web_data['bpm']
@@ -169,9 +261,6 @@ class MusicalDataVerifier:
                         print(f"      BPM: DB={song.bpm} → Web={web_data['bpm']}")
                 else:
                     print(f"   ✅ Data matches: Key={song.original_key}, BPM={song.bpm}")
-            
-            # Rate limiting
-            await asyncio.sleep(1)
     
     def generate_report(self):
         """Generate a report of all corrections needed."""
@@ -203,26 +292,31 @@ class MusicalDataVerifier:
         
         print(f"\n💾 Applying {len(self.corrections)} corrections...")
         
+        # One statement shape for every correction: COALESCE keeps the stored value
+        # when MultiTracks had no key or BPM, so the batch runs as a single executemany
+        updates = [
+            {
+                'song_id': c['song_id'],
+                'new_key': c['web_key'] or None,
+                'new_bpm': c['web_bpm'] or None,
+            }
+            for c in self.corrections
+            if c['web_key'] or c['web_bpm']
+        ]
+        
         with get_db_session() as db_session:
-            for correction in self.corrections:
-                updates = []
-                params = {'song_id': correction['song_id']}
-                
-                if correction['web_key']:
-                    updates.append("original_key = :new_key")
-                    params['new_key'] = correction['web_key']
-                
-                if correction['web_bpm']:
-                    updates.append("bpm = :new_bpm")
-                    params['new_bpm'] = correction['web_bpm']
-                
-                if updates:
-                    update_sql = f"UPDATE songs SET {', '.join(updates)} WHERE song_id = :song_id"
-                    db_session.execute(text(update_sql), params)
-                    print(f"   ✅ Updated: {correction['title']}")
-            
+            if updates:
+                db_session.execute(
+                    text("UPDATE songs SET original_key = COALESCE(:new_key, original_key), "
+                         "bpm = COALESCE(:new_bpm, bpm) WHERE song_id = :song_id"),
+                    updates
+                )
             db_session.commit()
         
+        for correction in self.corrections:
+            if correction['web_key'] or correction['web_bpm']:
+                print(f"   ✅ Updated: {correction['title']}")
+        
         print("✅ All corrections applied!")
 
 async def main():
@@ -231,9 +325,12 @@ async def main():
     parser = argparse.ArgumentParser(description='Verify musical data against MultiTracks')
     parser.add_argument('--limit', type=int, help='Limit number of songs to verify')
     parser.add_argument('--apply', action='store_true', help='Apply corrections to database')
+    parser.add_argument('--concurrency', type=int, default=4, help='Songs searched in parallel (default: 4)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore the local MultiTracks page cache')
     args = parser.parse_args()
     
-    async with MusicalDataVerifier() as verifier:
+    cache_path = None if args.no_cache else DEFAULT_CACHE_PATH
+    async with MusicalDataVerifier(concurrency=args.concurrency, cache_path=cache_path) as verifier:
         await verifier.verify_all_songs(limit=args.limit)
         verifier.generate_report()
         
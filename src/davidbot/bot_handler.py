@@ -5,23 +5,41 @@ import logging
 import asyncio
 import ssl
 from datetime import datetime
-from typing import Optional, List, Union
+from typing import Any, Dict, List, Union
 import aiohttp
 
 from .models import FeedbackEvent
 from .database_recommendation_engine import create_recommendation_engine
 from .response_formatter import ResponseFormatter
 from .session_manager import SessionManager
-from .database import get_db_session, MessageLogRepository, FeedbackRepository, SongRepository, Song
+from .database import get_db_session, MessageLogRepository, FeedbackRepository, Song
 
 
 logger = logging.getLogger(__name__)
 
+# Phrases that mark a message as a song search
+SEARCH_PATTERNS = (
+    "find songs",
+    "search for songs",
+    "songs on",
+    "songs about",
+    "songs with",
+    "songs in",
+    "key of",
+    "in the key",
+    "show me songs",
+    "i need songs",
+    "worship songs",
+)
+
+# Numbered thumbs-up feedback, e.g. "👍 2"
+FEEDBACK_POSITION_PATTERN = re.compile(r'👍\s*(\d+)')
+
 
 class BotHandler:
     """Main bot handler class that integrates all components."""
     
-    def __init__(self):
+    def __init__(self) -> None:
         """Initialize bot handler with dependencies."""
         self.recommendation_engine = create_recommendation_engine()
         self.response_formatter = ResponseFormatter()
@@ -36,29 +54,28 @@ class BotHandler:
     async def handle_message(self, user_id: str, message: str) -> Union[str, List[str]]:
         """Handle incoming messages from users."""
         try:
-            # Determine message type and route to appropriate handler
-            message_lower = message.lower().strip()
+            # Normalise once and hand the stripped/lowercased forms to the checks below
+            message_stripped = message.strip()
+            message_lower = message_stripped.lower()
             
-            if self._is_search_query(message_lower):
-                response = await self._handle_search(user_id, message)
-                message_type = "search"
-            elif message_lower == "more":
+            # Determine message type and route to appropriate handler. "more" is an exact match
+            # and can't contain a search phrase, so it is checked first without scanning.
+            if message_lower == "more":
                 response = await self._handle_more_request(user_id, message)
                 message_type = "more"
-            elif self._is_feedback(message):
-                response = await self._handle_feedback(user_id, message)
+            elif any(pattern in message_lower for pattern in SEARCH_PATTERNS):
+                response = await self._handle_search(user_id, message)
+                message_type = "search"
+            elif message_stripped.startswith('👍') or 'thumbs up' in message_lower:
+                # Feedback: 👍 emoji reaction or text
+                response = await self._handle_feedback(user_id, message_stripped)
                 message_type = "feedback"
             else:
                 response = "I can help you find songs. Try: 'find songs on surrender' or say 'more' for additional songs."
                 message_type = "unknown"
             
             # Log the interaction (graceful failure)
-            if isinstance(response, list):
-                # For multiple messages, log as combined for now
-                combined_response = "\n---\n".join(response)
-                await self._log_message(user_id, message_type, message, combined_response)
-            else:
-                await self._log_message(user_id, message_type, message, response)
+            await self._log_message(user_id, message_type, message, response)
             
             return response
             
@@ -66,30 +83,6 @@ class BotHandler:
             logger.error(f"Error handling message from {user_id}: {e}")
             return "Sorry, I encountered an error. Please try again."
     
-    def _is_search_query(self, message: str) -> bool:
-        """Check if message is a song search query."""
-        search_patterns = [
-            "find songs",
-            "search for songs", 
-            "songs on",
-            "songs about",
-            "songs with",
-            "songs in",
-            "key of",
-            "in the key",
-            "show me songs",
-            "i need songs",
-            "worship songs"
-        ]
-        return any(pattern in message.lower() for pattern in search_patterns)
-    
-    def _is_feedback(self, message: str) -> bool:
-        """Check if message is feedback (👍 emoji reaction or text)."""
-        message_cleaned = message.strip()
-        return (message_cleaned.startswith('👍') or 
-                message_cleaned == '👍' or
-                'thumbs up' in message_cleaned.lower())
-    
     async def _handle_search(self, user_id: str, message: str) -> List[str]:
         """Handle song search requests.""" 
         # Search for songs
@@ -139,28 +132,27 @@ class BotHandler:
     async def _handle_feedback(self, user_id: str, message: str) -> str:
         """Handle user feedback on songs."""
         # Parse feedback message to extract song position
-        import re
-        
         # Check if user has active session with songs
         session = self.session_manager.get_session(user_id)
         if not session or not session.last_search:
             return self.response_formatter.format_no_feedback_context_message()
         
-        # Extract song position from message like "👍 1", "👍 2", etc.
-        message_clean = message.strip()
-        position_match = re.search(r'👍\s*(\d+)', message_clean)
+        # Extract song position from message like "👍 1", "👍 2", etc. (already stripped by handle_message)
+        position_match = FEEDBACK_POSITION_PATTERN.search(message)
         
         if position_match:
             # Specific song feedback
             song_position = int(position_match.group(1))
             
-            # Validate position (1-based, should be within number of returned songs)
-            num_songs = len(session.last_search.songs) if session.last_search else 0
-            if song_position < 1 or song_position > num_songs:
+            # Validate position (1-based, should be within number of returned songs);
+            # last_search is known to be set by the session check above
+            songs = session.last_search.songs
+            if song_position < 1 or song_position > len(songs):
                 return self.response_formatter.format_invalid_feedback_message()
             
-            # Get song title for the specified position (convert to 0-based index)
-            song_title = session.last_search.songs[song_position - 1].title
+            # Get the song for the specified position (convert to 0-based index)
+            song = songs[song_position - 1]
+            song_title = song.title
         else:
             # No position specified - this should be invalid per test requirements
             # Only numbered feedback (👍 1, 👍 2, 👍 3) should be valid
@@ -172,7 +164,8 @@ class BotHandler:
             song_position=song_position,
             feedback_type="thumbs_up", 
             timestamp=datetime.now(),
-            song_title=song_title
+            song_title=song_title,
+            song_id=song.song_id
         )
         
         # Log feedback (graceful failure)
@@ -184,50 +177,61 @@ class BotHandler:
         # Return confirmation (song_position is guaranteed to be > 0 at this point)
         return self.response_formatter.format_feedback_confirmation(song_position, "thumbs_up", song_title)
     
-    async def _log_message(self, user_id: str, message_type: str, message_content: str, response_content: str) -> None:
+    async def _log_message(self, user_id: str, message_type: str, message_content: str,
+                           response_content: Union[str, List[str]]) -> None:
         """Log message interaction to database."""
+        log_data = {
+            'user_id': user_id,
+            'message_type': message_type,
+            'message_content': message_content,
+            'response_content': response_content,
+            'timestamp': datetime.now()
+        }
         try:
-            with get_db_session() as session:
-                message_repo = MessageLogRepository(session)
-                log_data = {
-                    'user_id': user_id,
-                    'message_type': message_type,
-                    'message_content': message_content,
-                    'response_content': response_content,
-                    'timestamp': datetime.now()
-                }
-                message_repo.create(log_data)
+            # Database calls block, so run them in a worker thread to keep the event loop free
+            await asyncio.to_thread(self._write_message_log, log_data)
         except Exception as e:
             logger.error(f"Failed to log message: {e}")
             # Graceful degradation - don't let logging failures affect user experience
     
+    def _write_message_log(self, log_data: Dict[str, Any]) -> None:
+        """Insert a message log row."""
+        if isinstance(log_data['response_content'], list):
+            # For multiple messages, log as combined for now
+            log_data['response_content'] = "\n---\n".join(log_data['response_content'])
+        with get_db_session() as session:
+            MessageLogRepository(session).create(log_data)
+    
     async def _log_feedback(self, feedback_event: FeedbackEvent) -> None:
         """Log feedback event to database."""
         try:
-            with get_db_session() as session:
-                feedback_repo = FeedbackRepository(session)
-                song_repo = SongRepository(session)
-                
-                # Find the song by title to get song_id
-                # feedback_event.song_title contains just the title from session
-                song_title = feedback_event.song_title
-                song = session.query(Song).filter(Song.title == song_title).first()
-                
-                if song:
-                    feedback_data = {
-                        'timestamp': feedback_event.timestamp,
-                        'user_id': feedback_event.user_id,
-                        'song_id': song.song_id,
-                        'action': feedback_event.feedback_type,
-                        'context_keywords': '[]',  # Empty for now, could be enhanced later
-                        'search_params': '{}'  # Empty for now, could be enhanced later
-                    }
-                    feedback_repo.create(feedback_data)
-                else:
-                    logger.warning(f"Could not find song for feedback: {feedback_event.song_title}")
+            await asyncio.to_thread(self._write_feedback, feedback_event)
         except Exception as e:
             logger.error(f"Failed to log feedback: {e}")
             # Graceful degradation - don't let logging failures affect user experience
+    
+    def _write_feedback(self, feedback_event: FeedbackEvent) -> None:
+        """Insert a feedback row for the event's song."""
+        with get_db_session() as session:
+            feedback_repo = FeedbackRepository(session)
+            
+            # Database-backed searches carry the song_id; otherwise find the song by title
+            song_id = feedback_event.song_id
+            if song_id is None:
+                song_id = session.query(Song.song_id).filter(Song.title == feedback_event.song_title).limit(1).scalar()
+            
+            if song_id is not None:
+                feedback_data = {
+                    'timestamp': feedback_event.timestamp,
+                    'user_id': feedback_event.user_id,
+                    'song_id': song_id,
+                    'action': feedback_event.feedback_type,
+                    'context_keywords': '[]',  # Empty for now, could be enhanced later
+                    'search_params': '{}'  # Empty for now, could be enhanced later
+                }
+                feedback_repo.create(feedback_data)
+            else:
+                logger.warning(f"Could not find song for feedback: {feedback_event.song_title}")
 
     async def start_polling(self, telegram_token: str) -> None:
         """Start Telegram long polling to receive and handle messages."""
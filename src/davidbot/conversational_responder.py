@@ -1,83 +1,249 @@
 """Conversational response generator that gives DavidBot natural personality."""
 
-import json
+import copy
+import itertools
+import os
 import logging
 import asyncio
 import aiohttp
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import AsyncIterator, List, Dict, Any, Optional, Sequence
 from datetime import datetime
 
 from .models import SearchResult, Song as BotSong
-from .llm_query_parser import ParsedQuery
+from .llm_query_parser import ParsedQuery, extract_json_object
 from .response_formatter import ResponseFormatter
+from .jsonutil import json_loads, json_dumps
 
 logger = logging.getLogger(__name__)
 
+# Most recent LLM search responses kept in memory, keyed by the parsed request and song list
+RESPONSE_CACHE_SIZE = 512
+
+# How long Ollama keeps the model (and its cached prompt prefix) loaded between requests
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Search payloads are pre-encoded, so they are posted as data with an explicit content type
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Fixed delimiter between the static system prompt and per-request content
+PROMPT_DELIMITER = "\n\n=== REQUEST ===\n"
+SIMPLE_PROMPT_PREFIX = "You are David, a warm worship leader's assistant. "
+
+# Mock search replies, chosen by the first matching request constraint
+MOCK_SLOW_BPM_MAX = 85
+MOCK_UPBEAT_BPM_MIN = 120
+MOCK_SLOW_INTRO = "Slower songs for ministry:"
+MOCK_UPBEAT_INTRO = "Upbeat songs:"
+MOCK_DEFAULT_INTRO = "Song options:"
+MOCK_CLOSING_MESSAGE = "Let me know if you need more options."
+
+# Mock feedback replies, rotated in order; {t} is the song title
+THUMBS_UP_TEMPLATES = (
+    "Good to know '{t}' worked well.",
+    "Thanks, '{t}' is a solid choice.",
+    "Glad '{t}' fits your needs.",
+    "'{t}' noted as a good match."
+)
+THUMBS_DOWN_TEMPLATES = (
+    "Thanks for the feedback on '{t}'.",
+    "Noted about '{t}', thanks.",
+    "Got it, '{t}' wasn't the right fit.",
+    "Thanks, I'll remember that about '{t}'."
+)
+
+# Installed models to use, fastest first; feedback acknowledgements are one line so try the smallest
+SEARCH_MODEL_PREFERENCES = (
+    "qwen2.5:1.5b-instruct",
+    "qwen2.5:3b-instruct",
+    "mistral-small3.1:latest",
+    "llama3.2:3b",
+    "gpt-oss:latest"
+)
+FEEDBACK_MODEL_PREFERENCES = ("llama3.2:1b",) + SEARCH_MODEL_PREFERENCES
+DEFAULT_MODEL = "gpt-oss:latest"
+
+# Pin the models to skip the /api/tags probe on startup
+OLLAMA_SEARCH_MODEL = os.getenv("OLLAMA_SEARCH_MODEL")
+OLLAMA_FEEDBACK_MODEL = os.getenv("OLLAMA_FEEDBACK_MODEL", OLLAMA_SEARCH_MODEL)
+
+# Generations in flight at once; match the server's OLLAMA_NUM_PARALLEL
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+
+
+class IntroMessageScanner:
+    """Finds the top-level "intro_message" value in JSON text that arrives in pieces.
+    
+    Text is appended to a running buffer and only the new part is scanned, tracking brace
+    depth and string state, so the intro is available as soon as its closing quote arrives.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._value_key: Optional[str] = None
+        self.intro: Optional[str] = None
+    
+    def feed(self, text: str) -> Optional[str]:
+        """Add streamed text; returns the intro message the first time it is complete."""
+        self.buffer += text
+        if self.intro is not None:
+            return None
+        
+        buffer = self.buffer
+        for i in range(self._scanned, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        literal = buffer[self._string_start:i + 1]
+                        if self._value_key == "intro_message":
+                            self._scanned = len(buffer)
+                            self.intro = json_loads(literal)
+                            return self.intro
+                        self._last_string = literal
+            elif char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+            elif self._depth == 1 and char == ":":
+                # The string just closed was a key; remember it until its value is read
+                self._value_key = json_loads(self._last_string) if self._last_string else None
+            elif self._depth == 1 and char == ",":
+                self._value_key = None
+                self._last_string = None
+        self._scanned = len(buffer)
+        return None
+
 
 class ConversationalResponder:
     """Generates natural, personality-driven responses using LLM."""
     
-    def __init__(self, ollama_url: str = "http://localhost:11434", use_mock: bool = False):
+    def __init__(self, ollama_url: str = "http://localhost:11434", use_mock: bool = False,
+                 max_concurrency: int = OLLAMA_MAX_CONCURRENCY):
         """Initialize conversational responder."""
         self.ollama_url = ollama_url
         self.use_mock = use_mock
-        self.model_name = None
+        self.max_concurrency = max_concurrency
+        self._ollama_semaphore = asyncio.Semaphore(max_concurrency)
+        self.model_name = OLLAMA_SEARCH_MODEL
+        self.feedback_model_name = OLLAMA_FEEDBACK_MODEL
+        self._available_models: Optional[List[str]] = None
+        # Concurrent first requests share one /api/tags probe
+        self._models_lock = asyncio.Lock()
+        self._payload_prefixes: Dict[tuple, bytes] = {}
         self.system_prompt = self._create_system_prompt()
+        # Built once so every request starts with byte-identical text and Ollama can reuse the prefix KV cache
+        self._prompt_prefix = self.system_prompt + PROMPT_DELIMITER
         self.response_formatter = ResponseFormatter()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._response_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._thumbs_up_cycle = itertools.cycle(THUMBS_UP_TEMPLATES)
+        self._thumbs_down_cycle = itertools.cycle(THUMBS_DOWN_TEMPLATES)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared Ollama HTTP session, creating it on first use so connections are kept alive."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self._session
+    
+    async def aclose(self) -> None:
+        """Close the shared Ollama HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
         
     def _create_system_prompt(self) -> str:
         """Create system prompt for natural conversation generation."""
-        return """You are David, a warm and experienced worship leader's assistant with deep ministry heart. Your role is to help worship leaders find the perfect songs for their services with genuine care and spiritual sensitivity.
-
-PERSONALITY TRAITS:
-- Kind, helpful, and professional
-- Understands worship context without being overly spiritual
-- Speaks clearly and directly
-- Focuses on practical song recommendations
-- Acknowledges requests without excessive enthusiasm
-
-RESPONSE STYLE:
-- Concise and to the point
-- Friendly but not overly familiar
-- Acknowledge what they asked for simply
-- Avoid repetitive phrases or excessive adjectives
-- Keep responses brief and actionable
+        return """You are David, a worship leader's assistant who helps pick songs for services.
+Be kind, practical and brief. No excessive enthusiasm, adjectives or spiritual language.
+Acknowledge the request simply, present songs exactly as given, and invite feedback in a sentence.
+Reply with JSON only: {"intro_message": "...", "formatted_songs": [...], "closing_message": "..."}"""
 
-SONG PRESENTATION:
-- Present songs clearly and practically
-- Include relevant musical details
-- Minimal commentary unless specifically helpful
-- Focus on facts rather than emotional language
-
-FEEDBACK HANDLING:
-- Simple acknowledgment of their preference
-- Reference song names when appropriate
-- Keep responses brief and professional
-- Thank them for the feedback without overdoing it
-
-RESPONSE FORMAT:
-Always respond with a JSON object containing:
-{
-    "intro_message": "Natural conversational introduction to the song list",
-    "song_presentations": [
-        {
-            "song_title": "Song Title", 
-            "artist": "Artist Name",
-            "ministry_note": "Brief natural comment about why this song fits their request"
+    @staticmethod
+    def _search_cache_key(search_result: SearchResult, parsed_query: ParsedQuery) -> tuple:
+        """Cache key for a search response; constraints are part of it so "songs in G" never matches "songs in A"."""
+        return (
+            tuple(sorted(parsed_query.themes)),
+            parsed_query.key_preference,
+            parsed_query.bpm_min,
+            parsed_query.bpm_max,
+            parsed_query.mood,
+            tuple(song.song_id if song.song_id is not None else (song.title, song.artist)
+                  for song in search_result.songs)
+        )
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counts for the search response cache."""
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            'hits': self._cache_hits,
+            'misses': self._cache_misses,
+            'size': len(self._response_cache),
+            'hit_rate': self._cache_hits / lookups if lookups else 0.0
         }
-    ],
-    "closing_message": "Natural wrap-up that invites feedback or offers more help"
-}
-
-EXAMPLES OF APPROPRIATE LANGUAGE:
-- "Here are songs in G for you"
-- "These should work for celebration"
-- "Good for altar calls"
-- "Key of G will work well"
-- Brief, practical observations
-
-Remember: Be helpful and concise. Focus on practical song recommendations without excessive personality."""
-
+    
+    def _get_cached_response(self, cache_key: tuple) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached search response, counting the hit or miss."""
+        cached = self._response_cache.get(cache_key)
+        if cached is None:
+            self._cache_misses += 1
+            return None
+        self._cache_hits += 1
+        self._response_cache.move_to_end(cache_key)
+        return copy.deepcopy(cached)
+    
+    def _cache_response(self, cache_key: tuple, response_data: Dict[str, Any]) -> None:
+        """Store a search response, evicting the least recently used one past the cap."""
+        self._response_cache[cache_key] = copy.deepcopy(response_data)
+        if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def _build_search_prompt(self, search_result: SearchResult, parsed_query: ParsedQuery) -> str:
+        """Build the per-request part of the search prompt."""
+        # Use ResponseFormatter to get properly formatted songs
+        formatted_songs = self.response_formatter.format_individual_songs(search_result)
+        
+        # Request details for the LLM; the songs appear once, in the reply template
+        context = {
+            "themes": parsed_query.themes,
+            "key_preference": parsed_query.key_preference,
+            "bpm_range": f"{parsed_query.bpm_min or 'any'}-{parsed_query.bpm_max or 'any'}",
+            "mood": parsed_query.mood,
+            "song_count": len(search_result.songs)
+        }
+        template = {
+            "intro_message": "...",
+            "formatted_songs": formatted_songs,
+            "closing_message": "..."
+        }
+        
+        prompt = (
+            f'User asked: "{parsed_query.raw_query}"\n'
+            f"Context: {json_dumps(context)}\n"
+            "Fill in intro_message and closing_message; copy formatted_songs unchanged:\n"
+            f"{json_dumps(template)}"
+        )
+        return prompt
+    
     async def generate_search_response(self, search_result: SearchResult, parsed_query: ParsedQuery, user_context: Optional[Dict] = None) -> Dict[str, Any]:
         """Generate natural conversational response for search results."""
         
@@ -85,48 +251,19 @@ Remember: Be helpful and concise. Focus on practical song recommendations withou
             return self._mock_search_response(search_result, parsed_query)
             
         try:
-            # Use ResponseFormatter to get properly formatted songs
-            formatted_songs = self.response_formatter.format_individual_songs(search_result)
+            # Identical requests for the same songs reuse the earlier LLM response
+            cache_key = self._search_cache_key(search_result, parsed_query)
+            cached = self._get_cached_response(cache_key)
+            if cached is not None:
+                return cached
             
-            # Prepare context for the LLM - now with formatted song data
-            context = {
-                "user_request": parsed_query.raw_query,
-                "themes": parsed_query.themes,
-                "key_preference": parsed_query.key_preference,
-                "bpm_range": f"{parsed_query.bpm_min or 'any'}-{parsed_query.bpm_max or 'any'}",
-                "mood": parsed_query.mood,
-                "song_count": len(search_result.songs),
-                "formatted_songs": formatted_songs  # Use formatted songs instead of raw data
-            }
+            prompt = self._build_search_prompt(search_result, parsed_query)
             
-            prompt = f"""
-User asked: "{parsed_query.raw_query}"
-
-Here are the formatted songs to present:
-{chr(10).join(formatted_songs)}
-
-Context: {json.dumps(context, indent=2)}
-
-Generate a natural, warm response that:
-1. Acknowledges their specific request naturally
-2. Presents each song exactly as provided in the formatted_songs (don't reformat them)
-3. Adds ministry context and personal touches around the formatted song data
-4. Shows understanding of worship leading needs
-5. Invites natural feedback
-
-Response must be valid JSON only - no additional text.
-Use this format:
-{{
-    "intro_message": "Natural conversational introduction to the song list",
-    "formatted_songs": {formatted_songs},
-    "closing_message": "Natural wrap-up that invites feedback or offers more help"
-}}
-"""
-
             # Get response from LLM
             response_data = await self._call_ollama(prompt)
             
             if response_data:
+                self._cache_response(cache_key, response_data)
                 return response_data
             else:
                 # Fallback to mock response
@@ -137,6 +274,71 @@ Use this format:
             logger.error(f"Error generating conversational response: {e}")
             return self._mock_search_response(search_result, parsed_query)
     
+    async def stream_search_response(self, search_result: SearchResult, parsed_query: ParsedQuery,
+                                     user_context: Optional[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a search response: yields {"intro_message": ..., "partial": True} as soon as the LLM
+        has written the intro, then the complete response. Cached, mock and fallback responses are yielded once, complete.
+        
+        The Ollama slot is released while the caller handles each yielded item.
+        """
+        if self.use_mock:
+            yield self._mock_search_response(search_result, parsed_query)
+            return
+        
+        cache_key = self._search_cache_key(search_result, parsed_query)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        scanner = IntroMessageScanner()
+        response_data = None
+        try:
+            model = await self._get_best_model()
+            payload = self._search_payload(model, self._build_search_prompt(search_result, parsed_query), stream=True)
+            session = await self._get_session()
+            
+            await self._ollama_semaphore.acquire()
+            holding = True
+            try:
+                async with session.post(
+                    f"{self.ollama_url}/api/generate",
+                    data=payload,
+                    headers=JSON_HEADERS,
+                    timeout=aiohttp.ClientTimeout(total=15)
+                ) as response:
+                    if response.status == 200:
+                        # Newline-delimited JSON chunks, each carrying the next piece of the reply
+                        async for line in response.content:
+                            if not line.strip():
+                                continue
+                            chunk = json_loads(line)
+                            intro = scanner.feed(chunk.get("response", ""))
+                            if intro is not None:
+                                self._ollama_semaphore.release()
+                                holding = False
+                                yield {"intro_message": intro, "partial": True}
+                                await self._ollama_semaphore.acquire()
+                                holding = True
+                            if chunk.get("done"):
+                                break
+                        response_data = json_loads(extract_json_object(scanner.buffer.strip()))
+            finally:
+                if holding:
+                    self._ollama_semaphore.release()
+        except Exception as e:
+            logger.error(f"Streaming Ollama call failed: {e}")
+        
+        if response_data:
+            self._cache_response(cache_key, response_data)
+        else:
+            logger.warning("LLM response failed, using mock response")
+            response_data = self._mock_search_response(search_result, parsed_query)
+            if scanner.intro is not None:
+                # The streamed intro has already been shown, so keep it
+                response_data["intro_message"] = scanner.intro
+        yield response_data
+    
     async def generate_feedback_response(self, song_title: str, feedback_type: str, position: int) -> str:
         """Generate natural response to user feedback."""
         
@@ -163,40 +365,55 @@ Respond with just the message text (no JSON, no quotes).
             logger.error(f"Error generating feedback response: {e}")
             return self._mock_feedback_response(song_title, feedback_type)
     
-    async def _call_ollama(self, prompt: str) -> Optional[Dict[str, Any]]:
-        """Call Ollama API for structured JSON response."""
-        try:
-            model = await self._get_best_model()
-            
-            payload = {
+    def _search_payload(self, model: str, prompt: str, stream: bool = False) -> bytes:
+        """Encode the Ollama generate payload for a structured search response.
+        
+        Everything up to and including the system prompt is encoded once per model; each call
+        only encodes the request text and splices it onto the end of the JSON "prompt" string.
+        """
+        prefix = self._payload_prefixes.get((model, stream))
+        if prefix is None:
+            base = json_dumps({
                 "model": model,
-                "prompt": f"{self.system_prompt}\n\n{prompt}",
-                "stream": False,
+                "stream": stream,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
                 "options": {
                     "temperature": 0.7,  # More creative for personality
                     "num_predict": 500,
                     "top_k": 40,
                     "top_p": 0.9
-                }
-            }
+                },
+                "prompt": self._prompt_prefix
+            })
+            # Drop the closing quote and brace so the request text continues the prompt string
+            prefix = self._payload_prefixes[(model, stream)] = base[:-2].encode()
+        # Drop the opening quote of the encoded request text; its closing quote ends the prompt
+        return prefix + json_dumps(prompt.strip())[1:].encode() + b"}"
+    
+    async def _call_ollama(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Call Ollama API for structured JSON response."""
+        try:
+            model = await self._get_best_model()
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.ollama_url}/api/generate",
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=15)
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    response_data = await response.json()
-                    response_text = response_data.get("response", "").strip()
-                    
-                    # Clean potential markdown formatting
-                    if response_text.startswith("```json"):
-                        response_text = response_text.replace("```json", "").replace("```", "").strip()
-                    
-                    return json.loads(response_text)
+            payload = self._search_payload(model, prompt)
+            
+            session = await self._get_session()
+            # Bounded so concurrent users don't oversubscribe the server
+            async with self._ollama_semaphore, session.post(
+                f"{self.ollama_url}/api/generate",
+                data=payload,
+                headers=JSON_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
+                if response.status != 200:
+                    return None
+                
+                response_data = await response.json(loads=json_loads)
+                logger.debug(f"Ollama prompt_eval_count={response_data.get('prompt_eval_count')}")
+                response_text = response_data.get("response", "").strip()
+                
+                # Skip markdown fences and any commentary around the JSON
+                return json_loads(extract_json_object(response_text))
                     
         except Exception as e:
             logger.error(f"Ollama API call failed: {e}")
@@ -205,67 +422,112 @@ Respond with just the message text (no JSON, no quotes).
     async def _call_ollama_simple(self, prompt: str) -> Optional[str]:
         """Call Ollama API for simple text response."""
         try:
-            model = await self._get_best_model()
+            model = await self._get_feedback_model()
             
             payload = {
                 "model": model,
-                "prompt": f"You are David, a warm worship leader's assistant. {prompt}",
+                "prompt": SIMPLE_PROMPT_PREFIX + prompt.strip(),
                 "stream": False,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
                 "options": {
                     "temperature": 0.6,
                     "num_predict": 100
                 }
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.ollama_url}/api/generate",
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    response_data = await response.json()
-                    return response_data.get("response", "").strip()
+            session = await self._get_session()
+            async with self._ollama_semaphore, session.post(
+                f"{self.ollama_url}/api/generate",
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status != 200:
+                    return None
+                
+                response_data = await response.json(loads=json_loads)
+                return response_data.get("response", "").strip()
                     
         except Exception as e:
             logger.error(f"Simple Ollama call failed: {e}")
             return None
     
+    async def _list_models(self) -> List[str]:
+        """Get the names of the models installed in Ollama, fetched once."""
+        if self._available_models is not None:
+            return self._available_models
+        
+        async with self._models_lock:
+            if self._available_models is not None:
+                return self._available_models
+            
+            try:
+                session = await self._get_session()
+                async with session.get(f"{self.ollama_url}/api/tags", timeout=aiohttp.ClientTimeout(total=3)) as response:
+                    if response.status == 200:
+                        data = await response.json(loads=json_loads)
+                        self._available_models = [model['name'] for model in data.get('models', [])]
+                        return self._available_models
+            except Exception:
+                pass
+        
+        return []
+    
+    @staticmethod
+    def _pick_model(models: List[str], preferred: Sequence[str]) -> str:
+        """Pick the first preferred model that is installed."""
+        for model in preferred:
+            if model in models:
+                return model
+        return models[0] if models else DEFAULT_MODEL
+    
     async def _get_best_model(self) -> str:
         """Get the best available model for conversation."""
         if self.model_name:
             return self.model_name
-            
+        model = self._pick_model(await self._list_models(), SEARCH_MODEL_PREFERENCES)
+        # Keep the fallback only for this call if Ollama couldn't be asked, so the next call probes again
+        if self._available_models is not None:
+            self.model_name = model
+        return model
+    
+    async def _get_feedback_model(self) -> str:
+        """Get the model for short feedback acknowledgements, preferring the smallest installed."""
+        if self.feedback_model_name:
+            return self.feedback_model_name
+        model = self._pick_model(await self._list_models(), FEEDBACK_MODEL_PREFERENCES)
+        if self._available_models is not None:
+            self.feedback_model_name = model
+        return model
+    
+    async def warmup(self) -> None:
+        """Load the search and feedback models and prime the system prompt's KV cache before the first user."""
+        if self.use_mock:
+            return
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.ollama_url}/api/tags", timeout=aiohttp.ClientTimeout(total=3)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        models = [model['name'] for model in data.get('models', [])]
-                        
-                        # Prefer models good at conversation (fastest first)
-                        preferred = [
-                            "qwen2.5:3b-instruct",
-                            "mistral-small3.1:latest", 
-                            "llama3.2:3b",
-                            "gpt-oss:latest"
-                        ]
-                        
-                        for model in preferred:
-                            if model in models:
-                                self.model_name = model
-                                return model
-                        
-                        if models:
-                            self.model_name = models[0]
-                            return models[0]
-        except Exception:
-            pass
-            
-        self.model_name = "gpt-oss:latest"
-        return self.model_name
+            session = await self._get_session()
+            # The search prefix wins if both roles resolve to the same model
+            warmups = {
+                await self._get_feedback_model(): SIMPLE_PROMPT_PREFIX,
+                await self._get_best_model(): self._prompt_prefix
+            }
+            for model, prompt in warmups.items():
+                payload = {
+                    "model": model,
+                    "prompt": prompt,
+                    "stream": False,
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
+                    "options": {"num_predict": 1}
+                }
+                async with self._ollama_semaphore, session.post(
+                    f"{self.ollama_url}/api/generate",
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(total=60)
+                ) as response:
+                    await response.read()
+            logger.info(f"Warmed up Ollama models: {', '.join(warmups)}")
+        except Exception as e:
+            logger.debug(f"Conversational model warm-up failed (non-critical): {e}")
     
     def _mock_search_response(self, search_result: SearchResult, parsed_query: ParsedQuery) -> Dict[str, Any]:
         """Generate mock conversational response when LLM unavailable."""
@@ -273,47 +535,28 @@ Respond with just the message text (no JSON, no quotes).
         # Use ResponseFormatter to get properly formatted songs
         formatted_songs = self.response_formatter.format_individual_songs(search_result)
         
-        # Brief intro based on request
+        # Brief intro based on request; the first matching constraint wins
         if parsed_query.key_preference:
             intro = f"Songs in {parsed_query.key_preference}:"
-        elif parsed_query.bpm_max and parsed_query.bpm_max <= 85:
-            intro = "Slower songs for ministry:"
-        elif parsed_query.bpm_min and parsed_query.bpm_min >= 120:
-            intro = "Upbeat songs:"
+        elif parsed_query.bpm_max and parsed_query.bpm_max <= MOCK_SLOW_BPM_MAX:
+            intro = MOCK_SLOW_INTRO
+        elif parsed_query.bpm_min and parsed_query.bpm_min >= MOCK_UPBEAT_BPM_MIN:
+            intro = MOCK_UPBEAT_INTRO
         elif parsed_query.themes:
-            theme_str = ', '.join(parsed_query.themes[:2])
-            intro = f"Songs about {theme_str}:"
+            intro = f"Songs about {', '.join(parsed_query.themes[:2])}:"
         else:
-            intro = "Song options:"
-        
-        # Brief closing
-        closing = "Let me know if you need more options."
+            intro = MOCK_DEFAULT_INTRO
         
         return {
             "intro_message": intro,
             "formatted_songs": formatted_songs,
-            "closing_message": closing
+            "closing_message": MOCK_CLOSING_MESSAGE
         }
     
     def _mock_feedback_response(self, song_title: str, feedback_type: str) -> str:
         """Generate mock feedback response."""
-        if feedback_type == "thumbs_up":
-            responses = [
-                f"Good to know '{song_title}' worked well.",
-                f"Thanks, '{song_title}' is a solid choice.",
-                f"Glad '{song_title}' fits your needs.",
-                f"'{song_title}' noted as a good match."
-            ]
-        else:
-            responses = [
-                f"Thanks for the feedback on '{song_title}'.",
-                f"Noted about '{song_title}', thanks.",
-                f"Got it, '{song_title}' wasn't the right fit.",
-                f"Thanks, I'll remember that about '{song_title}'."
-            ]
-        
-        import random
-        return random.choice(responses)
+        cycle = self._thumbs_up_cycle if feedback_type == "thumbs_up" else self._thumbs_down_cycle
+        return next(cycle).format(t=song_title)
 
 
 def create_conversational_responder(ollama_url: str = "http://localhost:11434", use_mock: bool = False) -> ConversationalResponder:
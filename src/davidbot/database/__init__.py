@@ -2,7 +2,8 @@
 
 from .database import (
     get_database_url, get_engine, get_session, get_db_session,
-    init_database, reset_database, backup_database, get_database_info
+    init_database, reset_database, backup_database, get_database_info,
+    backfill_theme_mappings, refresh_lyrics_search
 )
 from .models import Base, Song, Lyrics, UserFeedback, SongUsage, ThemeMapping, MessageLog
 from .repositories import SongRepository, LyricsRepository, FeedbackRepository, SongUsageRepository, ThemeMappingRepository, MessageLogRepository
@@ -16,6 +17,8 @@ __all__ = [
     'reset_database',
     'backup_database',
     'get_database_info',
+    'backfill_theme_mappings',
+    'refresh_lyrics_search',
     'Base',
     'Song',
     'Lyrics',
@@ -1,18 +1,129 @@
 """Database connection and session management."""
 
 import os
+import sys
 from pathlib import Path
-from sqlalchemy import create_engine, event
+import json
+from sqlalchemy import bindparam, create_engine, event, insert, inspect, select, text, update
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
-from typing import Generator
+from typing import Dict, Generator
 import logging
 
-from .models import Base
+from .models import Base, Song, Lyrics, ThemeMapping, lyrics_search_blob
 
 logger = logging.getLogger(__name__)
 
+# Compiled-statement cache entries per engine (SQLAlchemy default is 500)
+QUERY_CACHE_SIZE = 1200
+
+# Pooled connections kept open, so SQLite's per-connection page cache stays warm between requests.
+# Sized for the bot's update workers and log writer plus headroom for worker threads.
+DB_POOL_SIZE = 10
+DB_MAX_OVERFLOW = 20
+
+# Tables reported by get_database_info, counted in a single statement
+INFO_TABLES = ("songs", "lyrics", "user_feedback", "song_usage", "theme_mappings", "message_logs")
+TABLE_COUNTS_SQL = text(
+    "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table})" for table in INFO_TABLES)
+)
+
+# External-content FTS5 index over lyrics.search_blob and the triggers that keep it in sync, by name
+LYRICS_FTS_DDL = {
+    "lyrics_fts": "CREATE VIRTUAL TABLE lyrics_fts USING fts5(search_blob, content='lyrics', content_rowid='lyrics_id')",
+    "lyrics_fts_ai": "CREATE TRIGGER lyrics_fts_ai AFTER INSERT ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts(rowid, search_blob) VALUES (new.lyrics_id, new.search_blob); END",
+    "lyrics_fts_ad": "CREATE TRIGGER lyrics_fts_ad AFTER DELETE ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts(lyrics_fts, rowid, search_blob) VALUES ('delete', old.lyrics_id, old.search_blob); END",
+    "lyrics_fts_au": "CREATE TRIGGER lyrics_fts_au AFTER UPDATE ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts(lyrics_fts, rowid, search_blob) VALUES ('delete', old.lyrics_id, old.search_blob); "
+    "INSERT INTO lyrics_fts(rowid, search_blob) VALUES (new.lyrics_id, new.search_blob); END",
+}
+
+# External-content FTS5 index over song titles and artists, with its sync triggers, by name
+SONGS_FTS_DDL = {
+    "songs_fts": "CREATE VIRTUAL TABLE songs_fts USING fts5(title, artist, content='songs', content_rowid='song_id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "songs_fts_ai": "CREATE TRIGGER songs_fts_ai AFTER INSERT ON songs BEGIN "
+    "INSERT INTO songs_fts(rowid, title, artist) VALUES (new.song_id, new.title, new.artist); END",
+    "songs_fts_ad": "CREATE TRIGGER songs_fts_ad AFTER DELETE ON songs BEGIN "
+    "INSERT INTO songs_fts(songs_fts, rowid, title, artist) VALUES ('delete', old.song_id, old.title, old.artist); END",
+    "songs_fts_au": "CREATE TRIGGER songs_fts_au AFTER UPDATE OF title, artist ON songs BEGIN "
+    "INSERT INTO songs_fts(songs_fts, rowid, title, artist) VALUES ('delete', old.song_id, old.title, old.artist); "
+    "INSERT INTO songs_fts(rowid, title, artist) VALUES (new.song_id, new.title, new.artist); END",
+}
+
+# Trigram FTS5 index over theme names, so substring theme searches use an index, with its sync triggers, by name
+THEMES_FTS_DDL = {
+    "theme_mappings_fts": "CREATE VIRTUAL TABLE theme_mappings_fts USING fts5(theme_name, content='theme_mappings', "
+    "content_rowid='mapping_id', tokenize='trigram')",
+    "theme_mappings_fts_ai": "CREATE TRIGGER theme_mappings_fts_ai AFTER INSERT ON theme_mappings BEGIN "
+    "INSERT INTO theme_mappings_fts(rowid, theme_name) VALUES (new.mapping_id, new.theme_name); END",
+    "theme_mappings_fts_ad": "CREATE TRIGGER theme_mappings_fts_ad AFTER DELETE ON theme_mappings BEGIN "
+    "INSERT INTO theme_mappings_fts(theme_mappings_fts, rowid, theme_name) "
+    "VALUES ('delete', old.mapping_id, old.theme_name); END",
+    "theme_mappings_fts_au": "CREATE TRIGGER theme_mappings_fts_au AFTER UPDATE OF theme_name ON theme_mappings BEGIN "
+    "INSERT INTO theme_mappings_fts(theme_mappings_fts, rowid, theme_name) "
+    "VALUES ('delete', old.mapping_id, old.theme_name); "
+    "INSERT INTO theme_mappings_fts(rowid, theme_name) VALUES (new.mapping_id, new.theme_name); END",
+}
+
+# Rollup tables kept current by triggers on their source tables, by name (table first), each with
+# the statement that fills it from scratch; analytics read these instead of aggregating every row.
+# Updates move a row from its old bucket to its new one, and buckets that reach zero are removed.
+SONG_FEEDBACK_STATS_DDL = {
+    "song_feedback_stats": "CREATE TABLE song_feedback_stats (song_id INTEGER NOT NULL, action TEXT NOT NULL, "
+    "feedback_count INTEGER NOT NULL, PRIMARY KEY (song_id, action))",
+    "song_feedback_stats_ai": "CREATE TRIGGER song_feedback_stats_ai AFTER INSERT ON user_feedback BEGIN "
+    "INSERT INTO song_feedback_stats(song_id, action, feedback_count) VALUES (new.song_id, new.action, 1) "
+    "ON CONFLICT(song_id, action) DO UPDATE SET feedback_count = feedback_count + 1; END",
+    "song_feedback_stats_ad": "CREATE TRIGGER song_feedback_stats_ad AFTER DELETE ON user_feedback BEGIN "
+    "UPDATE song_feedback_stats SET feedback_count = feedback_count - 1 "
+    "WHERE song_id = old.song_id AND action = old.action; "
+    "DELETE FROM song_feedback_stats WHERE song_id = old.song_id AND action = old.action AND feedback_count <= 0; END",
+    "song_feedback_stats_au": "CREATE TRIGGER song_feedback_stats_au AFTER UPDATE OF song_id, action ON user_feedback BEGIN "
+    "UPDATE song_feedback_stats SET feedback_count = feedback_count - 1 "
+    "WHERE song_id = old.song_id AND action = old.action; "
+    "DELETE FROM song_feedback_stats WHERE song_id = old.song_id AND action = old.action AND feedback_count <= 0; "
+    "INSERT INTO song_feedback_stats(song_id, action, feedback_count) VALUES (new.song_id, new.action, 1) "
+    "ON CONFLICT(song_id, action) DO UPDATE SET feedback_count = feedback_count + 1; END",
+}
+SONG_FEEDBACK_STATS_FILL = (
+    "INSERT INTO song_feedback_stats(song_id, action, feedback_count) "
+    "SELECT song_id, action, COUNT(*) FROM user_feedback GROUP BY song_id, action"
+)
+
+MESSAGE_TYPE_DAILY_DDL = {
+    "message_type_daily": "CREATE TABLE message_type_daily (day TEXT NOT NULL, message_type TEXT NOT NULL, "
+    "message_count INTEGER NOT NULL, PRIMARY KEY (day, message_type))",
+    "message_type_daily_ai": "CREATE TRIGGER message_type_daily_ai AFTER INSERT ON message_logs BEGIN "
+    "INSERT INTO message_type_daily(day, message_type, message_count) "
+    "VALUES (date(new.timestamp), new.message_type, 1) "
+    "ON CONFLICT(day, message_type) DO UPDATE SET message_count = message_count + 1; END",
+    "message_type_daily_ad": "CREATE TRIGGER message_type_daily_ad AFTER DELETE ON message_logs BEGIN "
+    "UPDATE message_type_daily SET message_count = message_count - 1 "
+    "WHERE day = date(old.timestamp) AND message_type = old.message_type; "
+    "DELETE FROM message_type_daily "
+    "WHERE day = date(old.timestamp) AND message_type = old.message_type AND message_count <= 0; END",
+    "message_type_daily_au": "CREATE TRIGGER message_type_daily_au "
+    "AFTER UPDATE OF message_type, timestamp ON message_logs BEGIN "
+    "UPDATE message_type_daily SET message_count = message_count - 1 "
+    "WHERE day = date(old.timestamp) AND message_type = old.message_type; "
+    "DELETE FROM message_type_daily "
+    "WHERE day = date(old.timestamp) AND message_type = old.message_type AND message_count <= 0; "
+    "INSERT INTO message_type_daily(day, message_type, message_count) "
+    "VALUES (date(new.timestamp), new.message_type, 1) "
+    "ON CONFLICT(day, message_type) DO UPDATE SET message_count = message_count + 1; END",
+}
+MESSAGE_TYPE_DAILY_FILL = (
+    "INSERT INTO message_type_daily(day, message_type, message_count) "
+    "SELECT date(timestamp), message_type, COUNT(*) FROM message_logs GROUP BY date(timestamp), message_type"
+)
+
+# Lyrics.combined_content computed in SQL, so rows written with raw SQL can be brought up to date
+LYRICS_SEARCH_BLOB = lyrics_search_blob(Lyrics.first_line, Lyrics.chorus, Lyrics.bridge)
+
 # Global engine and session factory
 _engine = None
 _SessionLocal = None
@@ -41,27 +152,42 @@ def get_engine() -> Engine:
         database_url = get_database_url()
         logger.info(f"Connecting to database: {database_url}")
         
+        # In-memory SQLite uses a single-connection pool that takes no sizing
+        pool_args = {} if ":memory:" in database_url or database_url == "sqlite://" else {
+            "pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW
+        }
+        
         # SQLite-specific configuration
         if database_url.startswith("sqlite"):
             _engine = create_engine(
                 database_url,
                 echo=False,  # Set to True for SQL debugging
-                pool_pre_ping=True,
+                # Local file connections don't go stale, so skip the SELECT 1 on every checkout
+                pool_pre_ping=False,
+                query_cache_size=QUERY_CACHE_SIZE,
+                **pool_args,
                 connect_args={
                     "check_same_thread": False,  # Allow multi-threading
-                    "timeout": 20,  # 20 second timeout
                 }
             )
             
-            # Enable foreign key constraints for SQLite
+            # Enable foreign key constraints and tune I/O for SQLite
             @event.listens_for(_engine, "connect")
             def set_sqlite_pragma(dbapi_connection, connection_record):
                 cursor = dbapi_connection.cursor()
                 cursor.execute("PRAGMA foreign_keys=ON")
                 cursor.execute("PRAGMA journal_mode=WAL")  # Better concurrency
+                cursor.execute("PRAGMA synchronous=NORMAL")  # Safe under WAL, far fewer fsyncs
+                cursor.execute("PRAGMA cache_size=-65536")  # 64MB page cache
+                cursor.execute("PRAGMA temp_store=MEMORY")
+                cursor.execute("PRAGMA busy_timeout=20000")  # Wait up to 20s on locks
+                if sys.platform != "win32":
+                    cursor.execute("PRAGMA mmap_size=268435456")  # 256MB memory-mapped reads
                 cursor.close()
         else:
-            _engine = create_engine(database_url, echo=False, pool_pre_ping=True)
+            _engine = create_engine(
+                database_url, echo=False, pool_pre_ping=True, query_cache_size=QUERY_CACHE_SIZE, **pool_args
+            )
     
     return _engine
 
@@ -102,16 +228,142 @@ def init_database() -> None:
     engine = get_engine()
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    
+    # create_all skips indexes on tables that already exist, so add any new ones explicitly
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as connection:
+            _ensure_fts_index(connection, SONGS_FTS_DDL)
+            _ensure_fts_index(connection, THEMES_FTS_DDL)
+            _ensure_rollup_table(connection, SONG_FEEDBACK_STATS_DDL, SONG_FEEDBACK_STATS_FILL)
+            _ensure_rollup_table(connection, MESSAGE_TYPE_DAILY_DDL, MESSAGE_TYPE_DAILY_FILL)
+    refresh_lyrics_search()
     logger.info("Database tables created successfully")
 
 
+def _create_missing(connection, ddl: Dict[str, str]) -> bool:
+    """Run the statements in ddl whose objects don't exist yet; returns whether any were created."""
+    existing = set(connection.execute(
+        text("SELECT name FROM sqlite_master WHERE name IN :names").bindparams(
+            bindparam('names', expanding=True)
+        ),
+        {'names': list(ddl)}
+    ).scalars())
+    if len(existing) == len(ddl):
+        return False
+    
+    for name, statement in ddl.items():
+        if name not in existing:
+            connection.execute(text(statement))
+    return True
+
+
+def _ensure_fts_index(connection, ddl: Dict[str, str]) -> None:
+    """Create whichever parts of an FTS5 index (first entry) and its triggers are missing,
+    rebuilding the index from its content table if anything had to be created."""
+    if not _create_missing(connection, ddl):
+        return
+    fts_table = next(iter(ddl))
+    connection.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+    logger.info(f"Rebuilt full-text index {fts_table}")
+
+
+def _ensure_rollup_table(connection, ddl: Dict[str, str], fill: str) -> None:
+    """Create whichever parts of a rollup table (first entry) and its triggers are missing,
+    then recreate all its triggers, since older ones may differ, and refill the table from its source."""
+    if not _create_missing(connection, ddl):
+        return
+    rollup_table, *triggers = ddl
+    for trigger in triggers:
+        connection.execute(text(f"DROP TRIGGER {trigger}"))
+        connection.execute(text(ddl[trigger]))
+    connection.execute(text(f"DELETE FROM {rollup_table}"))
+    connection.execute(text(fill))
+    logger.info(f"Rebuilt rollup table {rollup_table}")
+
+
+def refresh_lyrics_search() -> int:
+    """Bring lyrics search up to date: add search_blob and the SQLite FTS5 index if missing,
+    and recompute search_blob wherever it no longer matches the lyric sections.
+    
+    Safe to re-run; call it after writing lyrics with raw SQL. Returns the number of rows refreshed.
+    """
+    engine = get_engine()
+    inspector = inspect(engine)
+    if not inspector.has_table('lyrics'):
+        return 0
+    columns = {column['name'] for column in inspector.get_columns('lyrics')}
+    if not {'first_line', 'chorus', 'bridge'} <= columns:
+        logger.warning("Lyrics table predates the first_line/chorus/bridge layout; run scripts/migrate_lyrics_structure.py")
+        return 0
+    
+    with engine.begin() as connection:
+        if 'search_blob' not in columns:
+            connection.execute(text("ALTER TABLE lyrics ADD COLUMN search_blob TEXT"))
+        
+        if engine.dialect.name == 'sqlite':
+            # Rebuilding the lyrics table (as the migration script does) drops the triggers but not lyrics_fts.
+            # Index the current search_blob values first, so the update trigger below removes matching entries
+            _ensure_fts_index(connection, LYRICS_FTS_DDL)
+        
+        refreshed = connection.execute(
+            update(Lyrics)
+            # Setting updated_at to itself keeps its onupdate from firing for a derived column
+            .values(search_blob=LYRICS_SEARCH_BLOB, updated_at=Lyrics.updated_at)
+            .where(Lyrics.search_blob.is_distinct_from(LYRICS_SEARCH_BLOB))
+        ).rowcount
+    
+    if refreshed:
+        logger.info(f"Refreshed search text for {refreshed} lyrics")
+    return refreshed
+
+
+def backfill_theme_mappings() -> int:
+    """Copy JSON tags into theme_mappings for songs that have no mappings yet."""
+    with get_db_session() as session:
+        unmapped = session.execute(
+            select(Song.song_id, Song.tags).where(
+                Song.tags.isnot(None),
+                ~select(ThemeMapping.song_id).where(ThemeMapping.song_id == Song.song_id).exists()
+            )
+        ).all()
+        
+        rows = [
+            {'song_id': song_id, 'theme_name': tag, 'confidence_score': 1.0, 'source': 'import'}
+            for song_id, tags in unmapped
+            for tag in json.loads(tags or '[]')
+        ]
+        if rows:
+            session.execute(insert(ThemeMapping), rows)
+            logger.info(f"Backfilled {len(rows)} theme mappings for {len(unmapped)} songs")
+    
+    return len(rows)
+
+
 def reset_database() -> None:
     """Reset database by dropping and recreating all tables."""
     engine = get_engine()
     logger.warning("Dropping all database tables...")
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS lyrics_fts"))
+            connection.execute(text("DROP TABLE IF EXISTS songs_fts"))
+            connection.execute(text("DROP TABLE IF EXISTS theme_mappings_fts"))
+            connection.execute(text("DROP TABLE IF EXISTS song_feedback_stats"))
+            connection.execute(text("DROP TABLE IF EXISTS message_type_daily"))
     Base.metadata.drop_all(bind=engine)
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as connection:
+            _ensure_fts_index(connection, SONGS_FTS_DDL)
+            _ensure_fts_index(connection, THEMES_FTS_DDL)
+            _ensure_rollup_table(connection, SONG_FEEDBACK_STATS_DDL, SONG_FEEDBACK_STATS_FILL)
+            _ensure_rollup_table(connection, MESSAGE_TYPE_DAILY_DDL, MESSAGE_TYPE_DAILY_FILL)
+    refresh_lyrics_search()
     logger.info("Database reset completed")
 
 
@@ -142,15 +394,8 @@ def get_database_info() -> dict:
     # Get table info if database exists
     if info["database_exists"]:
         with get_db_session() as session:
-            # Count records in each table
-            from .models import Song, Lyrics, UserFeedback, SongUsage, ThemeMapping, MessageLog
-            info["tables"] = {
-                "songs": session.query(Song).count(),
-                "lyrics": session.query(Lyrics).count(),
-                "user_feedback": session.query(UserFeedback).count(),
-                "song_usage": session.query(SongUsage).count(),
-                "theme_mappings": session.query(ThemeMapping).count(),
-                "message_logs": session.query(MessageLog).count(),
-            }
+            # Count records in each table with one round trip
+            row = session.execute(TABLE_COUNTS_SQL).one()
+            info["tables"] = dict(zip(INFO_TABLES, row))
     
     return info
\ No newline at end of file
@@ -1,15 +1,41 @@
 """SQLAlchemy models for DavidBot database."""
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, REAL, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, REAL, DateTime, ForeignKey, Index, event, func, literal
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
-import json
+from sqlalchemy.orm import deferred, relationship
+from datetime import datetime, timezone
+import math
+import sqlite3
 from typing import List, Dict, Optional
 
+from ..jsonutil import json_loads, json_dumps
+
 Base = declarative_base()
 
 
+def _utcnow() -> datetime:
+    """Naive UTC now, matching the values already stored (datetime.utcnow is deprecated)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _cached_json(instance, column: str, default):
+    """Decode a JSON text column, reusing the last decode while the raw text is unchanged."""
+    raw = getattr(instance, column)
+    cache = instance.__dict__.setdefault('_json_cache', {})
+    entry = cache.get(column)
+    if entry is None or entry[0] != raw:
+        entry = cache[column] = (raw, json_loads(raw) if raw else default)
+    return entry[1]
+
+
+def _store_json(instance, column: str, value) -> None:
+    """Encode a value into a JSON text column and prime the decode cache."""
+    raw = json_dumps(value)
+    setattr(instance, column, raw)
+    instance.__dict__.setdefault('_json_cache', {})[column] = (raw, json_loads(raw))
+
+
 class Song(Base):
     """Song metadata table."""
     __tablename__ = 'songs'
@@ -21,11 +47,11 @@ class Song(Base):
     bpm = Column(Integer)
     meter = Column(Text)  # Time signature: "4/4", "3/4", "6/8"
     lead_gender = Column(Text)  # "Male", "Female", "Both", "Unknown"
-    tags = Column(Text)  # JSON array: ["surrender", "worship"]
+    tags = Column(Text)  # JSON array for display; theme_mappings holds the indexed copy used for filtering
     resource_link = Column(Text)
     ccli_number = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
     is_active = Column(Boolean, default=True)
     
     # Relationships
@@ -34,6 +60,10 @@ class Song(Base):
     themes = relationship("ThemeMapping", back_populates="song", cascade="all, delete-orphan")
     usage_history = relationship("SongUsage", back_populates="song", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        Index('ix_songs_original_key', 'original_key'),
+    )
+    
     # These properties are kept for backward compatibility
     @property
     def boy_keys_list(self) -> List[str]:
@@ -58,12 +88,12 @@ class Song(Base):
     @property
     def tags_list(self) -> List[str]:
         """Get tags as list."""
-        return json.loads(self.tags) if self.tags else []
+        return list(_cached_json(self, 'tags', []))
     
     @tags_list.setter
     def tags_list(self, tags: List[str]):
         """Set tags from list."""
-        self.tags = json.dumps(tags)
+        _store_json(self, 'tags', tags)
 
     def __repr__(self) -> str:
         return f"<Song(id={self.song_id}, title='{self.title}', artist='{self.artist}')>"
@@ -78,9 +108,10 @@ class Lyrics(Base):
     first_line = Column(Text)  # Opening line of the song
     chorus = Column(Text)      # Main chorus section
     bridge = Column(Text)      # Bridge section
+    search_blob = deferred(Column(Text))  # combined_content, kept current on write for SQL/FTS search; not loaded by default
     language = Column(String, default='en')
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     song = relationship("Song", back_populates="lyrics")
@@ -88,19 +119,29 @@ class Lyrics(Base):
     @property
     def combined_content(self) -> str:
         """Get all lyrical content combined for search purposes."""
-        content_parts = []
-        if self.first_line:
-            content_parts.append(self.first_line)
-        if self.chorus:
-            content_parts.append(self.chorus)
-        if self.bridge:
-            content_parts.append(self.bridge)
-        return " | ".join(content_parts)
+        return " | ".join(filter(None, (self.first_line, self.chorus, self.bridge)))
     
     def __repr__(self) -> str:
         return f"<Lyrics(id={self.lyrics_id}, song_id={self.song_id}, sections={bool(self.first_line or self.chorus or self.bridge)})>"
 
 
+@event.listens_for(Lyrics, 'before_insert')
+@event.listens_for(Lyrics, 'before_update')
+def _set_lyrics_search_blob(mapper, connection, target: Lyrics) -> None:
+    """Materialize combined_content into search_blob whenever lyrics are written."""
+    target.search_blob = target.combined_content
+
+
+def lyrics_search_blob(first_line, chorus, bridge):
+    """SQL expression equal to Lyrics.combined_content for the given section columns or values."""
+    return func.substr(
+        func.coalesce(literal(" | ") + func.nullif(first_line, ""), "")
+        + func.coalesce(literal(" | ") + func.nullif(chorus, ""), "")
+        + func.coalesce(literal(" | ") + func.nullif(bridge, ""), ""),
+        4
+    )
+
+
 class UserFeedback(Base):
     """User feedback and interaction tracking."""
     __tablename__ = 'user_feedback'
@@ -113,30 +154,37 @@ class UserFeedback(Base):
     action = Column(String, nullable=False)  # 'thumbs_up', 'thumbs_down', 'used'
     context_keywords = Column(Text)  # JSON array of search terms
     search_params = Column(Text)  # JSON: original search query context
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
     
     # Relationships
     song = relationship("Song", back_populates="feedback")
     
+    # Per-user lookups (by song, or newest first) and per-song action counts
+    __table_args__ = (
+        Index('ix_user_feedback_user_song_action', 'user_id', 'song_id', 'action'),
+        Index('ix_user_feedback_user_timestamp', 'user_id', 'timestamp'),
+        Index('ix_user_feedback_song_action', 'song_id', 'action'),
+    )
+    
     @property
     def context_keywords_list(self) -> List[str]:
         """Get context keywords as list."""
-        return json.loads(self.context_keywords) if self.context_keywords else []
+        return list(_cached_json(self, 'context_keywords', []))
     
     @context_keywords_list.setter
     def context_keywords_list(self, keywords: List[str]):
         """Set context keywords from list."""
-        self.context_keywords = json.dumps(keywords)
+        _store_json(self, 'context_keywords', keywords)
     
     @property
     def search_params_dict(self) -> Dict:
         """Get search params as dictionary."""
-        return json.loads(self.search_params) if self.search_params else {}
+        return dict(_cached_json(self, 'search_params', {}))
     
     @search_params_dict.setter
     def search_params_dict(self, params: Dict):
         """Set search params from dictionary."""
-        self.search_params = json.dumps(params)
+        _store_json(self, 'search_params', params)
 
     def __repr__(self) -> str:
         return f"<UserFeedback(id={self.feedback_id}, user_id='{self.user_id}', action='{self.action}')>"
@@ -148,18 +196,40 @@ class SongUsage(Base):
     
     usage_id = Column(Integer, primary_key=True, autoincrement=True)
     song_id = Column(Integer, ForeignKey('songs.song_id'), nullable=False)
-    used_date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    used_date = Column(DateTime, nullable=False, default=_utcnow)
     service_type = Column(String, default='worship')  # 'worship', 'youth', 'special', etc.
     notes = Column(String)  # Optional context: "altar call", "opening", etc.
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
     
     # Relationships
     song = relationship("Song", back_populates="usage_history")
     
+    # Familiarity scoring reads one song's usage by date; usage stats scan a recent date range
+    __table_args__ = (
+        Index('ix_song_usage_song_date', 'song_id', 'used_date'),
+        Index('ix_song_usage_used_date', 'used_date'),
+    )
+    
     def __repr__(self) -> str:
         return f"<SongUsage(id={self.usage_id}, song_id={self.song_id}, date={self.used_date.strftime('%Y-%m-%d')})>"
 
 
+# Each usage record's weight in familiarity scoring decays with a ~60 day half-life
+FAMILIARITY_DECAY_DAYS = 86.4
+
+
+def familiarity_decay(days_ago: int) -> float:
+    """Weight of a usage record made days_ago days ago."""
+    return math.exp(-days_ago / FAMILIARITY_DECAY_DAYS)
+
+
+@event.listens_for(Engine, 'connect')
+def _register_familiarity_decay(dbapi_connection, connection_record) -> None:
+    """Make familiarity_decay() callable from SQL on every SQLite connection; SQLite's exp() isn't in every build."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("familiarity_decay", 1, familiarity_decay, deterministic=True)
+
+
 class ThemeMapping(Base):
     """Song theme/tag mappings for semantic search."""
     __tablename__ = 'theme_mappings'
@@ -169,10 +239,16 @@ class ThemeMapping(Base):
     theme_name = Column(String, nullable=False)
     confidence_score = Column(REAL, default=1.0)  # For ML-based themes later
     source = Column(String, default='manual')  # 'manual', 'ml', 'user_feedback'
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
     
     # Relationships
     song = relationship("Song", back_populates="themes")
+    
+    # Theme lookups filter by name then join to songs; per-song lookups go by song_id
+    __table_args__ = (
+        Index('ix_theme_mappings_theme_song', 'theme_name', 'song_id'),
+        Index('ix_theme_mappings_song_id', 'song_id'),
+    )
 
     def __repr__(self) -> str:
         return f"<ThemeMapping(id={self.mapping_id}, song_id={self.song_id}, theme='{self.theme_name}')>"
@@ -183,13 +259,19 @@ class MessageLog(Base):
     __tablename__ = 'message_logs'
     
     log_id = Column(Integer, primary_key=True, autoincrement=True)
-    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
+    timestamp = Column(DateTime, nullable=False, default=_utcnow)
     user_id = Column(String, nullable=False)  # Hashed for privacy
     message_type = Column(String, nullable=False)  # 'search', 'more', 'feedback', 'unknown'
     message_content = Column(Text, nullable=False)  # User's message
     response_content = Column(Text, nullable=False)  # Bot's response
     session_context = Column(Text)  # JSON: session state for analysis
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now(), server_default=func.now())
+    
+    # A user's recent messages, and activity stats over a recent time window
+    __table_args__ = (
+        Index('ix_message_logs_user_timestamp', 'user_id', 'timestamp'),
+        Index('ix_message_logs_timestamp', 'timestamp'),
+    )
     
     def __repr__(self) -> str:
         return f"<MessageLog(id={self.log_id}, user_id='{self.user_id}', type='{self.message_type}')>"
\ No newline at end of file
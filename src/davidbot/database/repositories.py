@@ -1,10 +1,121 @@
 """Repository pattern for database access."""
 
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, text
+import logging
+import threading
+import time
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+from datetime import datetime
+from typing import Iterator, List, Optional, Dict, Any
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import Integer, String, and_, case, cast, column, delete, event, func, insert, or_, table, text, tuple_, update
 
-from .models import Song, Lyrics, UserFeedback, SongUsage, ThemeMapping, MessageLog
+from .models import Base, Song, Lyrics, UserFeedback, SongUsage, ThemeMapping, MessageLog, familiarity_decay, lyrics_search_blob
+
+logger = logging.getLogger(__name__)
+
+# Familiarity counts a song's most recent uses, each weighted by familiarity_decay
+FAMILIARITY_RECENT_USES = 20
+
+# Feedback nudges familiarity a little either way; any other usage counts 1.0
+FAMILIARITY_WEIGHTS = {'feedback_positive': 0.1, 'feedback_negative': -0.1}
+
+
+def _usage_days_ago(now: datetime):
+    """SQLite expression for the whole days between now and each usage record's used_date."""
+    return cast(func.julianday(now) - func.julianday(SongUsage.used_date), Integer)
+
+
+# The caches below are per engine, held weakly: separate engines on the same URL (such as two
+# in-memory databases) never share entries, and a discarded engine's entries go with it.
+
+# Recently computed familiarity scores by engine, as song_id -> (expires_at, score).
+# Writes through SongUsageRepository drop the song's entry, and drop it again when the session
+# commits or rolls back, since a score read in between may have seen the uncommitted rows.
+FAMILIARITY_CACHE_TTL_SECONDS = 60
+FAMILIARITY_CACHE_SIZE = 4096  # Per engine
+_familiarity_cache: "WeakKeyDictionary[Engine, OrderedDict]" = WeakKeyDictionary()
+_familiarity_cache_lock = threading.Lock()  # Repositories also run in worker threads
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_familiarity(session: Session) -> None:
+    """Drop the cached scores of songs whose usage the finished transaction changed."""
+    keys = session.info.pop('familiarity_changed', None)
+    if keys:
+        with _familiarity_cache_lock:
+            for engine, song_id in keys:
+                _familiarity_cache.get(engine, {}).pop(song_id, None)
+
+# Distinct theme names by engine, as (expires_at, themes); they change only when mappings are edited.
+# Writes through ThemeMappingRepository drop the entry.
+THEMES_CACHE_TTL_SECONDS = 300
+_themes_cache: "WeakKeyDictionary[Engine, tuple]" = WeakKeyDictionary()
+
+# Rows fetched per round trip by the iter_* methods, which stream instead of building a list
+STREAM_BATCH_SIZE = 500
+
+# Names of the FTS5 indexes and rollup tables known to exist, by engine
+_sqlite_tables: "WeakKeyDictionary[Engine, set]" = WeakKeyDictionary()
+
+
+@event.listens_for(Base.metadata, "after_create")
+@event.listens_for(Base.metadata, "after_drop")
+def _forget_engine_caches(metadata, connection, **kw) -> None:
+    """Drop everything cached for an engine when init_database or reset_database (re)creates its tables."""
+    engine = connection.engine
+    _sqlite_tables.pop(engine, None)
+    _themes_cache.pop(engine, None)
+    with _familiarity_cache_lock:
+        _familiarity_cache.pop(engine, None)
+
+# Trigger-maintained rollup tables created by init_database on SQLite; absent on other databases
+song_feedback_stats = table(
+    'song_feedback_stats', column('song_id', Integer), column('action', String), column('feedback_count', Integer)
+)
+message_type_daily = table(
+    'message_type_daily', column('day', String), column('message_type', String), column('message_count', Integer)
+)
+
+
+def _has_sqlite_table(session: Session, table: str) -> bool:
+    """Whether the session's SQLite database has an FTS5 index or rollup table; once found, it isn't checked again."""
+    bind = session.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return False
+    known = _sqlite_tables.get(bind.engine)
+    if known is None or table not in known:
+        if session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :table"), {'table': table}
+        ).first() is None:
+            return False
+        _sqlite_tables.setdefault(bind.engine, set()).add(table)
+    return True
+
+
+def _theme_name_contains(session: Session, theme: str):
+    """Filter for theme mappings whose name contains theme, ignoring case.
+    
+    On SQLite this goes through the trigram index; terms shorter than a trigram fall back to a scan.
+    """
+    if len(theme) >= 3 and _has_sqlite_table(session, 'theme_mappings_fts'):
+        return ThemeMapping.mapping_id.in_(
+            text("SELECT rowid FROM theme_mappings_fts WHERE theme_mappings_fts MATCH :theme_phrase")
+            .bindparams(theme_phrase='"' + theme.replace('"', '""') + '"')
+            .columns(column('rowid', Integer))
+        )
+    return ThemeMapping.theme_name.ilike(f"%{theme}%")
+
+
+def fts_prefix_query(query: str) -> str:
+    """Build an FTS5 query matching every word of the input, the last one as a prefix.
+    
+    Each word is quoted, so FTS5 operators and punctuation (-, :, *, AND, ...) are matched literally.
+    """
+    terms = ['"' + word.replace('"', '""') + '"' for word in query.split()]
+    return " ".join(terms) + "*"
 
 
 class SongRepository:
@@ -27,19 +138,45 @@ class SongRepository:
         """Get all active songs."""
         return self.session.query(Song).filter(Song.is_active == True).all()
     
+    def iter_all_active(self) -> Iterator[Song]:
+        """Iterate over all active songs, fetched STREAM_BATCH_SIZE rows at a time."""
+        yield from self.session.query(Song).filter(Song.is_active == True).yield_per(STREAM_BATCH_SIZE)
+    
+    def count_active(self) -> int:
+        """Get the number of active songs without loading them."""
+        return self.session.query(func.count(Song.song_id)).filter(Song.is_active == True).scalar()
+    
     def search_by_theme(self, theme: str, limit: int = 10) -> List[Song]:
         """Search songs by theme."""
-        return self.session.query(Song).join(ThemeMapping).filter(
+        return self.session.query(Song).join(ThemeMapping).options(
+            selectinload(Song.themes)
+        ).filter(
             and_(
-                ThemeMapping.theme_name.ilike(f"%{theme}%"),
+                _theme_name_contains(self.session, theme),
                 Song.is_active == True
             )
         ).order_by(ThemeMapping.confidence_score.desc()).limit(limit).all()
     
     def search_by_text(self, query: str, limit: int = 10) -> List[Song]:
-        """Search songs by title, artist, or lyrics content."""
-        # Simple text search - will be enhanced with FTS5 later
-        songs = self.session.query(Song).filter(
+        """Search songs by title or artist.
+        
+        On SQLite this is a full-text word/prefix match ranked by relevance; when the index is
+        missing or finds nothing it falls back to a substring match.
+        """
+        if query.strip() and _has_sqlite_table(self.session, 'songs_fts'):
+            matches = self.session.query(Song).from_statement(
+                text(
+                    "SELECT songs.* FROM songs JOIN songs_fts ON songs_fts.rowid = songs.song_id "
+                    "WHERE songs_fts MATCH :terms AND songs.is_active = 1 "
+                    "ORDER BY bm25(songs_fts) LIMIT :limit"
+                ).bindparams(terms=fts_prefix_query(query), limit=limit)
+            ).options(selectinload(Song.themes)).all()
+            if matches:
+                return matches
+        
+        return self.session.query(Song).options(
+            selectinload(Song.themes)
+        ).filter(
             and_(
                 or_(
                     Song.title.ilike(f"%{query}%"),
@@ -48,8 +185,6 @@ class SongRepository:
                 Song.is_active == True
             )
         ).limit(limit).all()
-        
-        return songs
     
     def get_songs_with_lyrics(self, song_ids: List[int]) -> List[Song]:
         """Get songs with their lyrics loaded."""
@@ -65,26 +200,41 @@ class SongRepository:
         return song
     
     def update(self, song_id: int, updates: Dict[str, Any]) -> Optional[Song]:
-        """Update a song."""
-        song = self.get_by_id(song_id)
-        if song:
-            for key, value in updates.items():
-                setattr(song, key, value)
-            self.session.flush()
-        return song
+        """Update a song, in one UPDATE ... RETURNING when only columns are given."""
+        if not all(key in Song.__table__.columns for key in updates):
+            # Properties such as tags_list encode their value in the setter, so they're set on the loaded song
+            song = self.get_by_id(song_id)
+            if song:
+                for key, value in updates.items():
+                    setattr(song, key, value)
+                self.session.flush()
+            return song
+        
+        return self.session.execute(
+            update(Song).where(Song.song_id == song_id)
+            .values(**{'updated_at': func.now(), **updates})
+            .returning(Song)
+        ).scalar_one_or_none()
     
     def delete(self, song_id: int) -> bool:
         """Soft delete a song by setting is_active = False."""
-        song = self.get_by_id(song_id)
-        if song:
-            song.is_active = False
-            self.session.flush()
-            return True
-        return False
+        result = self.session.execute(
+            update(Song).where(Song.song_id == song_id).values(is_active=False)
+        )
+        return result.rowcount > 0
     
     def get_popular_by_feedback(self, action: str = "thumbs_up", limit: int = 10) -> List[Song]:
         """Get songs ordered by positive feedback count."""
-        from sqlalchemy import func
+        if _has_sqlite_table(self.session, 'song_feedback_stats'):
+            return self.session.query(Song, song_feedback_stats.c.feedback_count).join(
+                song_feedback_stats, song_feedback_stats.c.song_id == Song.song_id
+            ).filter(
+                and_(
+                    song_feedback_stats.c.action == action,
+                    song_feedback_stats.c.feedback_count > 0,
+                    Song.is_active == True
+                )
+            ).order_by(song_feedback_stats.c.feedback_count.desc()).limit(limit).all()
         
         return self.session.query(Song, func.count(UserFeedback.feedback_id).label('feedback_count')).join(
             UserFeedback
@@ -109,8 +259,24 @@ class LyricsRepository:
         return self.session.query(Lyrics).filter(Lyrics.song_id == song_id).first()
     
     def search_lyrics_content(self, query: str, limit: int = 10) -> List[Lyrics]:
-        """Search lyrics by content across first_line, chorus, and bridge."""
-        return self.session.query(Lyrics).filter(
+        """Search lyrics by content across first_line, chorus, and bridge.
+        
+        On SQLite this is a full-text word/prefix match; when the index is missing or finds
+        nothing it falls back to a substring match over the sections.
+        """
+        options = selectinload(Lyrics.song).selectinload(Song.themes)
+        if query.strip() and _has_sqlite_table(self.session, 'lyrics_fts'):
+            # Quoted as one FTS5 phrase, the last word matching as a prefix
+            phrase = '"' + query.replace('"', '""') + '"*'
+            matches = self.session.query(Lyrics).options(options).filter(
+                Lyrics.lyrics_id.in_(
+                    text("SELECT rowid FROM lyrics_fts WHERE lyrics_fts MATCH :phrase").bindparams(phrase=phrase)
+                )
+            ).limit(limit).all()
+            if matches:
+                return matches
+        
+        return self.session.query(Lyrics).options(options).filter(
             or_(
                 Lyrics.first_line.ilike(f"%{query}%"),
                 Lyrics.chorus.ilike(f"%{query}%"),
@@ -126,22 +292,20 @@ class LyricsRepository:
         return lyrics
     
     def update(self, song_id: int, updates: Dict[str, Any]) -> Optional[Lyrics]:
-        """Update lyrics for a song."""
-        lyrics = self.get_by_song_id(song_id)
-        if lyrics:
-            for key, value in updates.items():
-                setattr(lyrics, key, value)
-            self.session.flush()
-        return lyrics
+        """Update lyrics for a song in one UPDATE ... RETURNING."""
+        # Bulk updates skip the before_update hook, so search_blob is recomputed in SQL from
+        # the new section values where given and the stored ones otherwise
+        sections = [updates.get(name, getattr(Lyrics, name)) for name in ('first_line', 'chorus', 'bridge')]
+        return self.session.execute(
+            update(Lyrics).where(Lyrics.song_id == song_id)
+            .values(**{'updated_at': func.now(), **updates}, search_blob=lyrics_search_blob(*sections))
+            .returning(Lyrics)
+        ).scalars().first()
     
     def delete(self, song_id: int) -> bool:
         """Delete lyrics for a song."""
-        lyrics = self.get_by_song_id(song_id)
-        if lyrics:
-            self.session.delete(lyrics)
-            self.session.flush()
-            return True
-        return False
+        result = self.session.execute(delete(Lyrics).where(Lyrics.song_id == song_id))
+        return result.rowcount > 0
 
 
 class FeedbackRepository:
@@ -168,7 +332,16 @@ class FeedbackRepository:
     
     def get_feedback_stats(self, song_id: int) -> Dict[str, int]:
         """Get feedback statistics for a song."""
-        from sqlalchemy import func
+        if _has_sqlite_table(self.session, 'song_feedback_stats'):
+            results = self.session.query(
+                song_feedback_stats.c.action, song_feedback_stats.c.feedback_count
+            ).filter(
+                and_(
+                    song_feedback_stats.c.song_id == song_id,
+                    song_feedback_stats.c.feedback_count > 0
+                )
+            ).all()
+            return {action: count for action, count in results}
         
         results = self.session.query(
             UserFeedback.action,
@@ -201,7 +374,7 @@ class ThemeMappingRepository:
     def get_songs_for_theme(self, theme_name: str, limit: int = 10) -> List[ThemeMapping]:
         """Get songs for a theme."""
         return self.session.query(ThemeMapping).filter(
-            ThemeMapping.theme_name.ilike(f"%{theme_name}%")
+            _theme_name_contains(self.session, theme_name)
         ).order_by(ThemeMapping.confidence_score.desc()).limit(limit).all()
     
     def create(self, mapping_data: Dict[str, Any]) -> ThemeMapping:
@@ -209,48 +382,47 @@ class ThemeMappingRepository:
         mapping = ThemeMapping(**mapping_data)
         self.session.add(mapping)
         self.session.flush()
+        self._forget_themes()
         return mapping
     
     def update_confidence(self, song_id: int, theme_name: str, new_confidence: float) -> Optional[ThemeMapping]:
         """Update confidence score for a theme mapping."""
-        mapping = self.session.query(ThemeMapping).filter(
-            and_(
-                ThemeMapping.song_id == song_id,
-                ThemeMapping.theme_name == theme_name
-            )
-        ).first()
-        
-        if mapping:
-            mapping.confidence_score = new_confidence
-            self.session.flush()
-        
-        return mapping
+        return self.session.execute(
+            update(ThemeMapping).where(
+                and_(
+                    ThemeMapping.song_id == song_id,
+                    ThemeMapping.theme_name == theme_name
+                )
+            ).values(confidence_score=new_confidence).returning(ThemeMapping)
+        ).scalars().first()
     
     def delete(self, song_id: int, theme_name: str) -> bool:
         """Delete a theme mapping."""
-        mapping = self.session.query(ThemeMapping).filter(
-            and_(
-                ThemeMapping.song_id == song_id,
-                ThemeMapping.theme_name == theme_name
+        result = self.session.execute(
+            delete(ThemeMapping).where(
+                and_(
+                    ThemeMapping.song_id == song_id,
+                    ThemeMapping.theme_name == theme_name
+                )
             )
-        ).first()
-        
-        if mapping:
-            self.session.delete(mapping)
-            self.session.flush()
-            return True
-        
-        return False
+        )
+        self._forget_themes()
+        return result.rowcount > 0
     
     def get_all_themes(self) -> List[str]:
-        """Get list of all unique themes."""
-        from sqlalchemy import func
-        
-        results = self.session.query(
-            func.distinct(ThemeMapping.theme_name)
-        ).all()
-        
-        return [result[0] for result in results]
+        """Get list of all unique themes, cached for a few minutes."""
+        engine = self.session.get_bind().engine
+        cached = _themes_cache.get(engine)
+        if cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+        
+        themes = [result[0] for result in self.session.query(func.distinct(ThemeMapping.theme_name)).all()]
+        _themes_cache[engine] = (time.monotonic() + THEMES_CACHE_TTL_SECONDS, themes)
+        return list(themes)
+    
+    def _forget_themes(self) -> None:
+        """Drop the cached theme list after mappings are added or removed."""
+        _themes_cache.pop(self.session.get_bind().engine, None)
 
 
 class SongUsageRepository:
@@ -268,81 +440,170 @@ class SongUsageRepository:
         )
         self.session.add(usage)
         self.session.flush()
+        self._forget_familiarity(song_id)
         return usage
     
+    def _forget_familiarity(self, song_id: int) -> None:
+        """Drop a song's cached familiarity score after its usage changes, now and when the transaction ends."""
+        engine = self.session.get_bind().engine
+        self.session.info.setdefault('familiarity_changed', set()).add((engine, song_id))
+        with _familiarity_cache_lock:
+            _familiarity_cache.get(engine, {}).pop(song_id, None)
+    
     def get_usage_history(self, song_id: int, limit: int = 10) -> List[SongUsage]:
         """Get usage history for a specific song."""
         return self.session.query(SongUsage).filter(
             SongUsage.song_id == song_id
         ).order_by(SongUsage.used_date.desc()).limit(limit).all()
     
-    def get_recent_usage(self, days: int = 90) -> List[SongUsage]:
-        """Get all song usage in the last N days."""
+    def get_recent_usage(self, days: int = 90, limit: Optional[int] = None) -> List[SongUsage]:
+        """Get song usage in the last N days, newest first, optionally only the first `limit` records."""
         from datetime import datetime, timedelta
         cutoff_date = datetime.now() - timedelta(days=days)
         
         return self.session.query(SongUsage).filter(
             SongUsage.used_date >= cutoff_date
-        ).order_by(SongUsage.used_date.desc()).all()
+        ).order_by(SongUsage.used_date.desc()).limit(limit).all()
+    
+    def iter_recent_usage(self, days: int = 90) -> Iterator[SongUsage]:
+        """Iterate over song usage in the last N days, newest first, fetched STREAM_BATCH_SIZE rows at a time."""
+        from datetime import datetime, timedelta
+        cutoff_date = datetime.now() - timedelta(days=days)
+        
+        yield from self.session.query(SongUsage).filter(
+            SongUsage.used_date >= cutoff_date
+        ).order_by(SongUsage.used_date.desc()).yield_per(STREAM_BATCH_SIZE)
+    
+    def get_recent_usage_stats(self, days: int = 90, top: int = 10) -> Dict[str, Any]:
+        """Count song usage in the last N days without loading the records.
+        
+        Returns the total, counts by service type, and the `top` most used songs as (Song, count) pairs.
+        """
+        from datetime import datetime, timedelta
+        cutoff_date = datetime.now() - timedelta(days=days)
+        recent = SongUsage.used_date >= cutoff_date
+        
+        by_service_type = dict(self.session.query(
+            SongUsage.service_type, func.count(SongUsage.usage_id)
+        ).filter(recent).group_by(SongUsage.service_type).all())
+        
+        usage_count = func.count(SongUsage.usage_id)
+        top_songs = self.session.query(Song, usage_count).join(
+            SongUsage, SongUsage.song_id == Song.song_id
+        ).filter(recent).group_by(Song.song_id).order_by(
+            usage_count.desc(), func.max(SongUsage.used_date).desc()
+        ).limit(top).all()
+        
+        return {
+            'total': sum(by_service_type.values()),
+            'by_service_type': by_service_type,
+            'top_songs': top_songs
+        }
     
     def get_usage_count(self, song_id: int, days: int = 365) -> int:
         """Get number of times a song was used in the last N days."""
         from datetime import datetime, timedelta
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        return self.session.query(SongUsage).filter(
+        return self.session.query(func.count(SongUsage.usage_id)).filter(
             and_(
                 SongUsage.song_id == song_id,
                 SongUsage.used_date >= cutoff_date
             )
-        ).count()
+        ).scalar()
     
     def calculate_familiarity_score(self, song_id: int) -> float:
         """
         Calculate familiarity score based on usage history.
         More recent usage weighted higher. Score decays over time.
         Returns score between 0.0 (never used) and 10.0 (very familiar).
+        Scores are cached for FAMILIARITY_CACHE_TTL_SECONDS.
         """
-        from datetime import datetime, timedelta
-        import math
-        
+        engine = self.session.get_bind().engine
+        now = time.monotonic()
+        cached = _familiarity_cache.get(engine, {}).get(song_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        
+        score = self._compute_familiarity_score(song_id)
+        with _familiarity_cache_lock:
+            scores = _familiarity_cache.get(engine)
+            if scores is None:
+                scores = _familiarity_cache[engine] = OrderedDict()
+            scores[song_id] = (now + FAMILIARITY_CACHE_TTL_SECONDS, score)
+            scores.move_to_end(song_id)
+            while len(scores) > FAMILIARITY_CACHE_SIZE:
+                scores.popitem(last=False)
+        return score
+    
+    def _compute_familiarity_score(self, song_id: int) -> float:
+        """Calculate a song's familiarity score from its most recent usage records."""
         now = datetime.now()
-        usage_records = self.session.query(SongUsage).filter(
+        # SQLite works out each record's age in days itself, so used_date isn't parsed per row
+        on_sqlite = self.session.get_bind().dialect.name == 'sqlite'
+        age = _usage_days_ago(now) if on_sqlite else SongUsage.used_date
+        # Only the two columns the score needs, not full SongUsage objects
+        usage_rows = self.session.query(age, SongUsage.service_type).filter(
             SongUsage.song_id == song_id
-        ).order_by(SongUsage.used_date.desc()).limit(20).all()
+        ).order_by(SongUsage.used_date.desc()).limit(FAMILIARITY_RECENT_USES).all()
         
-        if not usage_records:
+        if not usage_rows:
             return 0.0
         
-        total_score = 0.0
-        
-        for usage in usage_records:
-            # Calculate days since usage
-            days_ago = (now - usage.used_date).days
-            
-            # Exponential decay: recent usage worth more
-            # Base score of 1.0, decays by half every 60 days
-            decay_factor = math.exp(-days_ago / 86.4)  # ~60 day half-life
-            
-            # Handle feedback-based adjustments
-            if usage.service_type == 'feedback_positive':
-                # Positive feedback adds 0.1 to familiarity
-                score_contribution = 0.1 * decay_factor
-            elif usage.service_type == 'feedback_negative':
-                # Negative feedback subtracts 0.1 from familiarity
-                score_contribution = -0.1 * decay_factor
-            else:
-                # Regular usage contributes 1.0
-                score_contribution = 1.0 * decay_factor
-            
-            total_score += score_contribution
+        # Each use contributes its weight (1.0 for a service, +/-0.1 for feedback),
+        # decayed by the days since it happened
+        total_score = sum(
+            FAMILIARITY_WEIGHTS.get(service_type, 1.0)
+            * familiarity_decay(days_ago if on_sqlite else (now - days_ago).days)
+            for days_ago, service_type in usage_rows
+        )
         
         # Ensure score is between 0.0 and 10.0, round to 1 decimal place
         return max(0.0, min(round(total_score, 1), 10.0))
     
     def get_most_familiar_songs(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get songs with highest familiarity scores."""
-        # Get all songs with their usage
+        if self.session.get_bind().dialect.name != 'sqlite':
+            return self._get_most_familiar_songs_per_song(limit)
+        
+        # Score every song in one query: rank each song's usage newest first, then sum the
+        # decayed contributions of its most recent FAMILIARITY_RECENT_USES records
+        days_ago = _usage_days_ago(datetime.now())
+        weight = case(
+            *((SongUsage.service_type == service_type, value) for service_type, value in FAMILIARITY_WEIGHTS.items()),
+            else_=1.0
+        )
+        ranked = self.session.query(
+            SongUsage.song_id,
+            (weight * func.familiarity_decay(days_ago)).label('contribution'),
+            func.row_number().over(
+                partition_by=SongUsage.song_id, order_by=SongUsage.used_date.desc()
+            ).label('recency_rank')
+        ).subquery()
+        scores = self.session.query(
+            ranked.c.song_id, func.sum(ranked.c.contribution).label('score')
+        ).filter(
+            ranked.c.recency_rank <= FAMILIARITY_RECENT_USES
+        ).group_by(ranked.c.song_id).subquery()
+        
+        rows = self.session.query(Song, scores.c.score).join(
+            scores, Song.song_id == scores.c.song_id
+        ).filter(
+            and_(Song.is_active == True, scores.c.score > 0)
+        ).order_by(scores.c.score.desc(), Song.song_id).limit(limit).all()
+        
+        songs_with_scores = []
+        for song, raw_score in rows:
+            score = max(0.0, min(round(raw_score, 1), 10.0))
+            if score > 0:  # Only include songs that have been used
+                songs_with_scores.append({
+                    'song': song,
+                    'familiarity_score': score
+                })
+        return songs_with_scores
+    
+    def _get_most_familiar_songs_per_song(self, limit: int) -> List[Dict[str, Any]]:
+        """Score each active song separately, for databases without the SQLite decay function."""
         songs_with_scores = []
         
         songs = self.session.query(Song).filter(Song.is_active == True).all()
@@ -364,8 +625,7 @@ class SongUsageRepository:
         Set a baseline familiarity score by creating historical usage records.
         This simulates past usage to establish familiarity for popular songs.
         """
-        from datetime import datetime, timedelta
-        import math
+        from datetime import timedelta
         
         if not (0.0 <= baseline_score <= 10.0):
             raise ValueError("Baseline score must be between 0.0 and 10.0")
@@ -398,36 +658,34 @@ class SongUsageRepository:
             # 8+ very frequent uses (mega popular songs)
             usage_records_needed = [1, 3, 7, 14, 21, 35, 49, 70, 90, 120, 150]
         
-        # Create the usage records
-        for days_ago in usage_records_needed:
-            usage_date = now - timedelta(days=days_ago)
-            
-            # Check if we already have a usage record near this date
-            existing = self.session.query(SongUsage).filter(
-                and_(
-                    SongUsage.song_id == song_id,
-                    SongUsage.used_date >= usage_date - timedelta(days=1),
-                    SongUsage.used_date <= usage_date + timedelta(days=1)
-                )
-            ).first()
-            
-            if not existing:
-                usage = SongUsage(
-                    song_id=song_id,
-                    used_date=usage_date,
-                    service_type='worship',
-                    notes=f'baseline_familiarity_{baseline_score}'
-                )
-                self.session.add(usage)
-        
-        self.session.flush()
-        
-        # Verify the achieved score
-        actual_score = self.calculate_familiarity_score(song_id)
-        print(f"Set baseline familiarity: target={baseline_score}, actual={actual_score}")
-    
-    def set_popular_songs_baseline(self) -> None:
-        """Set baseline familiarity for well-known popular worship songs."""
+        # Skip dates that already have a usage record within a day, fetching those records in one query
+        candidate_dates = [now - timedelta(days=days_ago) for days_ago in usage_records_needed]
+        one_day = timedelta(days=1)
+        existing_dates = [used_date for (used_date,) in self.session.query(SongUsage.used_date).filter(
+            and_(
+                SongUsage.song_id == song_id,
+                SongUsage.used_date >= min(candidate_dates) - one_day,
+                SongUsage.used_date <= max(candidate_dates) + one_day
+            )
+        )]
+        new_usage = [
+            {
+                'song_id': song_id,
+                'used_date': usage_date,
+                'service_type': 'worship',
+                'notes': f'baseline_familiarity_{baseline_score}'
+            }
+            for usage_date in candidate_dates
+            if not any(abs(used_date - usage_date) <= one_day for used_date in existing_dates)
+        ]
+        
+        # Create the usage records in a single executemany
+        if new_usage:
+            self.session.execute(insert(SongUsage), new_usage)
+        self._forget_familiarity(song_id)
+    
+    def set_popular_songs_baseline(self) -> int:
+        """Set baseline familiarity for well-known popular worship songs; returns how many were updated."""
         # Define popular songs and their estimated familiarity scores
         # Based on general knowledge of popular contemporary worship songs
         popular_songs = {
@@ -460,35 +718,44 @@ class SongUsageRepository:
             ("Come Alive", "Planetshakers"): 2.0,
         }
         
-        updated_count = 0
+        # Fetch every listed song with its usage count in one grouped query;
+        # titles are matched case-insensitively but exactly
+        wanted = {(title.lower(), artist.lower()): (title, artist) for title, artist in popular_songs}
+        rows = self.session.query(Song, func.count(SongUsage.usage_id)).outerjoin(
+            SongUsage, SongUsage.song_id == Song.song_id
+        ).filter(
+            tuple_(func.lower(Song.title), func.lower(Song.artist)).in_(list(wanted)),
+            Song.is_active == True
+        ).group_by(Song.song_id).order_by(Song.song_id).all()
+        
+        updated_songs = []
         
-        for (title, artist), baseline_score in popular_songs.items():
-            # Find the song in database
-            song = self.session.query(Song).filter(
-                and_(
-                    Song.title.ilike(f"%{title}%"),
-                    Song.artist.ilike(f"%{artist}%"),
-                    Song.is_active == True
-                )
-            ).first()
+        for song, existing_usage in rows:
+            key = (song.title.lower(), song.artist.lower())
+            if key not in wanted:
+                continue
+            baseline_score = popular_songs[wanted.pop(key)]
             
-            if song:
-                # Only set baseline if song has no existing usage history
-                existing_usage = self.session.query(SongUsage).filter(
-                    SongUsage.song_id == song.song_id
-                ).count()
-                
-                if existing_usage == 0:
-                    self.set_baseline_familiarity(song.song_id, baseline_score)
-                    updated_count += 1
-                    print(f"✅ Set baseline for: {song.title} by {song.artist} (score: {baseline_score})")
-                else:
-                    print(f"⚠️ Skipped {song.title} - already has usage history ({existing_usage} records)")
+            # Only set baseline if song has no existing usage history
+            if existing_usage == 0:
+                self.set_baseline_familiarity(song.song_id, baseline_score)
+                updated_songs.append((song, baseline_score))
             else:
-                print(f"❌ Not found: {title} by {artist}")
+                logger.info("Skipped %s - already has usage history (%d records)", song.title, existing_usage)
+        
+        for title, artist in wanted.values():
+            logger.warning("Not found: %s by %s", title, artist)
         
         self.session.commit()
-        print(f"\n🎵 Updated baseline familiarity for {updated_count} songs")
+        
+        # Report the achieved scores once the write transaction is over
+        if logger.isEnabledFor(logging.INFO):
+            for song, baseline_score in updated_songs:
+                logger.info(
+                    "Set baseline for %s by %s (target=%s, actual=%s)",
+                    song.title, song.artist, baseline_score, self.calculate_familiarity_score(song.song_id)
+                )
+        return len(updated_songs)
 
 
 class MessageLogRepository:
@@ -511,12 +778,21 @@ class MessageLogRepository:
         ).order_by(MessageLog.timestamp.desc()).limit(limit).all()
     
     def get_message_type_stats(self, days: int = 30) -> Dict[str, int]:
-        """Get message type statistics for the last N days."""
+        """Get message type statistics for the last N days.
+        
+        With the daily rollup table (SQLite), the whole of the cutoff day is counted.
+        """
         from datetime import datetime, timedelta
-        from sqlalchemy import func
         
         cutoff_date = datetime.now() - timedelta(days=days)
         
+        if _has_sqlite_table(self.session, 'message_type_daily'):
+            total = func.sum(message_type_daily.c.message_count)
+            results = self.session.query(message_type_daily.c.message_type, total).filter(
+                message_type_daily.c.day >= cutoff_date.date().isoformat()
+            ).group_by(message_type_daily.c.message_type).having(total > 0).all()
+            return {msg_type: count for msg_type, count in results}
+        
         results = self.session.query(
             MessageLog.message_type,
             func.count(MessageLog.log_id).label('count')
@@ -22,11 +22,9 @@ class DatabaseRecommendationEngine:
         if db_song.song_id in self._song_cache:
             return self._song_cache[db_song.song_id]
         
-        # Get themes for search terms
-        with get_db_session() as session:
-            theme_repo = ThemeMappingRepository(session)
-            themes = theme_repo.get_themes_for_song(db_song.song_id)
-            search_terms = [theme.theme_name for theme in themes]
+        # Get themes for search terms; repositories eager-load them, so this needs no extra query
+        themes = sorted(db_song.themes, key=lambda theme: theme.confidence_score or 0.0, reverse=True)
+        search_terms = [theme.theme_name for theme in themes]
         
         # Convert to bot model format
         bot_song = BotSong(
@@ -36,7 +34,8 @@ class DatabaseRecommendationEngine:
             bpm=db_song.bpm or 80,  # Default BPM if None
             tags=db_song.tags_list,
             url=db_song.resource_link or "",
-            search_terms=search_terms
+            search_terms=search_terms,
+            song_id=db_song.song_id
         )
         
         # Cache for future use
@@ -94,7 +93,7 @@ class DatabaseRecommendationEngine:
                     lyrics_matches = lyrics_repo.search_lyrics_content(query, limit=5)
                     
                     for lyrics in lyrics_matches:
-                        db_song = song_repo.get_by_id(lyrics.song_id)
+                        db_song = lyrics.song
                         if db_song and db_song.title not in excluded_songs:
                             bot_song = self._convert_db_song_to_bot_song(db_song, lyrics)
                             matching_songs.append(bot_song)
@@ -318,8 +317,7 @@ class DatabaseRecommendationEngine:
         try:
             with get_db_session() as session:
                 song_repo = SongRepository(session)
-                songs = song_repo.get_all_active()
-                return len(songs)
+                return song_repo.count_active()
         except Exception as e:
             logger.error(f"Failed to get song count: {e}")
             return 0
@@ -1,12 +1,18 @@
 """Enhanced bot handler with natural language processing and conversational context."""
 
 import os
+import re
+import json
 import ssl
+import time
 import logging
 import asyncio
 import aiohttp
-from typing import Optional, List, Union, Dict, Any
+from typing import Optional, List, Union, Dict, Any, Callable, Awaitable
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from functools import lru_cache
+from sqlalchemy import insert
 
 from .llm_query_parser import LLMQueryParser, MockLLMQueryParser, ParsedQuery
 from .enhanced_recommendation_engine import EnhancedRecommendationEngine
@@ -14,11 +20,49 @@ from .database_recommendation_engine import create_recommendation_engine
 from .response_formatter import ResponseFormatter
 from .session_manager import SessionManager
 from .models import FeedbackEvent
-from .database import get_db_session, MessageLogRepository, FeedbackRepository, SongRepository, SongUsageRepository, Song
+from .database import get_db_session, MessageLogRepository, FeedbackRepository, SongRepository, SongUsageRepository, Song, MessageLog
 from .conversational_responder import create_conversational_responder
+from .jsonutil import json_loads
 
 logger = logging.getLogger(__name__)
 
+# Message and feedback writes are queued and written in batches off the event loop
+LOG_QUEUE_MAXSIZE = 10000
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL_SECONDS = 0.5  # How long a partial batch waits to fill before it is written anyway
+LOG_FLUSH_POLL_SECONDS = 0.05
+
+# Incoming Telegram updates are handed to a fixed pool of workers. Each chat is pinned
+# to one worker so its messages are still handled in order.
+UPDATE_WORKERS = 8
+UPDATE_QUEUE_MAXSIZE = 1000
+MAX_CONCURRENT_SENDS = 4
+
+# Telegram send limits: ~30 messages/s overall and ~1 message/s per chat (short bursts allowed)
+GLOBAL_SEND_RATE = 30
+CHAT_SEND_RATE = 1
+CHAT_SEND_BURST = 5
+SEND_MAX_RETRIES = 3
+SEND_MAX_BACKOFF_SECONDS = 30
+MAX_CHAT_SEND_BUCKETS = 10000
+
+# Only plain messages are handled, so ask Telegram not to send any other update types
+GET_UPDATES_PARAMS = {"timeout": 30, "limit": 100, "allowed_updates": json.dumps(["message"])}
+
+# Socket read timeout for Telegram calls; leaves headroom over the 30s long poll
+TELEGRAM_CONNECT_TIMEOUT_SECONDS = 10
+TELEGRAM_READ_TIMEOUT_SECONDS = 45
+
+# Text that marks a message as feedback when it doesn't start with 👍/👎
+DIRECT_FEEDBACK_PHRASES = ('thumbs up', 'thumbs down', 'perfect', 'loved', "didn't like", 'not good')
+
+# Ways of pointing at a song in feedback, tried in order
+FEEDBACK_POSITION_PATTERNS = (
+    re.compile(r'[👍👎]\s*(\d+)'),  # "👍 2" or "👎 2"
+    re.compile(r'(?:the\s+)?(?:second|2nd|third|3rd|first|1st)\s+(?:one|song)'),  # "the second one"
+    re.compile(r'(?:song|number)\s*(\d+)'),  # "song 2"
+)
+
 
 class ConversationContext:
     """Manages conversational context across messages."""
@@ -51,6 +95,48 @@ class ConversationContext:
         self.contexts.pop(user_id, None)
 
 
+@lru_cache(maxsize=None)
+def get_telegram_ssl_context() -> ssl.SSLContext:
+    """TLS context shared by every Telegram connection, built once per process.
+    
+    Certificates are verified unless TELEGRAM_SSL_VERIFY is set to false, for
+    development/corporate networks that intercept TLS.
+    """
+    ssl_context = ssl.create_default_context()
+    # aiohttp only speaks HTTP/1.1, so don't let the server negotiate h2
+    ssl_context.set_alpn_protocols(["http/1.1"])
+    
+    if os.getenv('TELEGRAM_SSL_VERIFY', 'true').lower() in ('0', 'false', 'no'):
+        logger.warning("TELEGRAM_SSL_VERIFY is disabled - Telegram certificates will not be verified")
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+    
+    return ssl_context
+
+
+class TokenBucket:
+    """Async token bucket allowing `rate` acquisitions per second, with bursts up to `capacity`."""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
 class EnhancedBotHandler:
     """Enhanced bot handler with natural language processing and conversational intelligence."""
     
@@ -64,6 +150,18 @@ class EnhancedBotHandler:
         self.conversation_context = ConversationContext()
         self.shutdown_requested = False
         
+        # Background log writer, started on first use inside the running event loop
+        self._log_queue: Optional[asyncio.Queue] = None
+        self._log_writer_task: Optional[asyncio.Task] = None
+        self._log_writer_stopping = False
+        
+        # Shared Telegram HTTP session, opened lazily by _get_http()
+        self._http: Optional[aiohttp.ClientSession] = None
+        
+        # Client-side rate limiting for outgoing Telegram messages
+        self._global_send_bucket = TokenBucket(GLOBAL_SEND_RATE)
+        self._chat_send_buckets: Dict[int, TokenBucket] = OrderedDict()
+        
         # LLM setup
         if use_mock_llm:
             logger.info("Using mock LLM parser (no API calls)")
@@ -84,10 +182,16 @@ class EnhancedBotHandler:
         logger.info("Shutdown requested for enhanced bot handler")
         self.shutdown_requested = True
     
-    async def handle_message(self, user_id: str, message: str) -> Union[str, List[str]]:
-        """Handle incoming messages with natural language processing."""
+    async def handle_message(self, user_id: str, message: str,
+                             send_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> Union[str, List[str]]:
+        """Handle incoming messages with natural language processing.
+        
+        If send_partial is given, a search intro is passed to it as soon as the LLM has written it;
+        the returned list still starts with that intro.
+        """
         try:
-            start_time = datetime.now()
+            # Monotonic timer for processing time; the wall-clock timestamp is taken once when logging
+            start_time = time.perf_counter()
             
             # Pre-process: Handle greetings and commands before LLM parsing
             # This ensures /start and other greetings are caught immediately
@@ -107,10 +211,10 @@ class EnhancedBotHandler:
                 
                 # Route based on intent
                 if parsed_query.intent == "search":
-                    response = await self._handle_natural_search(user_id, parsed_query)
+                    response = await self._handle_natural_search(user_id, parsed_query, send_partial)
                     message_type = "search"
                 elif parsed_query.intent == "more":
-                    response = await self._handle_more_request(user_id, parsed_query)
+                    response = await self._handle_more_request(user_id, parsed_query, send_partial)
                     message_type = "more"
                 elif parsed_query.intent == "feedback":
                     response = await self._handle_feedback(user_id, message)
@@ -128,7 +232,7 @@ class EnhancedBotHandler:
                 self._update_conversation_context(user_id, parsed_query, response)
             
             # Log the interaction
-            processing_time = (datetime.now() - start_time).total_seconds() * 1000
+            processing_time = (time.perf_counter() - start_time) * 1000
             await self._log_enhanced_message(user_id, message_type, message, response, 
                                            parsed_query, processing_time)
             
@@ -139,7 +243,8 @@ class EnhancedBotHandler:
             logger.error(f"Error handling enhanced message from {user_id}: {e}")
             return "Sorry, I encountered an error processing your request. Please try again."
     
-    async def _handle_natural_search(self, user_id: str, parsed_query: ParsedQuery) -> List[str]:
+    async def _handle_natural_search(self, user_id: str, parsed_query: ParsedQuery,
+                                     send_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> List[str]:
         """Handle natural language search requests."""
         # Get excluded songs from session
         session = self.session_manager.get_session(user_id)
@@ -161,9 +266,10 @@ class EnhancedBotHandler:
         self.session_manager.create_or_update_session(user_id, search_result)
         
         # Generate conversational response
-        return await self._generate_conversational_response(search_result, parsed_query, user_id)
+        return await self._generate_conversational_response(search_result, parsed_query, user_id, send_partial)
     
-    async def _handle_more_request(self, user_id: str, parsed_query: ParsedQuery) -> List[str]:
+    async def _handle_more_request(self, user_id: str, parsed_query: ParsedQuery,
+                                   send_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> List[str]:
         """Handle requests for more songs with context awareness."""
         session = self.session_manager.get_session(user_id)
         
@@ -172,7 +278,7 @@ class EnhancedBotHandler:
             if context and context.get('last_themes'):
                 # Use conversation context to recreate search
                 parsed_query.themes = context['last_themes']
-                return await self._handle_natural_search(user_id, parsed_query)
+                return await self._handle_natural_search(user_id, parsed_query, send_partial)
             else:
                 return ["I don't have a previous search to build on. Try something like 'find songs on worship'."]
         
@@ -197,8 +303,6 @@ class EnhancedBotHandler:
     
     async def _handle_feedback(self, user_id: str, message: str) -> str:
         """Handle feedback with enhanced context awareness and familiarity score updates."""
-        import re
-        
         session = self.session_manager.get_session(user_id)
         if not session or not session.last_search:
             return "I need to search for songs first before I can record feedback."
@@ -217,15 +321,9 @@ class EnhancedBotHandler:
             return "Please use 👍 or 👎 to give feedback on songs."
         
         # Handle natural feedback like "the second one" or "song 2"
-        patterns = [
-            r'[👍👎]\s*(\d+)',  # "👍 2" or "👎 2"
-            r'(?:the\s+)?(?:second|2nd|third|3rd|first|1st)\s+(?:one|song)',  # "the second one"
-            r'(?:song|number)\s*(\d+)',  # "song 2"
-        ]
-        
         position = None
-        for pattern in patterns:
-            match = re.search(pattern, message_clean)
+        for pattern in FEEDBACK_POSITION_PATTERNS:
+            match = pattern.search(message_clean)
             if match:
                 if 'second' in message_clean or '2nd' in message_clean:
                     position = 2
@@ -240,13 +338,15 @@ class EnhancedBotHandler:
         if not position:
             return f"Please specify which song you {feedback_type.replace('_', ' ')}d (e.g., '👍 2' or '👎 1')."
         
-        # Validate position
-        num_songs = len(session.last_search.songs) if session.last_search else 0
+        # Validate position (last_search is known to be set by the session check above)
+        songs = session.last_search.songs
+        num_songs = len(songs)
         if position < 1 or position > num_songs:
             return f"Please choose a number between 1 and {num_songs}."
         
         # Get song details
-        song_title = session.last_search.songs[position - 1].title
+        song = songs[position - 1]
+        song_title = song.title
         
         # Create feedback event
         feedback_event = FeedbackEvent(
@@ -254,7 +354,8 @@ class EnhancedBotHandler:
             song_position=position,
             feedback_type=feedback_type,
             timestamp=datetime.now(),
-            song_title=song_title
+            song_title=song_title,
+            song_id=song.song_id
         )
         
         # Log feedback and update familiarity score
@@ -323,17 +424,11 @@ class EnhancedBotHandler:
     
     def _is_direct_feedback(self, message: str) -> bool:
         """Check if message is direct feedback (emoji or explicit)."""
-        message_cleaned = message.strip().lower()
-        return (message_cleaned.startswith('👍') or 
-                message_cleaned.startswith('👎') or
-                message_cleaned == '👍' or
-                message_cleaned == '👎' or
-                'thumbs up' in message_cleaned or
-                'thumbs down' in message_cleaned or
-                'perfect' in message_cleaned or
-                'loved' in message_cleaned or
-                'didn\'t like' in message_cleaned or
-                'not good' in message_cleaned)
+        message_cleaned = message.strip()
+        if message_cleaned.startswith(('👍', '👎')):
+            return True
+        message_cleaned = message_cleaned.lower()
+        return any(phrase in message_cleaned for phrase in DIRECT_FEEDBACK_PHRASES)
     
     def _is_greeting(self, message: str) -> bool:
         """Check if message is a greeting."""
@@ -432,6 +527,7 @@ What kind of songs are you looking for today?"""
             # Use a very short query to minimize parsing time but ensure model loads
             warm_up_query = "worship"
             parsed_result = await self.query_parser.parse(warm_up_query)
+            await self.conversational_responder.warmup()
             
             warm_up_time = (datetime.now() - start_time).total_seconds() * 1000
             logger.info(f"✅ Ollama model warmed up in {warm_up_time:.0f}ms - ready for fast responses!")
@@ -486,16 +582,25 @@ What kind of songs are you looking for today?"""
         
         return responses
     
-    async def _generate_conversational_response(self, search_result, parsed_query: ParsedQuery, user_id: str) -> List[str]:
+    async def _generate_conversational_response(self, search_result, parsed_query: ParsedQuery, user_id: str,
+                                                send_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> List[str]:
         """Generate natural conversational response using LLM."""
         try:
             # Get conversation context
             context = self.conversation_context.get_context(user_id)
             
             # Generate conversational response
-            response_data = await self.conversational_responder.generate_search_response(
-                search_result, parsed_query, context
-            )
+            if send_partial is None:
+                response_data = await self.conversational_responder.generate_search_response(
+                    search_result, parsed_query, context
+                )
+            else:
+                # Stream it, so the intro goes out while the LLM is still writing the rest
+                async for response_data in self.conversational_responder.stream_search_response(
+                    search_result, parsed_query, context
+                ):
+                    if response_data.get("partial"):
+                        await send_partial(response_data["intro_message"])
             
             # Convert to message list format
             messages = []
@@ -594,121 +699,218 @@ What kind of songs are you looking for today?"""
                                    processing_time: float) -> None:
         """Log enhanced message with LLM parsing metadata."""
         try:
-            with get_db_session() as session:
-                message_repo = MessageLogRepository(session)
-                
-                # Prepare metadata (handle None parsed_query for greetings)
-                if parsed_query:
-                    llm_metadata = {
-                        'themes': parsed_query.themes,
-                        'intent': parsed_query.intent,
-                        'confidence': parsed_query.confidence,
-                        'bpm_range': f"{parsed_query.bpm_min or ''}-{parsed_query.bpm_max or ''}",
-                        'processing_time_ms': processing_time
-                    }
-                else:
-                    # For greetings and commands that bypass LLM parsing
-                    llm_metadata = {
-                        'themes': [],
-                        'intent': message_type,
-                        'confidence': 1.0,
-                        'bpm_range': '',
-                        'processing_time_ms': processing_time
-                    }
-                
-                # Format response content
-                if isinstance(response_content, list):
-                    combined_response = "\n---\n".join(response_content)
-                else:
-                    combined_response = response_content
-                
-                log_data = {
-                    'user_id': user_id,
-                    'message_type': message_type,
-                    'message_content': message_content,
-                    'response_content': combined_response,
-                    'timestamp': datetime.now(),
-                    'session_context': str(llm_metadata)  # Store LLM metadata as JSON string
+            # Prepare metadata (handle None parsed_query for greetings)
+            if parsed_query:
+                llm_metadata = {
+                    'themes': parsed_query.themes,
+                    'intent': parsed_query.intent,
+                    'confidence': parsed_query.confidence,
+                    'bpm_range': f"{parsed_query.bpm_min or ''}-{parsed_query.bpm_max or ''}",
+                    'processing_time_ms': processing_time
                 }
-                message_repo.create(log_data)
-                
+            else:
+                # For greetings and commands that bypass LLM parsing
+                llm_metadata = {
+                    'themes': [],
+                    'intent': message_type,
+                    'confidence': 1.0,
+                    'bpm_range': '',
+                    'processing_time_ms': processing_time
+                }
+            
+            # Multi-message responses are joined by the log writer, off the request path
+            log_data = {
+                'user_id': user_id,
+                'message_type': message_type,
+                'message_content': message_content,
+                'response_content': response_content,
+                'timestamp': datetime.now(),
+                'session_context': str(llm_metadata)  # Store LLM metadata as JSON string
+            }
+            self._enqueue_log("message", log_data)
+            
         except Exception as e:
             logger.error(f"Failed to log enhanced message: {e}")
     
-    async def _log_feedback(self, feedback_event: FeedbackEvent) -> None:
-        """Log feedback event (reuse from original handler)."""
+    def _enqueue_log(self, kind: str, payload: Any) -> None:
+        """Queue a "message" or "feedback" write for the background log writer."""
         try:
-            with get_db_session() as session:
-                feedback_repo = FeedbackRepository(session)
-                song = session.query(Song).filter(Song.title == feedback_event.song_title).first()
-                
-                if song:
-                    feedback_data = {
-                        'timestamp': feedback_event.timestamp,
-                        'user_id': feedback_event.user_id,
-                        'song_id': song.song_id,
-                        'action': feedback_event.feedback_type,
-                        'context_keywords': '[]',
-                        'search_params': '{}'
-                    }
-                    feedback_repo.create(feedback_data)
-                else:
-                    logger.warning(f"Could not find song for feedback: {feedback_event.song_title}")
-                    
-        except Exception as e:
-            logger.error(f"Failed to log feedback: {e}")
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Called outside the event loop (e.g. from a sync test): write it straight away
+            self._write_log_batch([(kind, payload)])
+            return
+        
+        if self._log_writer_task is None or self._log_writer_task.done():
+            if self._log_queue is None:
+                self._log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+            self._log_writer_task = asyncio.create_task(self._run_log_writer())
+        
+        try:
+            self._log_queue.put_nowait((kind, payload))
+        except asyncio.QueueFull:
+            logger.warning(f"Log queue full, dropping {kind} log entry")
+    
+    async def _run_log_writer(self) -> None:
+        """Drain the log queue, writing up to LOG_BATCH_SIZE entries in one transaction per batch.
+        
+        A partial batch is held for up to LOG_FLUSH_INTERVAL_SECONDS so bursts share one commit.
+        A None entry (queued by stop_log_writer) ends the loop once everything before it is written.
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = []
+            received = 0
+            item = await self._log_queue.get()
+            
+            # Sleep in short steps rather than wait_for(get()), which can swallow a cancellation
+            deadline = loop.time() + LOG_FLUSH_INTERVAL_SECONDS
+            while (item is not None and not self._log_writer_stopping
+                   and self._log_queue.qsize() < LOG_BATCH_SIZE - 1):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, LOG_FLUSH_POLL_SECONDS))
+            
+            while True:
+                received += 1
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= LOG_BATCH_SIZE or self._log_queue.empty():
+                    break
+                item = self._log_queue.get_nowait()
+            
+            try:
+                if batch:
+                    # Database calls block, so run them in a worker thread
+                    await asyncio.to_thread(self._write_log_batch, batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} log entries: {e}")
+            finally:
+                for _ in range(received):
+                    self._log_queue.task_done()
+    
+    def _write_log_batch(self, batch: List[tuple]) -> None:
+        """Write a batch of queued message logs and feedback events in one transaction."""
+        with get_db_session() as session:
+            message_logs = [payload for kind, payload in batch if kind == "message"]
+            for log_data in message_logs:
+                if isinstance(log_data['response_content'], list):
+                    log_data['response_content'] = "\n---\n".join(log_data['response_content'])
+            if message_logs:
+                # A single executemany; SQLAlchemy sends it as multi-row INSERT ... VALUES batches
+                session.execute(insert(MessageLog), message_logs)
+            
+            for kind, payload in batch:
+                if kind == "feedback":
+                    # Savepoint per event so one bad feedback row doesn't roll back the whole batch
+                    try:
+                        with session.begin_nested():
+                            self._record_feedback_and_familiarity(session, payload)
+                    except Exception as e:
+                        logger.error(f"Failed to log feedback for {payload.song_title!r} from user {payload.user_id}: {e}")
+    
+    async def flush_logs(self) -> None:
+        """Wait until every queued log entry has been written."""
+        if self._log_queue is not None and self._log_writer_task is not None:
+            await self._log_queue.join()
+    
+    async def stop_log_writer(self) -> None:
+        """Write every queued log entry, then stop the background writer."""
+        if self._log_writer_task is None or self._log_writer_task.done():
+            return
+        # Flag the stop so a partial batch is written now rather than after the flush interval
+        self._log_writer_stopping = True
+        await self._log_queue.put(None)
+        try:
+            await self._log_writer_task
+        finally:
+            self._log_writer_task = None
+            self._log_writer_stopping = False
     
     async def _log_feedback_and_update_familiarity(self, feedback_event: FeedbackEvent) -> None:
         """Log feedback event and update familiarity score by +0.1 for likes, -0.1 for dislikes."""
         try:
-            with get_db_session() as session:
-                feedback_repo = FeedbackRepository(session)
-                usage_repo = SongUsageRepository(session)
-                song = session.query(Song).filter(Song.title == feedback_event.song_title).first()
-                
-                if song:
-                    # Log the feedback event
-                    feedback_data = {
-                        'timestamp': feedback_event.timestamp,
-                        'user_id': feedback_event.user_id,
-                        'song_id': song.song_id,
-                        'action': feedback_event.feedback_type,
-                        'context_keywords': '[]',
-                        'search_params': '{}'
-                    }
-                    feedback_repo.create(feedback_data)
-                    
-                    # Update familiarity score via micro-usage records
-                    # Each 0.1 change requires approximately 0.12 usage score contribution
-                    # (accounting for decay factor in the calculation)
-                    import math
-                    from datetime import timedelta
-                    
-                    if feedback_event.feedback_type == "thumbs_up":
-                        # Add positive micro-usage to increase familiarity by ~0.1
-                        usage_repo.record_usage(
-                            song_id=song.song_id,
-                            service_type='feedback_positive',
-                            notes=f'thumbs_up_feedback_+0.1'
-                        )
-                        logger.info(f"Increased familiarity for '{song.title}' (+0.1 via positive feedback)")
-                    
-                    elif feedback_event.feedback_type == "thumbs_down":
-                        # For negative feedback, we create a usage record with a special negative service type
-                        # The familiarity calculation will need to handle this case
-                        usage_repo.record_usage(
-                            song_id=song.song_id,
-                            service_type='feedback_negative',
-                            notes=f'thumbs_down_feedback_-0.1'
-                        )
-                        logger.info(f"Recorded negative feedback for '{song.title}' (-0.1 penalty)")
-                
-                else:
-                    logger.warning(f"Could not find song for feedback: {feedback_event.song_title}")
-                    
+            self._enqueue_log("feedback", feedback_event)
         except Exception as e:
             logger.error(f"Failed to log feedback and update familiarity: {e}")
     
+    def _record_feedback_and_familiarity(self, session, feedback_event: FeedbackEvent) -> None:
+        """Write a feedback event and its familiarity usage record within the given session."""
+        feedback_repo = FeedbackRepository(session)
+        usage_repo = SongUsageRepository(session)
+        
+        # Database-backed searches carry the song_id; otherwise find the song by title
+        song_id = feedback_event.song_id
+        if song_id is None:
+            song_id = session.query(Song.song_id).filter(Song.title == feedback_event.song_title).limit(1).scalar()
+        
+        if song_id is not None:
+            # Log the feedback event
+            feedback_data = {
+                'timestamp': feedback_event.timestamp,
+                'user_id': feedback_event.user_id,
+                'song_id': song_id,
+                'action': feedback_event.feedback_type,
+                'context_keywords': '[]',
+                'search_params': '{}'
+            }
+            feedback_repo.create(feedback_data)
+        
+            # Update familiarity score via micro-usage records
+            # Each 0.1 change requires approximately 0.12 usage score contribution
+            # (accounting for decay factor in the calculation)
+        
+            if feedback_event.feedback_type == "thumbs_up":
+                # Add positive micro-usage to increase familiarity by ~0.1
+                usage_repo.record_usage(
+                    song_id=song_id,
+                    service_type='feedback_positive',
+                    notes=f'thumbs_up_feedback_+0.1'
+                )
+                logger.info(f"Increased familiarity for '{feedback_event.song_title}' (+0.1 via positive feedback)")
+        
+            elif feedback_event.feedback_type == "thumbs_down":
+                # For negative feedback, we create a usage record with a special negative service type
+                # The familiarity calculation will need to handle this case
+                usage_repo.record_usage(
+                    song_id=song_id,
+                    service_type='feedback_negative',
+                    notes=f'thumbs_down_feedback_-0.1'
+                )
+                logger.info(f"Recorded negative feedback for '{feedback_event.song_title}' (-0.1 penalty)")
+        
+        else:
+            logger.warning(f"Could not find song for feedback: {feedback_event.song_title}")
+    
+    async def _get_http(self) -> aiohttp.ClientSession:
+        """Shared HTTP session for Telegram calls, created on first use so sockets and TLS sessions are reused."""
+        if self._http is None or self._http.closed:
+            connector = aiohttp.TCPConnector(
+                ssl=get_telegram_ssl_context(),
+                limit=100,
+                limit_per_host=30,
+                keepalive_timeout=75,
+                ttl_dns_cache=300
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=None,
+                connect=TELEGRAM_CONNECT_TIMEOUT_SECONDS,
+                sock_read=TELEGRAM_READ_TIMEOUT_SECONDS
+            )
+            self._http = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._http
+    
+    async def close(self) -> None:
+        """Close the shared HTTP sessions."""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+        await self.conversational_responder.aclose()
+    
     async def start_polling(self, telegram_token: str) -> None:
         """Start Telegram long polling to receive and handle messages."""
         api_url = f"https://api.telegram.org/bot{telegram_token}"
@@ -716,85 +918,147 @@ What kind of songs are you looking for today?"""
         
         logger.info("Starting Telegram long polling with enhanced bot handler...")
         
-        # Create SSL context - disable verification for development/corporate networks
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+        session = await self._get_http()
         
-        # Create connector with SSL handling
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        
-        async with aiohttp.ClientSession(connector=connector) as session:
-            while not self.shutdown_requested:
-                try:
-                    # Get updates using long polling
-                    async with session.get(
-                        f"{api_url}/getUpdates",
-                        params={"offset": offset, "timeout": 30}
-                    ) as response:
-                        if response.status != 200:
-                            logger.error(f"Failed to get updates: {response.status}")
-                            await asyncio.sleep(5)
-                            continue
-                        
-                        data = await response.json()
-                        
-                        if not data.get("ok"):
-                            logger.error(f"Telegram API error: {data}")
-                            await asyncio.sleep(5)
-                            continue
-                        
-                        updates = data.get("result", [])
+        update_queues = [asyncio.Queue(maxsize=UPDATE_QUEUE_MAXSIZE) for _ in range(UPDATE_WORKERS)]
+        send_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        workers = [
+            asyncio.create_task(self._run_update_worker(queue, api_url, send_semaphore))
+            for queue in update_queues
+        ]
+        
+        while not self.shutdown_requested:
+            try:
+                # Get updates using long polling
+                async with session.get(
+                    f"{api_url}/getUpdates",
+                    params={**GET_UPDATES_PARAMS, "offset": offset}
+                ) as response:
+                    if response.status != 200:
+                        logger.error(f"Failed to get updates: {response.status}")
+                        await asyncio.sleep(5)
+                        continue
+                    
+                    data = await response.json(loads=json_loads)
+                    
+                    if not data.get("ok"):
+                        logger.error(f"Telegram API error: {data}")
+                        await asyncio.sleep(5)
+                        continue
+                    
+                    updates = data.get("result", [])
+                    
+                    for update in updates:
+                        offset = max(offset, update["update_id"] + 1)
                         
-                        for update in updates:
-                            offset = max(offset, update["update_id"] + 1)
-                            
-                            # Process message updates
-                            if "message" in update and "text" in update["message"]:
-                                message = update["message"]
-                                user_id = str(message["from"]["id"])
-                                chat_id = message["chat"]["id"]
-                                text = message["text"]
-                                
-                                logger.info(f"Received message from {user_id}: {text}")
-                                
-                                # Handle the message with enhanced processing
-                                response = await self.handle_message(user_id, text)
-                                
-                                # Send response(s) back to user
-                                if isinstance(response, list):
-                                    # Send individual messages for search results
-                                    for message_text in response:
-                                        await self._send_message(session, api_url, chat_id, message_text)
-                                else:
-                                    # Send single message for other responses
-                                    await self._send_message(session, api_url, chat_id, response)
-                
-                except asyncio.CancelledError:
-                    logger.info("Enhanced polling cancelled")
-                    self.shutdown_requested = True
-                    break
-                except Exception as e:
-                    logger.error(f"Error in enhanced polling loop: {e}")
-                    await asyncio.sleep(5)
+                        # Queue message updates for the worker that owns the chat
+                        if "message" in update and "text" in update["message"]:
+                            chat_id = update["message"]["chat"]["id"]
+                            try:
+                                update_queues[chat_id % UPDATE_WORKERS].put_nowait(update["message"])
+                            except asyncio.QueueFull:
+                                logger.warning(f"Update queue full, dropping message for chat {chat_id}")
             
-            logger.info("Enhanced bot handler polling stopped gracefully")
+            except asyncio.CancelledError:
+                logger.info("Enhanced polling cancelled")
+                self.shutdown_requested = True
+                break
+            except Exception as e:
+                logger.error(f"Error in enhanced polling loop: {e}")
+                await asyncio.sleep(5)
+        
+        # Let workers finish messages already accepted before stopping them
+        for queue in update_queues:
+            await queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+        await self.stop_log_writer()
+        await self.close()
+        logger.info("Enhanced bot handler polling stopped gracefully")
+    
+    async def _run_update_worker(self, queue: asyncio.Queue, api_url: str, send_semaphore: asyncio.Semaphore) -> None:
+        """Handle queued Telegram messages one at a time and send the responses."""
+        while True:
+            message = await queue.get()
+            try:
+                user_id = str(message["from"]["id"])
+                chat_id = message["chat"]["id"]
+                text = message["text"]
+                
+                logger.info(f"Received message from {user_id}: {text}")
+                
+                sent = []
+                
+                async def send_early(message_text: str) -> None:
+                    async with send_semaphore:
+                        await self._send_message(api_url, chat_id, message_text)
+                    sent.append(message_text)
+                
+                # Handle the message with enhanced processing
+                response = await self.handle_message(user_id, text, send_early)
+                
+                # Send response(s) back to user
+                async with send_semaphore:
+                    if isinstance(response, list):
+                        # Skip whatever already went out while the response was streaming
+                        if response[:len(sent)] == sent:
+                            response = response[len(sent):]
+                        # Send individual messages for search results, one after another: concurrent
+                        # sends can arrive out of order, and "👍 2"-style feedback relies on positions
+                        for message_text in response:
+                            await self._send_message(api_url, chat_id, message_text)
+                    else:
+                        # Send single message for other responses
+                        await self._send_message(api_url, chat_id, response)
+            except Exception as e:
+                logger.error(f"Error processing update: {e}")
+            finally:
+                queue.task_done()
     
-    async def _send_message(self, session: aiohttp.ClientSession, api_url: str, chat_id: int, text: str) -> None:
-        """Send a message via Telegram API."""
+    def _get_chat_send_bucket(self, chat_id: int) -> TokenBucket:
+        """Get the send bucket for a chat, evicting the least recently used one past the limit."""
+        bucket = self._chat_send_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(CHAT_SEND_RATE, CHAT_SEND_BURST)
+            self._chat_send_buckets[chat_id] = bucket
+            while len(self._chat_send_buckets) > MAX_CHAT_SEND_BUCKETS:
+                self._chat_send_buckets.popitem(last=False)
+        else:
+            self._chat_send_buckets.move_to_end(chat_id)
+        return bucket
+    
+    async def _send_message(self, api_url: str, chat_id: int, text: str) -> None:
+        """Send a message via Telegram API, within the send rate limits and retrying on 429."""
         try:
-            async with session.post(
-                f"{api_url}/sendMessage",
-                json={
-                    "chat_id": chat_id, 
-                    "text": text,
-                    "link_preview_options": {"is_disabled": True}
-                }
-            ) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to send message: {response.status}")
-                else:
-                    logger.info("Enhanced message sent successfully")
+            session = await self._get_http()
+            for attempt in range(SEND_MAX_RETRIES + 1):
+                await self._get_chat_send_bucket(chat_id).acquire()
+                await self._global_send_bucket.acquire()
+                
+                async with session.post(
+                    f"{api_url}/sendMessage",
+                    json={
+                        "chat_id": chat_id, 
+                        "text": text,
+                        "link_preview_options": {"is_disabled": True}
+                    }
+                ) as response:
+                    if response.status == 429 and attempt < SEND_MAX_RETRIES:
+                        # Telegram says how long to wait; otherwise back off exponentially
+                        data = await response.json(content_type=None)
+                        retry_after = data.get("parameters", {}).get("retry_after", 2 ** attempt)
+                        retry_after = min(retry_after, SEND_MAX_BACKOFF_SECONDS)
+                        logger.warning(f"Rate limited by Telegram, retrying in {retry_after}s")
+                        await asyncio.sleep(retry_after)
+                        continue
+                    
+                    if response.status != 200:
+                        logger.error(f"Failed to send message: {response.status}")
+                    else:
+                        logger.info("Enhanced message sent successfully")
+                    return
         except Exception as e:
             logger.error(f"Error sending enhanced message: {e}")
 
@@ -0,0 +1,29 @@
+"""JSON encoding helpers that use orjson when it is installed."""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib codec
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        """Encode obj as compact JSON text."""
+        return orjson.dumps(obj).decode()
+
+    def json_dumps_indented(obj) -> bytes:
+        """Encode obj as UTF-8 JSON indented by two spaces."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+else:
+    json_loads = json.loads
+
+    def json_dumps(obj) -> str:
+        """Encode obj as compact JSON text, matching orjson's output."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    def json_dumps_indented(obj) -> bytes:
+        """Encode obj as UTF-8 JSON indented by two spaces."""
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
@@ -11,6 +11,36 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+def extract_json_object(text: str) -> str:
+    """Get the first balanced {...} object from LLM output, ignoring code fences and any
+    commentary around it. Returns the text unchanged if it holds no complete object."""
+    start = text.find("{")
+    if start < 0:
+        return text
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text
+
+
 @dataclass
 class ParsedQuery:
     """Structured representation of a parsed user query."""
@@ -182,11 +212,8 @@ PARSING RULES:
                     response_data = await response.json()
                     response_text = response_data.get("response", "").strip()
             
-            # Handle potential markdown formatting
-            if response_text.startswith("```json"):
-                response_text = response_text.replace("```json", "").replace("```", "").strip()
-            
-            parsed_data = json.loads(response_text)
+            # Skip markdown fences and any commentary around the JSON
+            parsed_data = json.loads(extract_json_object(response_text))
             
             # Create ParsedQuery object
             parsed_query = ParsedQuery(
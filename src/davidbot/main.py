@@ -7,9 +7,8 @@ import logging
 import aiohttp
 from dotenv import load_dotenv
 
-from .bot_handler import BotHandler
 from .enhanced_bot_handler import create_enhanced_bot_handler
-from .sheets_client import SheetsClient
+from .database import init_database
 
 # Load environment variables
 load_dotenv()
@@ -51,20 +50,21 @@ async def main():
         logger.error("Please set your bot token in the .env file")
         return
     
+    # Create any missing tables/indexes and bring the lyrics search index up to date
+    init_database()
+    
     # Check for Ollama service availability for enhanced features
     ollama_url = os.getenv('OLLAMA_URL', 'http://127.0.0.1:11434')
     use_enhanced_handler = await _check_ollama_availability(ollama_url)
+    warm_up_task = None
     
     if use_enhanced_handler:
         logger.info(f"Ollama service available at {ollama_url} - using enhanced bot handler with natural language processing")
         bot_handler = create_enhanced_bot_handler(ollama_url, use_mock_llm=False)
         
-        # Pre-warm Ollama model at startup for best performance
-        logger.info("Pre-warming Ollama model for optimal response times...")
-        try:
-            await bot_handler._warm_up_ollama()
-        except Exception as e:
-            logger.debug(f"Startup warm-up failed (non-critical): {e}")
+        # Pre-warm Ollama models in the background so polling starts right away
+        logger.info("Pre-warming Ollama models for optimal response times...")
+        warm_up_task = asyncio.create_task(bot_handler._warm_up_ollama())
     else:
         logger.info(f"Ollama service not available at {ollama_url} - using enhanced handler with mock LLM")
         bot_handler = create_enhanced_bot_handler(ollama_url, use_mock_llm=True)
@@ -89,6 +89,10 @@ async def main():
     except Exception as e:
         logger.error(f"Error in main loop: {e}")
     finally:
+        # Don't leave a slow model warm-up running past shutdown
+        if warm_up_task is not None and not warm_up_task.done():
+            warm_up_task.cancel()
+            await asyncio.gather(warm_up_task, return_exceptions=True)
         logger.info("DavidBot shutting down gracefully")
 
 
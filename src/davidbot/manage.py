@@ -4,6 +4,7 @@
 import os
 import sys
 import json
+import logging
 import argparse
 from datetime import datetime
 from pathlib import Path
@@ -13,7 +14,7 @@ from typing import List, Dict, Any
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from davidbot.database import (
-    init_database, reset_database, backup_database, get_database_info,
+    init_database, reset_database, backup_database, get_database_info, backfill_theme_mappings,
     get_db_session, Song, Lyrics, SongUsage, ThemeMapping,
     SongRepository, LyricsRepository, SongUsageRepository, ThemeMappingRepository
 )
@@ -146,10 +147,9 @@ def export_songs_command(json_file: str):
         song_repo = SongRepository(session)
         lyrics_repo = LyricsRepository(session)
         
-        songs = song_repo.get_all_active()
         export_data = []
         
-        for song in songs:
+        for song in song_repo.iter_all_active():
             lyrics = lyrics_repo.get_by_song_id(song.song_id)
             
             song_data = {
@@ -258,6 +258,13 @@ def update_lyrics_command(title: str, first_line: str = None, chorus: str = None
             print(f"Created lyrics record for: {song.title}")
 
 
+def backfill_themes_command():
+    """Create theme mappings from the JSON tags of songs that have none."""
+    print("Backfilling theme mappings from song tags...")
+    created = backfill_theme_mappings()
+    print(f"Created {created} theme mappings.")
+
+
 def list_themes_command():
     """List all themes in the database."""
     with get_db_session() as session:
@@ -362,43 +369,22 @@ def usage_stats_command():
         usage_repo = SongUsageRepository(session)
         
         # Recent usage (last 90 days)
-        recent_usage = usage_repo.get_recent_usage(days=90)
+        stats = usage_repo.get_recent_usage_stats(days=90)
         
         print(f"Usage Statistics (Last 90 days)")
         print("=" * 40)
-        print(f"Total song uses: {len(recent_usage)}")
-        
-        if recent_usage:
-            # Group by service type
-            service_types = {}
-            for usage in recent_usage:
-                service_type = usage.service_type
-                if service_type not in service_types:
-                    service_types[service_type] = 0
-                service_types[service_type] += 1
-            
+        print(f"Total song uses: {stats['total']}")
+        
+        if stats['total']:
             print("\nBy service type:")
-            for service_type, count in sorted(service_types.items()):
+            for service_type, count in sorted(stats['by_service_type'].items()):
                 print(f"  • {service_type}: {count} uses")
             
-            # Most used songs
-            song_counts = {}
-            for usage in recent_usage:
-                song_id = usage.song_id
-                if song_id not in song_counts:
-                    song_counts[song_id] = []
-                song_counts[song_id].append(usage)
-            
-            if song_counts:
+            if stats['top_songs']:
                 print(f"\nTop songs (last 90 days):")
                 
-                # Sort by usage count
-                sorted_songs = sorted(song_counts.items(), key=lambda x: len(x[1]), reverse=True)
-                
-                for i, (song_id, usages) in enumerate(sorted_songs[:10], 1):
-                    song = session.query(Song).filter(Song.song_id == song_id).first()
-                    if song:
-                        print(f"  {i:2d}. {song.title} - {song.artist} ({len(usages)} times)")
+                for i, (song, count) in enumerate(stats['top_songs'], 1):
+                    print(f"  {i:2d}. {song.title} - {song.artist} ({count} times)")
 
 
 def set_baseline_familiarity_command():
@@ -409,7 +395,10 @@ def set_baseline_familiarity_command():
         print("Setting baseline familiarity scores for popular worship songs...")
         print("This will create historical usage records to establish familiarity.\n")
         
-        usage_repo.set_popular_songs_baseline()
+        # Show the repository's per-song progress messages
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        updated_count = usage_repo.set_popular_songs_baseline()
+        print(f"\n🎵 Updated baseline familiarity for {updated_count} songs")
 
 
 def set_song_baseline_command(title: str, score: float):
@@ -482,6 +471,7 @@ def main():
     
     # Theme commands
     subparsers.add_parser('themes', help='List all themes')
+    subparsers.add_parser('backfill-themes', help='Create theme mappings from tags for unmapped songs')
     
     # Usage tracking commands
     usage_parser = subparsers.add_parser('record-usage', help='Record song usage at service')
@@ -531,6 +521,8 @@ def main():
                                 getattr(args, 'bridge', None))
         elif args.command == 'themes':
             list_themes_command()
+        elif args.command == 'backfill-themes':
+            backfill_themes_command()
         elif args.command == 'record-usage':
             record_usage_command(args.title, 
                                 getattr(args, 'service_type', 'worship'),
@@ -15,6 +15,7 @@ class Song:
     tags: List[str]
     url: str
     search_terms: List[str]  # Terms this song matches
+    song_id: Optional[int] = None  # Database id, when the song came from the database
 
 
 @dataclass
@@ -42,6 +43,7 @@ class FeedbackEvent:
     feedback_type: str  # "thumbs_up"
     timestamp: datetime
     song_title: Optional[str] = None
+    song_id: Optional[int] = None
     
     
 @dataclass
@@ -1,8 +1,90 @@
 """Response formatter for PRD format compliance."""
 
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from .models import Song, SearchResult
-from .database import get_db_session, LyricsRepository
+from .database import get_db_session, Lyrics, Song as DBSong
+
+# Tag selections kept per (song tags, search term); a search's songs recur across "more" pages and users
+TAG_SELECTION_CACHE_SIZE = 4096
+
+# Semantic relationships for common worship terms
+SEMANTIC_TAG_GROUPS = {
+    'joy': ('celebration', 'rejoice', 'gladness', 'happiness'),
+    'worship': ('praise', 'adoration', 'exaltation', 'glory'),
+    'love': ('devotion', 'heart', 'affection', 'beloved'),
+    'faith': ('trust', 'belief', 'confidence', 'assurance'),
+    'holy': ('sacred', 'pure', 'sanctified', 'consecrated'),
+    'spirit': ('presence', 'power', 'wind', 'fire'),
+    'jesus': ('christ', 'savior', 'lord', 'messiah'),
+    'peace': ('rest', 'calm', 'quiet', 'stillness'),
+    'hope': ('expectation', 'future', 'promise', 'anchor'),
+    'freedom': ('liberation', 'release', 'deliverance', 'breakthrough')
+}
+
+# Common worship tags preferred when filling out a short selection
+PRIORITY_TAGS = ('worship', 'praise', 'faith', 'love', 'holy spirit', 'jesus', 'god', 'lord')
+
+
+@lru_cache(maxsize=TAG_SELECTION_CACHE_SIZE)
+def _select_relevant_tags(tags: Tuple[str, ...], search_term: str) -> Tuple[str, ...]:
+    """Select 3-5 of a song's tags, most relevant to the search term first."""
+    # Convert search term to lowercase for matching
+    search_lower = search_term.lower() if search_term else ""
+    search_words = search_lower.split()
+    
+    # Priority system for tag selection
+    exact_matches = []
+    partial_matches = []
+    semantic_matches = []
+    other_tags = []
+    
+    for tag in tags:
+        tag_lower = tag.lower()
+        
+        # Exact match with search term
+        if search_lower in tag_lower or tag_lower in search_lower:
+            exact_matches.append(tag)
+        # Partial word match
+        elif any(word in tag_lower for word in search_words):
+            partial_matches.append(tag)
+        # Semantic match - check if search term maps to this tag
+        elif tag_lower in SEMANTIC_TAG_GROUPS.get(search_lower, ()):
+            semantic_matches.append(tag)
+        # Reverse semantic match - check if tag maps to search term
+        elif search_lower in SEMANTIC_TAG_GROUPS.get(tag_lower, ()):
+            semantic_matches.append(tag)
+        else:
+            other_tags.append(tag)
+    
+    # Build final tag list (3-5 tags)
+    selected = []
+    
+    # Add exact matches first (up to 2)
+    selected.extend(exact_matches[:2])
+    
+    # Add partial matches (up to 2 more)
+    remaining = 5 - len(selected)
+    selected.extend(partial_matches[:min(2, remaining)])
+    
+    # Add semantic matches (up to remaining slots)
+    remaining = 5 - len(selected)
+    selected.extend(semantic_matches[:remaining])
+    
+    # Fill with other high-quality tags if still under 3, preferring common worship tags
+    while len(selected) < 3 and other_tags:
+        priority_found = [tag for tag in other_tags if any(priority in tag.lower() for priority in PRIORITY_TAGS)]
+        
+        if priority_found:
+            selected.append(priority_found[0])
+            other_tags.remove(priority_found[0])
+        else:
+            selected.append(other_tags[0])
+            other_tags.pop(0)
+    
+    # Ensure we have at least 3 tags if available, max 5
+    final_count = min(max(len(selected), 3), 5)
+    return tuple(selected[:final_count] if selected else tags[:3])
 
 
 class ResponseFormatter:
@@ -16,9 +98,10 @@ class ResponseFormatter:
         if not search_result or not search_result.songs:
             return "No songs found for your search."
         
+        lyrics_sections = self._load_lyrics_sections(search_result.songs)
         formatted_lines = []
         for song in search_result.songs:
-            line = self._format_song_line(song, search_result.matched_term)
+            line = self._format_song_line(song, search_result.matched_term, lyrics_sections)
             formatted_lines.append(line)
         
         return '\n'.join(formatted_lines)
@@ -31,22 +114,27 @@ class ResponseFormatter:
         if not search_result or not search_result.songs:
             return ["No songs found for your search."]
         
+        lyrics_sections = self._load_lyrics_sections(search_result.songs)
         individual_messages = []
         for song in search_result.songs:
-            message = self._format_song_line(song, search_result.matched_term)
+            message = self._format_song_line(song, search_result.matched_term, lyrics_sections)
             individual_messages.append(message)
         
         return individual_messages
     
-    def _format_song_line(self, song: Song, matched_term: str) -> str:
+    def _format_song_line(self, song: Song, matched_term: str,
+                          lyrics_sections: Optional[Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]]] = None) -> str:
         """Format a single song line in clean, readable format."""
         # Select 3-5 most relevant tags based on the search term
         relevant_tags = self._select_relevant_tags(song.tags, matched_term)
         tags_str = ', '.join(relevant_tags)
         
         # Get chorus and bridge snippets
-        chorus_snippet = self._get_lyrics_snippet(song.title, song.artist, 'chorus')
-        bridge_snippet = self._get_lyrics_snippet(song.title, song.artist, 'bridge')
+        if lyrics_sections is None:
+            lyrics_sections = self._load_lyrics_sections([song])
+        chorus, bridge = lyrics_sections.get((song.title, song.artist), (None, None))
+        chorus_snippet = self._lyrics_snippet(chorus)
+        bridge_snippet = self._lyrics_snippet(bridge)
         
         # Build the response
         lines = [
@@ -64,121 +152,35 @@ class ResponseFormatter:
             
         return '\n'.join(lines)
     
-    def _get_lyrics_snippet(self, title: str, artist: str, section: str) -> Optional[str]:
-        """Get first 4-6 words of chorus or bridge for a song."""
+    def _load_lyrics_sections(self, songs: List[Song]) -> Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]]:
+        """Get (chorus, bridge) for each (title, artist) in one query instead of one per song and section."""
         try:
             with get_db_session() as session:
-                lyrics_repo = LyricsRepository(session)
-                
-                # Find the song to get its ID
-                from .database import Song as DBSong
-                db_song = session.query(DBSong).filter(
-                    DBSong.title == title,
-                    DBSong.artist == artist
-                ).first()
-                
-                if not db_song:
-                    return None
-                
-                # Get lyrics
-                lyrics = lyrics_repo.get_by_song_id(db_song.song_id)
-                if not lyrics:
-                    return None
-                
-                # Extract the requested section (chorus or bridge)
-                if section == 'chorus':
-                    section_text = lyrics.chorus
-                elif section == 'bridge':
-                    section_text = lyrics.bridge
-                else:
-                    return None
-                
-                if not section_text:
-                    return None
-                
-                # Get first 4-6 words
-                words = section_text.split()[:6]
-                return ' '.join(words)
-                
+                rows = session.query(
+                    DBSong.title, DBSong.artist, Lyrics.chorus, Lyrics.bridge
+                ).join(Lyrics, Lyrics.song_id == DBSong.song_id).filter(
+                    DBSong.title.in_({song.title for song in songs})
+                ).all()
         except Exception:
+            return {}
+        
+        sections = {}
+        for title, artist, chorus, bridge in rows:
+            sections.setdefault((title, artist), (chorus, bridge))
+        return sections
+    
+    @staticmethod
+    def _lyrics_snippet(section_text: Optional[str]) -> Optional[str]:
+        """Get first 4-6 words of a chorus or bridge."""
+        if not section_text:
             return None
+        return ' '.join(section_text.split()[:6])
     
     def _select_relevant_tags(self, tags: List[str], search_term: str) -> List[str]:
         """Select 3-5 most relevant tags based on search query."""
         if not tags:
             return []
-        
-        # Convert search term to lowercase for matching
-        search_lower = search_term.lower() if search_term else ""
-        
-        # Priority system for tag selection
-        exact_matches = []
-        partial_matches = []
-        semantic_matches = []
-        other_tags = []
-        
-        # Define semantic relationships for common worship terms
-        semantic_groups = {
-            'joy': ['celebration', 'rejoice', 'gladness', 'happiness'],
-            'worship': ['praise', 'adoration', 'exaltation', 'glory'],
-            'love': ['devotion', 'heart', 'affection', 'beloved'],
-            'faith': ['trust', 'belief', 'confidence', 'assurance'],
-            'holy': ['sacred', 'pure', 'sanctified', 'consecrated'],
-            'spirit': ['presence', 'power', 'wind', 'fire'],
-            'jesus': ['christ', 'savior', 'lord', 'messiah'],
-            'peace': ['rest', 'calm', 'quiet', 'stillness'],
-            'hope': ['expectation', 'future', 'promise', 'anchor'],
-            'freedom': ['liberation', 'release', 'deliverance', 'breakthrough']
-        }
-        
-        for tag in tags:
-            tag_lower = tag.lower()
-            
-            # Exact match with search term
-            if search_lower in tag_lower or tag_lower in search_lower:
-                exact_matches.append(tag)
-            # Partial word match
-            elif any(word in tag_lower for word in search_lower.split()):
-                partial_matches.append(tag)
-            # Semantic match - check if search term maps to this tag
-            elif search_lower in semantic_groups and tag_lower in semantic_groups[search_lower]:
-                semantic_matches.append(tag)
-            # Reverse semantic match - check if tag maps to search term
-            elif any(search_lower in group and tag_lower == key for key, group in semantic_groups.items()):
-                semantic_matches.append(tag)
-            else:
-                other_tags.append(tag)
-        
-        # Build final tag list (3-5 tags)
-        selected = []
-        
-        # Add exact matches first (up to 2)
-        selected.extend(exact_matches[:2])
-        
-        # Add partial matches (up to 2 more)
-        remaining = 5 - len(selected)
-        selected.extend(partial_matches[:min(2, remaining)])
-        
-        # Add semantic matches (up to remaining slots)
-        remaining = 5 - len(selected)
-        selected.extend(semantic_matches[:remaining])
-        
-        # Fill with other high-quality tags if still under 3
-        while len(selected) < 3 and other_tags:
-            # Prefer common worship tags
-            priority_tags = ['worship', 'praise', 'faith', 'love', 'holy spirit', 'jesus', 'god', 'lord']
-            priority_found = [tag for tag in other_tags if any(priority in tag.lower() for priority in priority_tags)]
-            
-            if priority_found:
-                selected.append(priority_found[0])
-                other_tags.remove(priority_found[0])
-            else:
-                selected.append(other_tags[0])
-                other_tags.pop(0)
-        
-        # Ensure we have at least 3 tags if available, max 5
-        final_count = min(max(len(selected), 3), 5)
-        return selected[:final_count] if selected else tags[:3]
+        return list(_select_relevant_tags(tuple(tags), search_term))
     
     def format_no_previous_search_message(self) -> str:
         """Format message when user requests 'more' without previous search."""
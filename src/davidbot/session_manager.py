@@ -1,17 +1,24 @@
 """Session manager with 60-minute TTL."""
 
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 from .models import UserSession, SearchResult
 
+# Upper bound on sessions held in memory; the least recently active are dropped first
+MAX_SESSIONS = 50000
+
 
 class SessionManager:
     """Manages user sessions with 60-minute TTL."""
     
-    def __init__(self):
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
         """Initialize with empty session store.""" 
-        self.sessions: Dict[str, UserSession] = {}
+        # Kept in least-recently-used order. Expired sessions stay until accessed or pushed
+        # out, so callers can still tell "expired" apart from "never searched".
+        self.sessions: Dict[str, UserSession] = OrderedDict()
         self.session_ttl_minutes = 60
+        self.max_sessions = max_sessions
     
     def get_session(self, user_id: str) -> Optional[UserSession]:
         """Get user session if it exists and hasn't expired."""
@@ -25,6 +32,7 @@ class SessionManager:
             del self.sessions[user_id]
             return None
             
+        self.sessions.move_to_end(user_id)
         return session
     
     def create_or_update_session(self, user_id: str, search_result: Optional[SearchResult] = None) -> UserSession:
@@ -35,6 +43,7 @@ class SessionManager:
             # Update existing session
             session = self.sessions[user_id]
             session.last_activity = now
+            self.sessions.move_to_end(user_id)
             
             if search_result:
                 session.last_search = search_result
@@ -50,6 +59,8 @@ class SessionManager:
                 returned_songs=returned_songs
             )
             self.sessions[user_id] = session
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
             
         return session
     
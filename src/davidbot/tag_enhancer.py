@@ -5,6 +5,7 @@ import asyncio
 import aiohttp
 import logging
 import sqlite3
+from contextlib import closing
 from typing import List, Set, Dict, Optional
 from dataclasses import dataclass
 from pathlib import Path
@@ -102,10 +103,13 @@ class WorshipTagTaxonomy:
 class SongTagEnhancer:
     """Main class for enhancing song tags using web search."""
     
-    def __init__(self, db_path: str = "data/davidbot.db", taxonomy_file: str = "docs/tags.md"):
+    def __init__(self, db_path: str = "data/davidbot.db", taxonomy_file: str = "docs/tags.md",
+                 max_concurrency: int = 5):
         """Initialize tag enhancer."""
         self.db_path = db_path
         self.taxonomy = WorshipTagTaxonomy(taxonomy_file)
+        self.max_concurrency = max_concurrency
+        self._http_session: Optional[aiohttp.ClientSession] = None
         
     async def search_song_info(self, title: str, artist: str) -> Optional[str]:
         """Search for song themes and worship context using web search."""
@@ -113,26 +117,15 @@ class SongTagEnhancer:
             # Create search query for song themes and meaning (not full lyrics)
             search_query = f'"{title}" "{artist}" worship song themes meaning'
             
-            # Use aiohttp to search for thematic content
-            timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                # Search for song information and themes
-                search_url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-                }
-                
-                try:
-                    async with session.get(search_url, headers=headers) as response:
-                        if response.status == 200:
-                            content = await response.text()
-                            # Extract thematic keywords from search results (not lyrics)
-                            theme_content = self._extract_worship_themes(content, title, artist)
-                            if theme_content:
-                                logger.info(f"Found web themes for {title} by {artist}")
-                                return theme_content
-                except Exception as web_error:
-                    logger.warning(f"Web search failed for {title}: {web_error}")
+            # Use aiohttp to search for thematic content, reusing the batch session when one is open
+            if self._http_session is not None:
+                theme_content = await self._search_web_themes(self._http_session, search_query, title, artist)
+            else:
+                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+                    theme_content = await self._search_web_themes(session, search_query, title, artist)
+            
+            if theme_content:
+                return theme_content
             
             # Fallback to title/artist analysis
             search_text = f"{title} {artist}".lower()
@@ -225,6 +218,29 @@ class SongTagEnhancer:
             logger.error(f"Theme analysis failed for {title} by {artist}: {e}")
             return "worship praise adoration devotion faith"
     
+    async def _search_web_themes(self, session: aiohttp.ClientSession, search_query: str,
+                                 title: str, artist: str) -> Optional[str]:
+        """Run the web search for a song and extract worship themes from the results."""
+        # Search for song information and themes
+        search_url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+        }
+        
+        try:
+            async with session.get(search_url, headers=headers) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    # Extract thematic keywords from search results (not lyrics)
+                    theme_content = self._extract_worship_themes(content, title, artist)
+                    if theme_content:
+                        logger.info(f"Found web themes for {title} by {artist}")
+                        return theme_content
+        except Exception as web_error:
+            logger.warning(f"Web search failed for {title}: {web_error}")
+        
+        return None
+    
     def _extract_worship_themes(self, html_content: str, title: str, artist: str) -> Optional[str]:
         """Extract worship themes from search results without reproducing copyrighted content."""
         try:
@@ -368,20 +384,7 @@ class SongTagEnhancer:
                 ORDER BY title
             """)
             
-            songs = []
-            for row in cursor.fetchall():
-                song_id, title, artist, tags_json = row
-                try:
-                    tags = json.loads(tags_json) if tags_json else []
-                except json.JSONDecodeError:
-                    tags = []
-                
-                songs.append({
-                    'song_id': song_id,
-                    'title': title,
-                    'artist': artist,
-                    'tags': tags
-                })
+            songs = [self._row_to_song(row) for row in cursor.fetchall()]
             
             conn.close()
             logger.info(f"Retrieved {len(songs)} songs for tag enhancement")
@@ -391,6 +394,42 @@ class SongTagEnhancer:
             logger.error(f"Failed to get songs from database: {e}")
             return []
     
+    def get_song_by_id(self, song_id: int) -> Optional[Dict]:
+        """Get a single song from database by ID."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT song_id, title, artist, tags 
+                FROM songs 
+                WHERE song_id = ? AND is_active = 1
+            """, (song_id,))
+            
+            row = cursor.fetchone()
+            conn.close()
+            return self._row_to_song(row) if row else None
+            
+        except Exception as e:
+            logger.error(f"Failed to get song {song_id} from database: {e}")
+            return None
+    
+    @staticmethod
+    def _row_to_song(row) -> Dict:
+        """Convert a (song_id, title, artist, tags) row into a song dict."""
+        song_id, title, artist, tags_json = row
+        try:
+            tags = json.loads(tags_json) if tags_json else []
+        except json.JSONDecodeError:
+            tags = []
+        
+        return {
+            'song_id': song_id,
+            'title': title,
+            'artist': artist,
+            'tags': tags
+        }
+    
     def update_song_tags(self, song_id: int, new_tags: List[str]) -> bool:
         """Update song tags in database."""
         try:
@@ -414,6 +453,33 @@ class SongTagEnhancer:
             logger.error(f"Failed to update song tags for {song_id}: {e}")
             return False
     
+    def bulk_update_song_tags(self, updates: List[Dict]) -> int:
+        """Update tags for many songs in one transaction.
+        
+        Each update is a dict with 'song_id' and 'tags'. Returns the number of
+        songs updated (0 if the batch failed and was rolled back).
+        """
+        if not updates:
+            return 0
+        
+        try:
+            # closing() releases the connection even if the batch fails; `conn` commits or rolls back
+            with closing(sqlite3.connect(self.db_path)) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executemany("""
+                    UPDATE songs 
+                    SET tags = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE song_id = ?
+                """, [(json.dumps(u['tags']), u['song_id']) for u in updates])
+            
+            logger.info(f"Updated tags for {len(updates)} songs")
+            return len(updates)
+            
+        except Exception as e:
+            logger.error(f"Failed to bulk update song tags: {e}")
+            return 0
+    
     async def enhance_all_songs(self, dry_run: bool = True) -> List[TagEnhancementResult]:
         """Enhance tags for all songs in the database."""
         logger.info(f"Starting tag enhancement for all songs (dry_run={dry_run})")
@@ -423,27 +489,42 @@ class SongTagEnhancer:
             logger.warning("No songs found for enhancement")
             return []
         
-        results = []
-        for song in songs:
-            logger.info(f"Processing: {song['title']} by {song['artist']}")
-            
-            result = await self.enhance_song(
-                song['song_id'],
-                song['title'], 
-                song['artist'],
-                song['tags']
-            )
-            results.append(result)
-            
-            # Update database if not dry run and enhancement was successful
-            if not dry_run and result.confidence_score > 0.5:
-                if self.update_song_tags(result.song_id, result.suggested_tags):
-                    logger.info(f"✅ Updated {result.title}: {len(result.suggested_tags)} tags")
-                else:
-                    logger.error(f"❌ Failed to update {result.title}")
-            
-            # Small delay to be respectful to search services
-            await asyncio.sleep(0.5)
+        # Overlap search latency across songs, bounded so search services aren't flooded
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def enhance_one(song: Dict) -> TagEnhancementResult:
+            async with semaphore:
+                logger.info(f"Processing: {song['title']} by {song['artist']}")
+                
+                result = await self.enhance_song(
+                    song['song_id'],
+                    song['title'], 
+                    song['artist'],
+                    song['tags']
+                )
+                
+                # Small delay to be respectful to search services
+                await asyncio.sleep(0.5)
+                return result
+        
+        # Share one connection pool across all searches in the batch
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as http_session:
+            self._http_session = http_session
+            try:
+                results = await asyncio.gather(*(enhance_one(song) for song in songs))
+            finally:
+                self._http_session = None
+        
+        # Write all successful enhancements in a single batch if not dry run
+        if not dry_run:
+            updates = [
+                {'song_id': r.song_id, 'tags': r.suggested_tags}
+                for r in results if r.confidence_score > 0.5
+            ]
+            if self.bulk_update_song_tags(updates):
+                logger.info(f"✅ Updated tags for {len(updates)} songs")
+            elif updates:
+                logger.error(f"❌ Failed to update tags for {len(updates)} songs")
         
         return results
 
@@ -0,0 +1,216 @@
+"""Unit tests for conversational responder prompt construction."""
+
+import asyncio
+import json
+import pytest
+from contextlib import asynccontextmanager
+from src.davidbot.conversational_responder import ConversationalResponder, IntroMessageScanner, DEFAULT_MODEL, PROMPT_DELIMITER
+from src.davidbot.llm_query_parser import ParsedQuery
+from src.davidbot.models import Song, SearchResult
+
+
+class TestConversationalResponderPrompts:
+    """Test that prompts stay short and cache-friendly."""
+
+    @pytest.fixture
+    def responder(self):
+        """Create responder without contacting Ollama."""
+        return ConversationalResponder(use_mock=True)
+
+    @pytest.fixture
+    def sample_search_result(self):
+        """Create sample search result for testing."""
+        songs = [
+            Song("Amazing Grace", "John Newton", "D", 84, ["grace", "salvation"],
+                 "https://example.com/amazing-grace", ["grace"]),
+            Song("How Great Thou Art", "Carl Boberg", "G", 90, ["praise", "majesty"],
+                 "https://example.com/how-great", ["worship"])
+        ]
+        return SearchResult(songs=songs, matched_term="grace", theme="grace")
+
+    def test_system_prompt_is_compact_and_stable(self, responder):
+        """System prompt stays well under 200 tokens and is identical across instances."""
+        assert len(responder.system_prompt.split()) < 100
+        assert responder._prompt_prefix == ConversationalResponder(use_mock=True)._prompt_prefix
+        assert responder._prompt_prefix.endswith(PROMPT_DELIMITER)
+
+    def test_search_prompt_lists_songs_once_as_json(self, responder, sample_search_result):
+        """Songs are embedded once, in a valid one-line JSON reply template."""
+        parsed_query = ParsedQuery(themes=["grace"], key_preference="D", raw_query="grace songs in D")
+        prompt = responder._build_search_prompt(sample_search_result, parsed_query)
+
+        template = json.loads(prompt.splitlines()[-1])
+        assert template["formatted_songs"] == responder.response_formatter.format_individual_songs(sample_search_result)
+        assert prompt.count("Amazing Grace") == 1
+
+
+class FakeOllamaSession:
+    """Stands in for the aiohttp session, recording how many generate calls overlap."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+
+    @asynccontextmanager
+    async def post(self, url, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            yield FakeOllamaResponse(self.reply)
+        finally:
+            self.in_flight -= 1
+
+
+class FakeOllamaResponse:
+    """Minimal successful /api/generate response."""
+
+    status = 200
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    async def json(self, loads=json.loads):
+        return {"response": self.reply}
+
+    @property
+    async def content(self):
+        """Stream the reply as newline-delimited chunks of a few characters each."""
+        for i in range(0, len(self.reply), 4):
+            yield (json.dumps({"response": self.reply[i:i + 4], "done": False}) + "\n").encode()
+            await asyncio.sleep(0)
+        yield (json.dumps({"response": "", "done": True}) + "\n").encode()
+
+
+class TestOllamaConcurrency:
+    """Test that every kind of Ollama call counts against the concurrency cap."""
+
+    @pytest.mark.asyncio
+    async def test_feedback_and_search_calls_share_the_cap(self):
+        """Search and feedback generations together never exceed max_concurrency."""
+        responder = ConversationalResponder(max_concurrency=2)
+        responder.model_name = responder.feedback_model_name = "test-model"
+        session = FakeOllamaSession('{"intro_message": "Hi"}')
+        responder._session = session
+
+        results = await asyncio.gather(
+            *(responder._call_ollama_simple("thanks") for _ in range(4)),
+            *(responder._call_ollama("find songs") for _ in range(4))
+        )
+
+        assert session.max_in_flight == 2
+        assert results[0] == '{"intro_message": "Hi"}'
+        assert results[-1] == {"intro_message": "Hi"}
+
+
+class TestIntroMessageScanner:
+    """Test that the intro is found as soon as its string closes, however the text is split."""
+
+    def test_intro_is_returned_once_when_its_string_closes(self):
+        """Keys and values elsewhere in the object, including nested intro_message keys, are ignored."""
+        text = ('{"note": "intro_message", "nested": {"intro_message": "no"}, '
+                '"intro_message": "Songs of \\"grace\\" {for you}:", "formatted_songs": ["a"]}')
+        scanner = IntroMessageScanner()
+        found = []
+        for i, char in enumerate(text):
+            intro = scanner.feed(char)
+            if intro is not None:
+                found.append((i, intro))
+
+        assert found == [(text.index(':",') + 1, 'Songs of "grace" {for you}:')]
+        assert scanner.buffer == text
+
+
+class TestStreamSearchResponse:
+    """Test that streamed search responses surface the intro early without holding an Ollama slot."""
+
+    @pytest.fixture
+    def search_result(self):
+        """Create a one-song search result."""
+        songs = [Song("Amazing Grace", "John Newton", "D", 84, ["grace"], "https://example.com/amazing-grace", ["grace"])]
+        return SearchResult(songs=songs, matched_term="grace", theme="grace")
+
+    @pytest.mark.asyncio
+    async def test_intro_is_yielded_before_the_full_response(self, search_result):
+        """The intro arrives first, with the semaphore free; the complete reply follows and is cached."""
+        reply = {"intro_message": "Here you go:", "formatted_songs": ["Amazing Grace"], "closing_message": "Enjoy"}
+        responder = ConversationalResponder(max_concurrency=1)
+        responder.model_name = "test-model"
+        responder._session = FakeOllamaSession(json.dumps(reply))
+        parsed_query = ParsedQuery(themes=["grace"], raw_query="grace songs")
+
+        items = []
+        async for item in responder.stream_search_response(search_result, parsed_query):
+            assert not responder._ollama_semaphore.locked()
+            items.append(item)
+
+        assert items == [{"intro_message": "Here you go:", "partial": True}, reply]
+        assert await responder.generate_search_response(search_result, parsed_query) == reply
+
+    @pytest.mark.asyncio
+    async def test_unparseable_reply_falls_back_but_keeps_the_sent_intro(self, search_result):
+        """A reply that breaks off after the intro falls back to the mock songs under the same intro."""
+        responder = ConversationalResponder(max_concurrency=1)
+        responder.model_name = "test-model"
+        responder._session = FakeOllamaSession('{"intro_message": "Here you go:", "formatted_songs": [')
+        parsed_query = ParsedQuery(themes=["grace"], raw_query="grace songs")
+
+        items = [item async for item in responder.stream_search_response(search_result, parsed_query)]
+
+        assert items[0] == {"intro_message": "Here you go:", "partial": True}
+        assert items[1]["intro_message"] == "Here you go:"
+        assert items[1]["formatted_songs"] == responder._mock_search_response(search_result, parsed_query)["formatted_songs"]
+        assert not responder._ollama_semaphore.locked()
+
+
+class FlakyTagsSession:
+    """Stands in for the aiohttp session; /api/tags fails until `up` is set."""
+
+    def __init__(self, models):
+        self.models = models
+        self.up = False
+        self.probes = 0
+        self.closed = False
+
+    @asynccontextmanager
+    async def get(self, url, **kwargs):
+        self.probes += 1
+        if not self.up:
+            raise ConnectionError("Ollama is not running")
+        yield FakeTagsResponse(self.models)
+
+
+class FakeTagsResponse:
+    """Minimal successful /api/tags response."""
+
+    status = 200
+
+    def __init__(self, models):
+        self.models = models
+
+    async def json(self, loads=json.loads):
+        return {"models": [{"name": name} for name in self.models]}
+
+
+class TestModelSelection:
+    """Test that a failed model probe isn't remembered."""
+
+    @pytest.mark.asyncio
+    async def test_fallback_model_is_not_kept_when_the_probe_fails(self):
+        """The default is used while Ollama is down; the installed model is picked once it answers."""
+        responder = ConversationalResponder()
+        responder.model_name = responder.feedback_model_name = None
+        session = FlakyTagsSession(["llama3.2:3b"])
+        responder._session = session
+
+        assert await responder._get_best_model() == DEFAULT_MODEL
+        assert await responder._get_feedback_model() == DEFAULT_MODEL
+        assert responder.model_name is None and responder.feedback_model_name is None
+
+        session.up = True
+        assert await responder._get_best_model() == "llama3.2:3b"
+        assert await responder._get_feedback_model() == "llama3.2:3b"
+        assert responder.model_name == responder.feedback_model_name == "llama3.2:3b"
+        assert session.probes == 3
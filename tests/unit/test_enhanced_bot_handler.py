@@ -0,0 +1,243 @@
+"""Unit tests for the enhanced bot handler's send rate limiting and background log writer."""
+
+import asyncio
+import pytest
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.davidbot import enhanced_bot_handler
+from src.davidbot.enhanced_bot_handler import EnhancedBotHandler, TokenBucket
+from src.davidbot.database.models import Base, MessageLog, UserFeedback
+from src.davidbot.models import FeedbackEvent
+
+
+def make_handler():
+    """Create a handler with only the log writer state, skipping the database-backed engines."""
+    handler = EnhancedBotHandler.__new__(EnhancedBotHandler)
+    handler._log_queue = None
+    handler._log_writer_task = None
+    handler._log_writer_stopping = False
+    return handler
+
+
+def message_log(content):
+    """Build a queued message log payload."""
+    return {
+        'user_id': 'user', 'message_type': 'search', 'message_content': content,
+        'response_content': 'reply', 'timestamp': datetime.now(), 'session_context': '{}'
+    }
+
+
+async def wait_until(condition, timeout=2.0):
+    """Poll until condition() holds, failing the test after timeout seconds."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+class TestTokenBucket:
+    """Test burst capacity and refill timing, on a fake clock."""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Replace the monotonic clock with one that only moves when the bucket sleeps."""
+        now = [100.0]
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        monkeypatch.setattr(enhanced_bot_handler.time, "monotonic", lambda: now[0])
+        monkeypatch.setattr(enhanced_bot_handler.asyncio, "sleep", fake_sleep)
+        return now, sleeps
+
+    @pytest.mark.asyncio
+    async def test_burst_is_served_without_waiting(self, clock):
+        """Up to capacity tokens are handed out immediately."""
+        now, sleeps = clock
+        bucket = TokenBucket(rate=1, capacity=5)
+        for _ in range(5):
+            await bucket.acquire()
+        assert sleeps == []
+        assert now[0] == 100.0
+
+    @pytest.mark.asyncio
+    async def test_acquire_after_burst_waits_for_refill(self, clock):
+        """Once empty, each token waits 1/rate seconds."""
+        now, sleeps = clock
+        bucket = TokenBucket(rate=2, capacity=2)
+        for _ in range(4):
+            await bucket.acquire()
+        assert sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
+        assert now[0] == pytest.approx(101.0)
+
+    @pytest.mark.asyncio
+    async def test_idle_time_refills_up_to_capacity(self, clock):
+        """Tokens accrue while idle but never beyond capacity."""
+        now, sleeps = clock
+        bucket = TokenBucket(rate=1, capacity=3)
+        for _ in range(3):
+            await bucket.acquire()
+        now[0] += 60
+        for _ in range(3):
+            await bucket.acquire()
+        assert sleeps == []
+        await bucket.acquire()
+        assert sleeps == [pytest.approx(1.0)]
+
+
+class TestLogWriter:
+    """Test batching, flush timing and shutdown of the background log writer."""
+
+    @pytest.fixture
+    def batches(self, monkeypatch):
+        """Capture written batches instead of touching the database."""
+        written = []
+        monkeypatch.setattr(EnhancedBotHandler, "_write_log_batch", lambda self, batch: written.append(list(batch)))
+        return written
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_written_without_waiting(self, monkeypatch, batches):
+        """Entries are written as soon as a batch fills, well before the flush interval."""
+        monkeypatch.setattr(enhanced_bot_handler, "LOG_BATCH_SIZE", 3)
+        monkeypatch.setattr(enhanced_bot_handler, "LOG_FLUSH_INTERVAL_SECONDS", 30)
+        handler = make_handler()
+        for i in range(6):
+            handler._enqueue_log("message", i)
+
+        await wait_until(lambda: len(batches) == 2)
+        assert batches == [[("message", 0), ("message", 1), ("message", 2)],
+                           [("message", 3), ("message", 4), ("message", 5)]]
+        await handler.stop_log_writer()
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_is_written_after_flush_interval(self, monkeypatch, batches):
+        """A lone entry waits for the flush interval, then is written on its own."""
+        monkeypatch.setattr(enhanced_bot_handler, "LOG_FLUSH_INTERVAL_SECONDS", 0.2)
+        handler = make_handler()
+        handler._enqueue_log("message", "only")
+
+        await asyncio.sleep(0.1)
+        assert batches == []
+        await wait_until(lambda: batches == [[("message", "only")]])
+        await handler.stop_log_writer()
+
+    @pytest.mark.asyncio
+    async def test_stop_writes_pending_entries_promptly(self, monkeypatch, batches):
+        """Stopping flushes a partial batch without sitting out the flush interval, then ends the task."""
+        monkeypatch.setattr(enhanced_bot_handler, "LOG_FLUSH_INTERVAL_SECONDS", 30)
+        handler = make_handler()
+        handler._enqueue_log("message", "a")
+        handler._enqueue_log("feedback", "b")
+        task = handler._log_writer_task
+
+        await asyncio.wait_for(handler.stop_log_writer(), timeout=2)
+        assert batches == [[("message", "a"), ("feedback", "b")]]
+        assert task.done()
+        assert handler._log_writer_task is None
+
+    @pytest.mark.asyncio
+    async def test_writer_keeps_running_after_a_failed_batch(self, monkeypatch):
+        """A batch that raises is logged and skipped; later entries are still written."""
+        monkeypatch.setattr(enhanced_bot_handler, "LOG_FLUSH_INTERVAL_SECONDS", 0)
+        written = []
+
+        def write(self, batch):
+            if batch[0][1] == "bad":
+                raise RuntimeError("database is locked")
+            written.append(batch)
+
+        monkeypatch.setattr(EnhancedBotHandler, "_write_log_batch", write)
+        handler = make_handler()
+        handler._enqueue_log("message", "bad")
+        await handler.flush_logs()
+        handler._enqueue_log("message", "good")
+        await handler.flush_logs()
+        await handler.stop_log_writer()
+        assert written == [[("message", "good")]]
+
+
+class TestWriteLogBatch:
+    """Test that one bad feedback event doesn't undo the rest of its batch."""
+
+    @pytest.fixture
+    def session_factory(self, monkeypatch):
+        """Point the handler's sessions at a fresh in-memory database."""
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(bind=engine)
+
+        @contextmanager
+        def get_db_session():
+            session = factory()
+            try:
+                yield session
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+        monkeypatch.setattr(enhanced_bot_handler, "get_db_session", get_db_session)
+        return factory
+
+    def test_failed_feedback_rolls_back_only_its_own_rows(self, monkeypatch, session_factory):
+        """Rows written by the failing event are discarded; messages and other feedback are committed."""
+        def record(self, session, event):
+            session.add(UserFeedback(timestamp=event.timestamp, user_id=event.user_id,
+                                     song_id=event.song_id, action=event.feedback_type))
+            session.flush()
+            if event.user_id == "bad":
+                raise ValueError("broken feedback")
+
+        monkeypatch.setattr(EnhancedBotHandler, "_record_feedback_and_familiarity", record)
+        now = datetime.now()
+        batch = [
+            ("message", message_log("first")),
+            ("feedback", FeedbackEvent("good-1", 1, "thumbs_up", now, "Song A", 1)),
+            ("feedback", FeedbackEvent("bad", 2, "thumbs_up", now, "Song B", 2)),
+            ("feedback", FeedbackEvent("good-2", 3, "thumbs_down", now, "Song C", 3)),
+            ("message", message_log("second")),
+        ]
+
+        make_handler()._write_log_batch(batch)
+
+        session = session_factory()
+        assert sorted(f.user_id for f in session.query(UserFeedback)) == ["good-1", "good-2"]
+        assert sorted(m.message_content for m in session.query(MessageLog)) == ["first", "second"]
+        session.close()
+
+
+class TestUpdateWorker:
+    """Test that messages streamed out early are not sent a second time."""
+
+    @pytest.mark.asyncio
+    async def test_streamed_intro_is_sent_once_and_first(self, monkeypatch):
+        """The intro goes out while the search is still running; the rest follows in order."""
+        sent = []
+
+        async def send_message(self, api_url, chat_id, text):
+            sent.append((chat_id, text))
+
+        async def handle_message(self, user_id, text, send_partial=None):
+            await send_partial("Here you go:")
+            assert sent == [(7, "Here you go:")]
+            return ["Here you go:", "Amazing Grace", "Enjoy"]
+
+        monkeypatch.setattr(EnhancedBotHandler, "_send_message", send_message)
+        monkeypatch.setattr(EnhancedBotHandler, "handle_message", handle_message)
+        handler = make_handler()
+        queue = asyncio.Queue()
+        worker = asyncio.create_task(handler._run_update_worker(queue, "https://api", asyncio.Semaphore(1)))
+        await queue.put({"from": {"id": 1}, "chat": {"id": 7}, "text": "grace songs"})
+        await queue.join()
+        worker.cancel()
+
+        assert sent == [(7, "Here you go:"), (7, "Amazing Grace"), (7, "Enjoy")]
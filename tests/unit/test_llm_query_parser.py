@@ -0,0 +1,31 @@
+"""Unit tests for LLM output handling in the query parser."""
+
+import json
+from src.davidbot.llm_query_parser import extract_json_object
+
+
+class TestExtractJsonObject:
+    """Test recovering the JSON object from noisy LLM output."""
+
+    def test_plain_object_is_returned_unchanged(self):
+        """A bare JSON object passes through as-is."""
+        text = '{"themes": ["grace"], "intent": "search"}'
+        assert extract_json_object(text) == text
+
+    def test_fences_and_commentary_are_dropped(self):
+        """Markdown fences and trailing commentary around the object are ignored."""
+        text = 'Sure!\n```json\n{"themes": ["grace"], "bpm_min": null}\n```\nHope this helps {:'
+        assert json.loads(extract_json_object(text)) == {"themes": ["grace"], "bpm_min": None}
+
+    def test_braces_and_quotes_inside_strings_are_ignored(self):
+        """Braces and escaped quotes inside string values don't end the object early."""
+        text = '{"intro_message": "Try \\"{this}\\" one }", "nested": {"a": 1}} trailing }'
+        assert json.loads(extract_json_object(text)) == {
+            "intro_message": 'Try "{this}" one }',
+            "nested": {"a": 1}
+        }
+
+    def test_incomplete_object_is_returned_unchanged(self):
+        """Output with no complete object is left for the caller's parse to reject."""
+        text = '{"themes": ["grace"'
+        assert extract_json_object(text) == text
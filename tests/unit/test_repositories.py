@@ -0,0 +1,267 @@
+"""Unit tests for the database repositories' caches and write paths."""
+
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, delete, text, update
+from sqlalchemy.orm import sessionmaker
+
+from src.davidbot.database import database
+from src.davidbot.database.database import (
+    MESSAGE_TYPE_DAILY_DDL, MESSAGE_TYPE_DAILY_FILL, SONG_FEEDBACK_STATS_DDL, SONG_FEEDBACK_STATS_FILL,
+    _ensure_rollup_table
+)
+from src.davidbot.database.models import Base, Lyrics, MessageLog, Song, ThemeMapping, UserFeedback
+from src.davidbot.database.repositories import (
+    LyricsRepository, SongRepository, SongUsageRepository, ThemeMappingRepository, _has_sqlite_table
+)
+
+LONG_AGO = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Create a sessionmaker on a fresh file database, so sessions see only committed rows."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'davidbot.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add(Song(song_id=1, title="Amazing Grace", artist="John Newton", original_key="D"))
+    session.commit()
+    session.close()
+    yield factory
+    engine.dispose()
+
+
+class TestFamiliarityCache:
+    """Test that cached familiarity scores follow the transaction that changed the usage."""
+
+    def test_score_cached_before_commit_is_dropped_on_commit(self, session_factory):
+        """A score another session caches while a usage write is uncommitted is recomputed after the commit."""
+        writer, reader = session_factory(), session_factory()
+        SongUsageRepository(writer).record_usage(1)
+        assert SongUsageRepository(reader).calculate_familiarity_score(1) == 0.0
+
+        writer.commit()
+        assert SongUsageRepository(reader).calculate_familiarity_score(1) == 1.0
+        writer.close()
+        reader.close()
+
+    def test_score_including_uncommitted_usage_is_dropped_on_rollback(self, session_factory):
+        """A score computed from rows that are then rolled back isn't served afterwards."""
+        session = session_factory()
+        repo = SongUsageRepository(session)
+        repo.record_usage(1)
+        assert repo.calculate_familiarity_score(1) == 1.0
+
+        session.rollback()
+        assert repo.calculate_familiarity_score(1) == 0.0
+        session.close()
+
+
+class TestMostFamiliarSongs:
+    """Test the single-query familiarity ranking on any SQLite engine."""
+
+    def test_sql_scores_match_per_song_scores(self, session_factory):
+        """familiarity_decay is available in SQL without going through get_engine."""
+        session = session_factory()
+        repo = SongUsageRepository(session)
+        repo.record_usage(1)
+        repo.record_usage(1, service_type='feedback_positive')
+        session.commit()
+
+        ranked = repo.get_most_familiar_songs()
+        assert [entry['song'].song_id for entry in ranked] == [1]
+        assert ranked[0]['familiarity_score'] == repo.calculate_familiarity_score(1) == 1.1
+        session.close()
+
+
+class TestUpdates:
+    """Test that repository updates keep derived columns current."""
+
+    @pytest.fixture
+    def session(self, session_factory):
+        """Open a session on a song with old timestamps and lyrics."""
+        session = session_factory()
+        session.get(Song, 1).updated_at = LONG_AGO
+        session.add(Lyrics(song_id=1, first_line="Amazing grace", chorus="How sweet the sound"))
+        session.flush()
+        session.query(Lyrics).update({Lyrics.updated_at: LONG_AGO})
+        session.commit()
+        yield session
+        session.close()
+
+    def test_song_column_update_sets_updated_at(self, session):
+        """A plain column update bumps updated_at."""
+        song = SongRepository(session).update(1, {"bpm": 90})
+        assert song.bpm == 90
+        assert song.updated_at > LONG_AGO
+
+    def test_song_update_accepts_property_keys(self, session):
+        """Property keys such as tags_list go through their setters alongside plain columns."""
+        song = SongRepository(session).update(1, {"tags_list": ["grace", "hymn"], "bpm": 84})
+        session.commit()
+        session.expire_all()
+
+        song = session.get(Song, 1)
+        assert song.tags == '["grace","hymn"]'
+        assert song.tags_list == ["grace", "hymn"]
+        assert song.bpm == 84
+        assert song.updated_at > LONG_AGO
+
+    def test_missing_song_updates_nothing(self, session):
+        """Updating an unknown song returns None on either path."""
+        assert SongRepository(session).update(99, {"bpm": 90}) is None
+        assert SongRepository(session).update(99, {"tags_list": ["grace"]}) is None
+
+    def test_lyrics_update_refreshes_search_blob_and_updated_at(self, session):
+        """search_blob combines the new section with the stored ones."""
+        LyricsRepository(session).update(1, {"bridge": "I once was lost"})
+        session.commit()
+        session.expire_all()
+
+        lyrics = session.query(Lyrics).filter_by(song_id=1).one()
+        assert lyrics.search_blob == lyrics.combined_content == "Amazing grace | How sweet the sound | I once was lost"
+        assert lyrics.updated_at > LONG_AGO
+
+
+class TestRollupTables:
+    """Test that trigger-maintained rollups always equal a live GROUP BY of their source."""
+
+    FEEDBACK_ROLLUP = "SELECT song_id, action, feedback_count FROM song_feedback_stats"
+    FEEDBACK_LIVE = "SELECT song_id, action, COUNT(*) FROM user_feedback GROUP BY song_id, action"
+    MESSAGE_ROLLUP = "SELECT day, message_type, message_count FROM message_type_daily"
+    MESSAGE_LIVE = "SELECT date(timestamp), message_type, COUNT(*) FROM message_logs GROUP BY date(timestamp), message_type"
+
+    @pytest.fixture
+    def session(self, session_factory):
+        """Open a session on a database with both rollup tables installed."""
+        session = session_factory()
+        with session.get_bind().begin() as connection:
+            _ensure_rollup_table(connection, SONG_FEEDBACK_STATS_DDL, SONG_FEEDBACK_STATS_FILL)
+            _ensure_rollup_table(connection, MESSAGE_TYPE_DAILY_DDL, MESSAGE_TYPE_DAILY_FILL)
+        session.add(Song(song_id=2, title="Cornerstone", artist="Hillsong", original_key="C"))
+        session.commit()
+        yield session
+        session.close()
+
+    @staticmethod
+    def assert_matches(session, rollup, live):
+        assert sorted(session.execute(text(rollup)).all()) == sorted(session.execute(text(live)).all())
+
+    def test_feedback_rollup_follows_insert_update_and_delete(self, session):
+        """Moving feedback between songs and actions shifts the counts; emptied buckets disappear."""
+        now = datetime(2026, 3, 1, 10)
+        session.add_all([
+            UserFeedback(timestamp=now, user_id=user, song_id=song_id, action=action)
+            for user, song_id, action in [("a", 1, "thumbs_up"), ("b", 1, "thumbs_up"), ("c", 2, "thumbs_down")]
+        ])
+        session.flush()
+        self.assert_matches(session, self.FEEDBACK_ROLLUP, self.FEEDBACK_LIVE)
+
+        session.execute(update(UserFeedback).where(UserFeedback.user_id == "c").values(action="thumbs_up"))
+        session.execute(update(UserFeedback).where(UserFeedback.user_id == "a").values(song_id=2))
+        session.execute(update(UserFeedback).where(UserFeedback.user_id == "b").values(user_id="b2"))
+        self.assert_matches(session, self.FEEDBACK_ROLLUP, self.FEEDBACK_LIVE)
+        assert session.execute(text(self.FEEDBACK_ROLLUP)).all() == [(1, "thumbs_up", 1), (2, "thumbs_up", 2)]
+
+        session.execute(delete(UserFeedback).where(UserFeedback.song_id == 1))
+        self.assert_matches(session, self.FEEDBACK_ROLLUP, self.FEEDBACK_LIVE)
+        assert session.execute(text(self.FEEDBACK_ROLLUP)).all() == [(2, "thumbs_up", 2)]
+
+    def test_message_rollup_follows_insert_update_and_delete(self, session):
+        """Changing a log's type or day moves it between buckets; emptied buckets disappear."""
+        def log(message_type, timestamp):
+            return MessageLog(timestamp=timestamp, user_id="u", message_type=message_type,
+                              message_content="hi", response_content="hello")
+
+        first = log("search", datetime(2026, 3, 1, 9))
+        second = log("search", datetime(2026, 3, 1, 23))
+        third = log("more", datetime(2026, 3, 2, 8))
+        session.add_all([first, second, third])
+        session.flush()
+        self.assert_matches(session, self.MESSAGE_ROLLUP, self.MESSAGE_LIVE)
+
+        first.message_type = "feedback"
+        second.timestamp = datetime(2026, 3, 2, 0, 30)
+        third.response_content = "edited"
+        session.flush()
+        self.assert_matches(session, self.MESSAGE_ROLLUP, self.MESSAGE_LIVE)
+        assert ("2026-03-01", "search", 0) not in session.execute(text(self.MESSAGE_ROLLUP)).all()
+
+        session.delete(third)
+        session.flush()
+        self.assert_matches(session, self.MESSAGE_ROLLUP, self.MESSAGE_LIVE)
+        assert sorted(session.execute(text(self.MESSAGE_ROLLUP)).all()) == [
+            ("2026-03-01", "feedback", 1), ("2026-03-02", "search", 1)
+        ]
+
+    def test_older_triggers_are_replaced(self, session):
+        """A database from before the update trigger gets the current triggers and a refilled table."""
+        with session.get_bind().begin() as connection:
+            connection.execute(text("DROP TRIGGER song_feedback_stats_au"))
+            connection.execute(text("DROP TRIGGER song_feedback_stats_ad"))
+            connection.execute(text(
+                "CREATE TRIGGER song_feedback_stats_ad AFTER DELETE ON user_feedback BEGIN "
+                "UPDATE song_feedback_stats SET feedback_count = feedback_count - 1 "
+                "WHERE song_id = old.song_id AND action = old.action; END"
+            ))
+            connection.execute(text("INSERT INTO song_feedback_stats VALUES (9, 'stale', 5)"))
+            _ensure_rollup_table(connection, SONG_FEEDBACK_STATS_DDL, SONG_FEEDBACK_STATS_FILL)
+            sql = connection.execute(text("SELECT sql FROM sqlite_master WHERE name = 'song_feedback_stats_ad'")).scalar()
+
+        assert sql == SONG_FEEDBACK_STATS_DDL["song_feedback_stats_ad"]
+        assert session.execute(text(self.FEEDBACK_ROLLUP)).all() == []
+
+
+class TestPerEngineCaches:
+    """Test that cached lookups never leak between databases that share a URL."""
+
+    @staticmethod
+    def in_memory_session(themes, usage=0, rollups=False):
+        """Open a session on a new in-memory database with the given theme mappings and usage of song 1."""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        if rollups:
+            with engine.begin() as connection:
+                _ensure_rollup_table(connection, SONG_FEEDBACK_STATS_DDL, SONG_FEEDBACK_STATS_FILL)
+        session = sessionmaker(bind=engine)()
+        session.add(Song(song_id=1, title="Amazing Grace", artist="John Newton", original_key="D"))
+        session.add_all(ThemeMapping(song_id=1, theme_name=theme) for theme in themes)
+        for _ in range(usage):
+            SongUsageRepository(session).record_usage(1)
+        session.commit()
+        return session
+
+    def test_two_in_memory_databases_keep_separate_entries(self):
+        """Themes, table lookups and familiarity scores are cached per engine, not per URL."""
+        first = self.in_memory_session(["grace"], usage=1, rollups=True)
+        second = self.in_memory_session(["worship"], usage=2)
+
+        assert ThemeMappingRepository(first).get_all_themes() == ["grace"]
+        assert ThemeMappingRepository(second).get_all_themes() == ["worship"]
+        assert _has_sqlite_table(first, "song_feedback_stats")
+        assert not _has_sqlite_table(second, "song_feedback_stats")
+        assert SongUsageRepository(first).calculate_familiarity_score(1) == 1.0
+        assert SongUsageRepository(second).calculate_familiarity_score(1) == 2.0
+        first.close()
+        second.close()
+
+    def test_reset_and_init_database_drop_cached_entries(self, monkeypatch):
+        """Recreating the tables forgets what was cached for the old ones."""
+        session = self.in_memory_session(["grace"], usage=1)
+        monkeypatch.setattr(database, "_engine", session.get_bind())
+        assert ThemeMappingRepository(session).get_all_themes() == ["grace"]
+        assert SongUsageRepository(session).calculate_familiarity_score(1) == 1.0
+
+        database.reset_database()
+        assert ThemeMappingRepository(session).get_all_themes() == []
+        assert SongUsageRepository(session).calculate_familiarity_score(1) == 0.0
+        assert _has_sqlite_table(session, "song_feedback_stats")
+
+        session.add(Song(song_id=1, title="Amazing Grace", artist="John Newton", original_key="D"))
+        session.add(ThemeMapping(song_id=1, theme_name="hope"))
+        session.commit()
+        assert ThemeMappingRepository(session).get_all_themes() == []  # Raw adds don't invalidate
+        database.init_database()
+        assert ThemeMappingRepository(session).get_all_themes() == ["hope"]
+        session.close()
@@ -91,4 +91,20 @@ class TestSessionManager:
             assert expired_session is None
             
         # Verify session was removed from store
-        assert user_id not in session_manager.sessions
\ No newline at end of file
+        assert user_id not in session_manager.sessions
+
+    def test_least_recently_active_session_evicted_at_capacity(self, sample_search_result):
+        """Test that the store is bounded and drops the least recently active session."""
+        session_manager = SessionManager(max_sessions=2)
+        
+        session_manager.create_or_update_session("user_a", sample_search_result)
+        session_manager.create_or_update_session("user_b", sample_search_result)
+        
+        # Touch user_a so user_b becomes the least recently active
+        session_manager.get_session("user_a")
+        session_manager.create_or_update_session("user_c", sample_search_result)
+        
+        assert len(session_manager.sessions) == 2
+        assert "user_b" not in session_manager.sessions
+        assert session_manager.get_session("user_a") is not None
+        assert session_manager.get_session("user_c") is not None